@@ -0,0 +1,43 @@
+"""indices para filtros frecuentes
+
+Revision ID: 3f9c2a7d81e4
+Revises: b770daa3572d
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c2a7d81e4'
+down_revision: Union[str, Sequence[str], None] = 'b770daa3572d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, tabla, columnas) — deben coincidir con los Index de models.py
+INDICES = [
+    ("ix_impresiones_usuario_fecha", "impresiones", ["usuario_id", "fecha"]),
+    ("ix_impresiones_creado_en", "impresiones", ["creado_en"]),
+    ("ix_deudas_vendedora_estado_fecha", "deudas", ["vendedora_id", "estado", "fecha"]),
+    ("ix_notificaciones_vendedora_fecha", "notificaciones", ["vendedora_id", "fecha"]),
+    ("ix_pagos_vendedora_fecha", "pagos", ["vendedora_id", "fecha"]),
+    ("ix_catalogos_vendedora_id", "catalogos", ["vendedora_id"]),
+    ("ix_vendedoras_nombre", "vendedoras", ["nombre"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # if_not_exists: main.py crea con create_all las tablas nuevas ya con sus índices
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
@@ -0,0 +1,37 @@
+"""indices de referencia para conciliacion bancaria
+
+Revision ID: 8c1e5b2d4a90
+Revises: 3f9c2a7d81e4
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8c1e5b2d4a90'
+down_revision: Union[str, Sequence[str], None] = '3f9c2a7d81e4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (nombre, tabla, columnas) — deben coincidir con los Index de models.py
+INDICES = [
+    ("ix_deudas_estado_referencia", "deudas", ["estado", "referencia"]),
+    ("ix_pagos_estado_referencia", "pagos", ["estado", "referencia"]),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for nombre, tabla, columnas in INDICES:
+        op.create_index(nombre, tabla, columnas, if_not_exists=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for nombre, tabla, _ in reversed(INDICES):
+        op.drop_index(nombre, table_name=tabla, if_exists=True)
@@ -0,0 +1,31 @@
+"""esquema inicial
+
+Revisión base: corresponde al esquema que ya tiene megaprint.db
+(alembic_version = b770daa3572d). No aplica cambios.
+
+Revision ID: b770daa3572d
+Revises: 
+Create Date: 2025-09-16 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b770daa3572d'
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    pass
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    pass
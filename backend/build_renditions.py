@@ -0,0 +1,33 @@
+# build_renditions.py
+# Genera las versiones listas para imprimir de los catálogos ya subidos
+# (uploads/catalogos/pdf y el almacén uploads/archivos). Las que ya existen se reutilizan.
+#   python build_renditions.py
+#   PRINT_PAPERS=carta,a4 PRINT_DPI=300,600 python build_renditions.py
+import os
+import sys
+from routes.almacen import ALMACEN_DIR, TEMP_DIR
+from routes.print_renditions import generar_renditions
+
+UPLOAD_DIR = "uploads/catalogos/pdf"
+
+
+def _archivos():
+    if os.path.isdir(UPLOAD_DIR):
+        for nombre in sorted(os.listdir(UPLOAD_DIR)):
+            yield os.path.join(UPLOAD_DIR, nombre)
+    for raiz, dirs, nombres in os.walk(ALMACEN_DIR):
+        dirs[:] = sorted(d for d in dirs if os.path.join(raiz, d) != TEMP_DIR)
+        for nombre in sorted(nombres):
+            yield os.path.join(raiz, nombre)
+
+
+def main():
+    archivos = list(_archivos())
+    for ruta in archivos:
+        generar_renditions(ruta)
+    print(f"{len(archivos)} archivos revisados ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
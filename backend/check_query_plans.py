@@ -0,0 +1,151 @@
+# check_query_plans.py
+# Ejecuta las consultas de los endpoints más usados sobre una base SQLite
+# temporal (creada desde models.py) y revisa su EXPLAIN QUERY PLAN.
+# Sale con código 1 si alguna consulta recorre una tabla completa o si la
+# lista de impresiones pierde los bordes del día (medianoche).
+#   python check_query_plans.py
+import sys
+from datetime import date
+
+from fastapi import HTTPException, Response
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Vendedora, Categoria, Catalogo, Configuracion
+from routes import auth, catalogos, dashboard, deudas, impresiones, notificaciones, pagos
+from routes.cambios import instalar_triggers
+from routes.cache_http import instalar_versiones, etag_tablas
+from routes.config_helper import cargar_politica
+from schemas import ImpresionCreate
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+TABLAS = set(Base.metadata.tables)
+
+consultas = []
+
+
+@event.listens_for(engine, "before_cursor_execute")
+def _capturar(conn, cursor, statement, parameters, context, executemany):
+    if statement.lstrip().upper().startswith("SELECT") and not executemany:
+        consultas.append((statement, parameters))
+
+
+def _sembrar(db):
+    db.add_all([
+        Vendedora(id=1, nombre="ana", email="ana@correo.com", password="1234", estado="aprobada"),
+        Categoria(id=1, nombre="General"),
+        Catalogo(id=1, nombre="Folleto", categoria_id=1, url="folleto.jpg", archivo="folleto.jpg"),
+        Configuracion(clave="diario", valor="30", tipo="limit"),
+        Configuracion(clave="semanal", valor="150", tipo="limit"),
+        Configuracion(clave="costo_excedente", valor="0.5", tipo="float"),
+    ])
+    db.commit()
+
+
+# (descripción, función que llama al endpoint)
+CHEQUEOS = [
+    ("auth.login", lambda db: auth.login(auth.LoginRequest(username="ana", password="1234"), db)),
+    ("impresiones.crear_impresion", lambda db: impresiones.crear_impresion(
+        ImpresionCreate(usuario_id=1, catalogo_id=1, fecha=date.today(), cantidad_impresa=40), db)),
+    ("impresiones.obtener_conteos", lambda db: impresiones.obtener_conteos(1, db)),
+    ("impresiones.obtener_todas_impresiones", lambda db: impresiones.obtener_todas_impresiones(
+        Response(), desde=None, hasta=None, vendedora_id=None, catalogo_id=None, cursor=None,
+        limite=None, since=None, db=db)),
+    ("deudas.obtener_deudas_usuario", lambda db: deudas.obtener_deudas_usuario(1, since=None, db=db)),
+    ("notificaciones.obtener_notificaciones", lambda db: notificaciones.obtener_notificaciones(1, Response(), since=None, db=db)),
+    ("pagos.get_pagos_vendedora", lambda db: pagos.get_pagos_vendedora(1, Response(), since=None, db=db)),
+    # Listas incrementales (?since=, routes/cambios.py)
+    ("deudas.obtener_deudas_usuario since", lambda db: deudas.obtener_deudas_usuario(1, since=0, db=db)),
+    ("notificaciones.obtener_notificaciones since",
+     lambda db: notificaciones.obtener_notificaciones(1, Response(), since=0, db=db)),
+    ("pagos.get_pagos_vendedora since", lambda db: pagos.get_pagos_vendedora(1, Response(), since=0, db=db)),
+    ("pagos.get_all_pagos since", lambda db: pagos.get_all_pagos(Response(), since=0, db=db)),
+    ("catalogos.get_catalogo_vendedora", lambda db: catalogos.get_catalogo_vendedora(1, db)),
+    ("dashboard.get_dashboard_stats", lambda db: dashboard.get_dashboard_stats(None, db)),
+    ("dashboard.get_dashboard_mensual", lambda db: dashboard.get_dashboard_mensual(12, None, db)),
+    # ETag de las listas (versiones_tabla, routes/cache_http.py)
+    ("cache_http.etag_tablas", lambda db: etag_tablas(db, "catalogos", "categorias")),
+]
+
+
+def _escaneos_completos(plan):
+    """Devuelve las tablas que el plan recorre sin índice ('SCAN tabla' a secas)."""
+    malos = []
+    for fila in plan:
+        detalle = fila[-1]
+        partes = detalle.split()
+        if len(partes) >= 2 and partes[0] == "SCAN" and partes[1] in TABLAS and "USING" not in partes:
+            malos.append(detalle)
+    return malos
+
+
+def _revisar_bordes_del_dia(db) -> int:
+    """
+    Las impresiones de las 00:00:00 entran en el día (creado_en se guarda como
+    texto sin microsegundos) y las del día siguiente no. Devuelve los errores.
+    """
+    dia = date(2020, 1, 6)
+    for creado_en in ("2020-01-05 23:59:59.999999", "2020-01-06 00:00:00",
+                      "2020-01-06 23:59:59", "2020-01-07 00:00:00"):
+        db.execute(text(
+            "INSERT INTO impresiones (usuario_id, catalogo_id, fecha, cantidad_impresa, creado_en) "
+            "VALUES (1, 1, :fecha, 1, :creado_en)"
+        ), {"fecha": creado_en[:10], "creado_en": creado_en})
+    db.commit()
+
+    resultado = impresiones.obtener_todas_impresiones(
+        Response(), desde=dia, hasta=dia, vendedora_id=1, catalogo_id=None, cursor=None,
+        limite=None, since=None, db=db)
+    horas = sorted(str(i["fecha_hora"]) for i in resultado[0]["conteosDiarios"])
+    esperadas = ["2020-01-06 00:00:00", "2020-01-06 23:59:59"]
+    if horas != esperadas:
+        print(f"❌ impresiones del día {dia}: {horas} (se esperaba {esperadas})")
+        return 1
+    print(f"✅ impresiones del día {dia}: incluye la medianoche y excluye el día siguiente")
+    return 0
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    instalar_triggers(engine)
+    instalar_versiones(engine)
+    db = Session()
+    _sembrar(db)
+    # La política de límites se lee completa una vez por versión de la
+    # configuración; se precarga para revisar solo el camino de cada request.
+    cargar_politica(db)
+
+    errores = 0
+    for nombre, llamar in CHEQUEOS:
+        errores_previos = errores
+        consultas.clear()
+        try:
+            llamar(db)
+        except HTTPException:
+            pass  # solo interesan las consultas que llegó a ejecutar
+        ejecutadas = list(consultas)
+
+        with engine.connect() as conn:
+            for sql, params in ejecutadas:
+                plan = conn.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+                for detalle in _escaneos_completos(plan):
+                    errores += 1
+                    print(f"❌ {nombre}: {detalle}\n    {' '.join(sql.split())}")
+        marca = "✅" if errores == errores_previos else "❌"
+        print(f"{marca} {nombre}: {len(ejecutadas)} consultas revisadas")
+
+    bordes_mal = _revisar_bordes_del_dia(db)
+    db.close()
+    if errores:
+        print(f"{errores} consultas hacen un recorrido completo de tabla")
+    if errores or bordes_mal:
+        return 1
+    print("Todas las consultas usan índices ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
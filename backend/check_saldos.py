@@ -0,0 +1,98 @@
+# check_saldos.py
+# Revisa aplicar_pago sobre una base SQLite temporal (creada desde models.py):
+# varios pagos parciales en la misma sesión (también los de una conciliación
+# bancaria) no deben aplicarse dos veces a la misma deuda, y el saldo tiene
+# que quedar igual a las deudas pendientes.
+# Sale con código 1 si algo no cuadra.
+#   python check_saldos.py
+import io
+import sys
+from datetime import datetime, timedelta
+
+from fastapi import UploadFile
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from database import Base
+from models import Vendedora, Deuda, Pago
+from routes.conciliacion import conciliar_extracto
+from routes.saldos import registrar_movimiento, aplicar_pago, obtener_saldo, verificar_saldos
+
+engine = create_engine("sqlite://", connect_args={"check_same_thread": False})
+Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+
+def _sembrar(db, montos):
+    """Una vendedora con una deuda pendiente por monto, de la más vieja a la más nueva."""
+    db.add(Vendedora(id=1, nombre="ana", email="ana@correo.com", password="1234", estado="aprobada"))
+    inicio = datetime(2025, 1, 1)
+    for i, monto in enumerate(montos):
+        deuda = Deuda(vendedora_id=1, monto=monto, estado="pendiente", fecha=inicio + timedelta(days=i))
+        db.add(deuda)
+        db.flush()
+        registrar_movimiento(db, 1, monto, "cargo", "Deuda de prueba", deuda_id=deuda.id)
+    db.commit()
+
+
+def _pagar_directo(db, pagos):
+    for monto in pagos:  # todos en la misma transacción
+        aplicar_pago(db, 1, monto)
+    db.commit()
+
+
+def _conciliar(csv_banco, referencias_pagos):
+    """Pagos pendientes con esas referencias y el extracto `csv_banco` conciliado de una vez."""
+    def pagar(db, pagos):
+        for referencia, monto in zip(referencias_pagos, pagos):
+            db.add(Pago(vendedora_id=1, monto=monto, referencia=referencia, estado="pendiente"))
+        db.commit()
+        archivo = UploadFile(file=io.BytesIO(csv_banco.encode()), filename="banco.csv")
+        conciliar_extracto(archivo=archivo, simular=False, db=db)
+    return pagar
+
+
+def _caso(nombre, montos, pagos, pagadas_esperadas, saldo_esperado, pagar=_pagar_directo):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = Session()
+    try:
+        _sembrar(db, montos)
+        pagar(db, pagos)
+
+        pagadas = db.query(Deuda).filter(Deuda.estado == "pagada").count()
+        saldo = obtener_saldo(db, 1)
+        problemas = [f"{p} (guardado={g} esperado={e})" for _, p, g, e in verificar_saldos(db)]
+        if pagadas != pagadas_esperadas:
+            problemas.append(f"{pagadas} deudas pagadas, se esperaban {pagadas_esperadas}")
+        if abs(saldo - saldo_esperado) > 0.005:
+            problemas.append(f"saldo {saldo}, se esperaba {saldo_esperado}")
+    finally:
+        db.close()
+
+    for problema in problemas:
+        print(f"❌ {nombre}: {problema}")
+    if not problemas:
+        print(f"✅ {nombre}")
+    return len(problemas)
+
+
+def main():
+    errores = 0
+    errores += _caso("dos pagos parciales que cubren deudas enteras", [10, 10, 10], [10, 10], 2, 10)
+    errores += _caso("pago parcial que deja una deuda a medias", [10, 10, 10], [15, 10], 2, 5)
+    errores += _caso("pago parcial y después pago total", [10, 10, 10], [10, 20], 3, 0)
+    errores += _caso("conciliación con dos pagos de la misma vendedora", [10, 10, 10], [10, 10], 2, 10,
+                     _conciliar("referencia;monto\n00123456;10,00\n00123457;10,00\n", ["123456", "PM 123457"]))
+    errores += _caso("conciliación: referencia corta sin monto queda observada", [10, 10, 10], [10], 0, 30,
+                     _conciliar("referencia\nPM 0007\n", ["7"]))
+    errores += _caso("conciliación: referencia corta con el monto exacto se aplica", [10, 10, 10], [10], 1, 20,
+                     _conciliar("referencia,monto\nPM 0007,10.00\n", ["7"]))
+    if errores:
+        print(f"{errores} problemas encontrados")
+        return 1
+    print("aplicar_pago cuadra con el libro de saldos ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,25 @@
+# compact_config.py
+# Deja una sola fila por clave en configuraciones (la más nueva) y sube la
+# versión para que los procesos en marcha recarguen los límites.
+#   python compact_config.py
+import sys
+from database import Base, SessionLocal, engine
+import models  # registra las tablas en Base
+from routes.config_helper import compactar_configuraciones, cargar_limites
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        borradas = compactar_configuraciones(db)
+        limites = cargar_limites(db)
+        print(f"Configuraciones compactadas: {borradas} filas borradas ✅")
+        print(f"Límites vigentes (versión {limites.version}): {limites.como_dict()}")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,72 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.routing import APIRoute
 import os
 from sqlalchemy import inspect as sa_inspect
 
 # Routers
-from routes import auth, volantes, vendedoras, categorias, pagos, catalogos, dashboard, admin, impresiones, deudas, notificaciones
+from routes import auth, volantes, vendedoras, categorias, pagos, catalogos, dashboard, admin, impresiones, deudas, notificaciones, print_jobs, saldos, conciliacion, miniaturas, stats, exportar, eventos
+from routes.print_queue import pool as pool_impresion
 from routes.config_helper import router as config_router
+from routes.cache_http import ArchivosEstaticos, NoModificado, respuesta_no_modificado
+from routes.almacen import ALMACEN_DIR, URL_ALMACEN
 
 # Base de datos
 from database import Base, engine
 
 # Crear tablas si no existen
+tablas_previas = set(sa_inspect(engine).get_table_names())
 Base.metadata.create_all(bind=engine)
+
+# Secuencia de cambios para las listas con ?since= (routes/cambios.py)
+from routes.cambios import instalar_triggers
+instalar_triggers(engine)
+
+# Versiones por tabla para los ETag (routes/cache_http.py)
+from routes.cache_http import instalar_versiones
+instalar_versiones(engine)
+
+# Acumulados de consumo: si la tabla es nueva se llenan desde el historial
+if "consumo_diario" not in tablas_previas:
+    from database import SessionLocal
+    from routes.consumo import reconstruir_consumo
+    with SessionLocal() as db:
+        print("Acumulados de consumo inicializados:", reconstruir_consumo(db))
+
+# Cubo de impresiones (/stats/series): si la tabla es nueva se llena desde el historial
+if "impresiones_cubo" not in tablas_previas:
+    from database import SessionLocal
+    from routes.cubo import reconstruir_cubo
+    with SessionLocal() as db:
+        print("Cubo de impresiones inicializado:", reconstruir_cubo(db))
+
+# Métricas del dashboard: si la tabla es nueva se calculan desde el historial
+if "metricas" not in tablas_previas:
+    from database import SessionLocal
+    from routes.metricas import reconstruir_metricas
+    with SessionLocal() as db:
+        print("Métricas inicializadas:", reconstruir_metricas(db))
+
+# Saldos por vendedora: si el libro es nuevo se abre con las deudas pendientes
+if "saldos_vendedora" not in tablas_previas:
+    from database import SessionLocal
+    from routes.saldos import inicializar_saldos
+    with SessionLocal() as db:
+        print("Saldos inicializados:", inicializar_saldos(db))
 inspector = sa_inspect(engine)
 print("Tablas en la DB:", inspector.get_table_names())
 print("Columnas en 'impresiones' según SQLAlchemy:", [c["name"] for c in inspector.get_columns("impresiones")])
 
 app = FastAPI(title="Sistema de Volantes")
 
+# 304 de los endpoints con ETag (routes/cache_http.py)
+app.add_exception_handler(NoModificado, respuesta_no_modificado)
+
 
 UPLOAD_DIR = "uploads/comprobantes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 
-app.mount("/uploads/comprobantes", StaticFiles(directory=UPLOAD_DIR), name="uploads")
+app.mount("/uploads/comprobantes", ArchivosEstaticos(directory=UPLOAD_DIR, max_age=86400), name="uploads")
 
 # Configuración CORS
 origins = [
@@ -38,6 +80,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],          # permite GET, POST, etc.
     allow_headers=["*"],          # permite todos los headers
+    expose_headers=["X-Next-Cursor", "X-Since"],  # cursores de paginación y de cambios (?since=)
 )
 
 # Routers principales
@@ -54,10 +97,34 @@ app.include_router(dashboard.router)
 app.include_router(admin.router, prefix="/admin", tags=["Admin"])
 app.include_router(volantes.router, prefix="/volantes")
 app.include_router(notificaciones.router, prefix="/notificaciones", tags=["Notificaciones"])
+app.include_router(saldos.router, prefix="/saldos", tags=["Saldos"])
+app.include_router(conciliacion.router, prefix="/conciliacion", tags=["Conciliación"])
+app.include_router(print_jobs.router, prefix="/print", tags=["Cola de impresión"])
+app.include_router(miniaturas.router, prefix="/miniaturas", tags=["Miniaturas"])
+app.include_router(stats.router, prefix="/stats", tags=["Estadísticas"])
+app.include_router(exportar.router, prefix="/export", tags=["Exportación"])
+app.include_router(eventos.router, prefix="/eventos", tags=["Eventos"])
+
+
+# Pool de workers de la cola de impresión
+@app.on_event("startup")
+def iniciar_pool_impresion():
+    if pool_impresion.workers > 0:
+        pool_impresion.iniciar()
+
+@app.on_event("shutdown")
+def detener_pool_impresion():
+    pool_impresion.detener()
+    miniaturas.detener()
+    eventos.cerrar_todas()
 
 
 # Montaje de PDFs
-app.mount("/catalogos/files", StaticFiles(directory="uploads/catalogos/pdf"), name="catalogos_files")
+app.mount("/catalogos/files", ArchivosEstaticos(directory="uploads/catalogos/pdf", max_age=86400), name="catalogos_files")
+
+# Almacén por contenido (routes/almacen.py)
+os.makedirs(ALMACEN_DIR, exist_ok=True)
+app.mount(URL_ALMACEN, ArchivosEstaticos(directory=ALMACEN_DIR, inmutable=True), name="archivos")
 
 
 # Imprimir rutas para debug
@@ -0,0 +1,71 @@
+# migrar_almacen.py
+# Pasa los archivos de catálogos, volantes y comprobantes al almacén por
+# contenido (uploads/archivos/ab/cd/<sha256>.<ext>), actualiza las columnas y
+# recalcula las referencias. Los archivos repetidos quedan una sola vez.
+#   python migrar_almacen.py              -> migra y borra los originales ya copiados
+#   python migrar_almacen.py --conservar  -> migra sin borrar los originales
+#   python migrar_almacen.py --recontar   -> solo recalcula las referencias
+import os
+import sys
+from database import Base, SessionLocal, engine
+from models import Catalogo, Volante, Deuda
+from routes.almacen import (
+    URL_ALMACEN, clave_de, ruta_archivo, importar_archivo,
+    recalcular_referencias, borrar_del_disco
+)
+
+CATALOGOS_DIR = "uploads/catalogos/pdf"
+COMPROBANTES_DIR = "uploads/comprobantes"
+
+
+def _migrar(valor, directorio, importados: dict):
+    """Clave del almacén para un valor viejo (None si no hay archivo o no se reconoce)."""
+    if not valor or clave_de(valor):
+        return None
+    ruta = ruta_archivo(valor, directorio)
+    if ruta not in importados:
+        importados[ruta] = importar_archivo(ruta) if os.path.isfile(ruta) else None
+        if importados[ruta] is None:
+            print(f"⚠️ Se deja como está: {ruta}")
+    return importados[ruta]
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    importados = {}  # ruta vieja -> clave
+    try:
+        if "--recontar" not in sys.argv:
+            for catalogo in db.query(Catalogo):
+                clave = _migrar(catalogo.archivo or catalogo.url, CATALOGOS_DIR, importados)
+                if clave:
+                    catalogo.archivo, catalogo.url = clave, f"{URL_ALMACEN}/{clave}"
+            for volante in db.query(Volante):
+                clave = _migrar(volante.archivo, CATALOGOS_DIR, importados)
+                if clave:
+                    volante.archivo = clave
+            for deuda in db.query(Deuda).filter(Deuda.capture_url.isnot(None)):
+                clave = _migrar(deuda.capture_url, COMPROBANTES_DIR, importados)
+                if clave:
+                    deuda.capture_url = f"{URL_ALMACEN.lstrip('/')}/{clave}"
+
+        huerfanos = recalcular_referencias(db)
+        db.commit()
+    finally:
+        db.close()
+
+    with SessionLocal() as db:
+        for ruta in huerfanos:
+            borrar_del_disco(db, ruta)
+
+    copiados = {ruta: clave for ruta, clave in importados.items() if clave}
+    if "--conservar" not in sys.argv:
+        for ruta in copiados:
+            os.remove(ruta)
+    print(f"{len(copiados)} archivos migrados en {len(set(copiados.values()))} únicos, "
+          f"{len(huerfanos)} sin uso eliminados ✅")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
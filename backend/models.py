@@ -1,8 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Numeric, TIMESTAMP, ForeignKey, func, Boolean
-from sqlalchemy.orm import declarative_base, relationship
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, Numeric, TIMESTAMP, ForeignKey, func, Boolean, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
 import datetime
 
-Base = declarative_base()
+from database import Base
 
 # -----------------------------
 # VENDEDORA
@@ -12,7 +12,7 @@ class Vendedora(Base):
     __table_args__ = {"extend_existing": True}
 
     id = Column(Integer, primary_key=True, index=True)
-    nombre = Column(String)
+    nombre = Column(String, index=True)  # login por nombre
     email = Column(String, unique=True)
     password = Column(String)  # ⚠️ cifrar en producción
     estado = Column(String, default="pendiente")
@@ -38,7 +38,7 @@ class Catalogo(Base):
     id = Column(Integer, primary_key=True, index=True)
     nombre = Column(String)
     categoria_id = Column(Integer, ForeignKey("categorias.id"))
-    vendedora_id = Column(Integer, ForeignKey("vendedoras.id"), nullable=True)
+    vendedora_id = Column(Integer, ForeignKey("vendedoras.id"), nullable=True, index=True)
     url = Column(String)
     archivo = Column(String, nullable=True) 
 
@@ -60,12 +60,33 @@ class Volante(Base):
 
     vendedora = relationship("Vendedora", backref="volantes")
 
+# -----------------------------
+# ARCHIVOS (almacén por contenido)
+# -----------------------------
+class Archivo(Base):
+    """
+    Un archivo por contenido en uploads/archivos/<clave>. `referencias` cuenta
+    cuántos catálogos, volantes y deudas lo usan; en cero se borra del disco.
+    """
+    __tablename__ = "archivos"
+
+    id = Column(Integer, primary_key=True, index=True)
+    sha256 = Column(String(64), nullable=False, unique=True)
+    clave = Column(String, nullable=False, unique=True)  # 'ab/cd/<sha256>.<ext>'
+    tipo = Column(String, nullable=False)   # 'pdf', 'jpg', 'png', 'gif', 'webp'
+    tamano = Column(Integer, nullable=False)
+    referencias = Column(Integer, nullable=False, default=0)
+    creado_en = Column(DateTime, default=datetime.datetime.utcnow)
+
 # -----------------------------
 # IMPRESION
 # -----------------------------
 class Impresion(Base):
     __tablename__ = "impresiones"
-    __table_args__ = {"extend_existing": True}
+    __table_args__ = (
+        Index("ix_impresiones_usuario_fecha", "usuario_id", "fecha"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     usuario_id = Column(Integer, ForeignKey("vendedoras.id"), nullable=False)
@@ -74,17 +95,134 @@ class Impresion(Base):
     cantidad_impresa = Column(Integer, nullable=False)
     exceso = Column(Integer, default=0)
     costo_extra = Column(Numeric(10,2), default=0)
-    creado_en = Column(TIMESTAMP, server_default=func.now())
+    creado_en = Column(TIMESTAMP, server_default=func.now(), index=True)
 
     vendedora = relationship("Vendedora")
     catalogo = relationship("Catalogo")
 
+# -----------------------------
+# CONSUMO (acumulados de impresiones para los límites)
+# -----------------------------
+class ConsumoDiario(Base):
+    __tablename__ = "consumo_diario"
+
+    usuario_id = Column(Integer, ForeignKey("vendedoras.id"), primary_key=True)
+    fecha = Column(Date, primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+
+class ConsumoSemanal(Base):
+    __tablename__ = "consumo_semanal"
+
+    usuario_id = Column(Integer, ForeignKey("vendedoras.id"), primary_key=True)
+    anio = Column(Integer, primary_key=True)    # año ISO
+    semana = Column(Integer, primary_key=True)  # semana ISO (1-53)
+    total = Column(Integer, nullable=False, default=0)
+
+# -----------------------------
+# CUBO DE IMPRESIONES (periodo × vendedora × catálogo, para /stats/series)
+# -----------------------------
+class ImpresionCubo(Base):
+    """
+    Una fila por (nivel, inicio, vendedora, catálogo). `nivel` es 'dia',
+    'semana' o 'mes' e `inicio` el primer día del periodo (las semanas
+    empiezan el lunes): cada nivel ya está sumado, nada se agrupa al leer.
+    """
+    __tablename__ = "impresiones_cubo"
+    __table_args__ = (
+        Index("ix_impresiones_cubo_vendedora", "nivel", "vendedora_id", "inicio"),
+        Index("ix_impresiones_cubo_catalogo", "nivel", "catalogo_id", "inicio"),
+    )
+
+    nivel = Column(String, primary_key=True)
+    inicio = Column(Date, primary_key=True)
+    vendedora_id = Column(Integer, ForeignKey("vendedoras.id"), primary_key=True)
+    catalogo_id = Column(Integer, ForeignKey("catalogos.id"), primary_key=True)
+    ordenes = Column(Integer, nullable=False, default=0)
+    copias = Column(Integer, nullable=False, default=0)
+    exceso = Column(Integer, nullable=False, default=0)
+    costo_extra = Column(Float, nullable=False, default=0)
+
+# -----------------------------
+# MÉTRICAS (acumulados del dashboard por mes y por día)
+# -----------------------------
+class Metrica(Base):
+    """
+    periodo: 'YYYY-MM' (mes), 'YYYY-MM-DD' (día) o 'actual' (contadores sin
+    fecha, como vendedoras por estado). Se actualiza en la misma transacción
+    que la escritura que la mueve (routes/metricas.py).
+    """
+    __tablename__ = "metricas"
+
+    periodo = Column(String, primary_key=True)
+    clave = Column(String, primary_key=True)  # 'impresiones', 'copias', 'ingresos', 'vendedoras_<estado>'
+    valor = Column(Float, nullable=False, default=0)
+
+# -----------------------------
+# SALDOS (libro de movimientos + saldo materializado)
+# -----------------------------
+class MovimientoSaldo(Base):
+    """
+    Libro de solo inserción. `monto` con signo: cargos (+) suben el saldo,
+    abonos y verificaciones (-) lo bajan. Nunca se edita ni se borra.
+    """
+    __tablename__ = "movimientos_saldo"
+    __table_args__ = (
+        Index("ix_movimientos_saldo_vendedora_id", "vendedora_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    vendedora_id = Column(Integer, ForeignKey("vendedoras.id"), nullable=False)
+    tipo = Column(String, nullable=False)  # 'apertura', 'cargo', 'abono', 'verificacion', 'ajuste'
+    monto = Column(Float, nullable=False)
+    deuda_id = Column(Integer, ForeignKey("deudas.id"), nullable=True)
+    pago_id = Column(Integer, ForeignKey("pagos.id"), nullable=True)
+    concepto = Column(String, nullable=True)
+    creado_en = Column(DateTime, default=datetime.datetime.utcnow)
+
+class SaldoVendedora(Base):
+    """Saldo actual = suma de los movimientos = deudas en estado 'pendiente'."""
+    __tablename__ = "saldos_vendedora"
+
+    vendedora_id = Column(Integer, ForeignKey("vendedoras.id"), primary_key=True)
+    saldo = Column(Float, nullable=False, default=0)
+    actualizado_en = Column(DateTime, default=datetime.datetime.utcnow)
+
+# -----------------------------
+# TRABAJOS DE IMPRESIÓN (cola persistente)
+# -----------------------------
+class PrintJob(Base):
+    __tablename__ = "print_jobs"
+    __table_args__ = (
+        Index("ix_print_jobs_estado_disponible", "estado", "disponible_en"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    usuario_id = Column(Integer, ForeignKey("vendedoras.id"), nullable=True)
+    catalogo_id = Column(Integer, ForeignKey("catalogos.id"), nullable=True)
+    impresion_id = Column(Integer, ForeignKey("impresiones.id"), nullable=True)
+    file_path = Column(String, nullable=False)
+    copies = Column(Integer, nullable=False, default=1)
+    copias_impresas = Column(Integer, nullable=False, default=0)
+    estado = Column(String, nullable=False, default="queued")  # queued, printing, done, failed
+    intentos = Column(Integer, nullable=False, default=0)
+    max_intentos = Column(Integer, nullable=False, default=5)
+    error = Column(String, nullable=True)
+    lease_owner = Column(String, nullable=True)    # worker que lo tiene tomado
+    lease_until = Column(DateTime, nullable=True)  # vence el lease -> vuelve a la cola
+    disponible_en = Column(DateTime, default=datetime.datetime.utcnow)  # backoff entre reintentos
+    creado_en = Column(DateTime, default=datetime.datetime.utcnow)
+    actualizado_en = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
 # -----------------------------
 # PAGO
 # -----------------------------
 class Pago(Base):
     __tablename__ = "pagos"
-    __table_args__ = {"extend_existing": True} 
+    __table_args__ = (
+        Index("ix_pagos_vendedora_fecha", "vendedora_id", "fecha"),
+        Index("ix_pagos_estado_referencia", "estado", "referencia"),
+        {"extend_existing": True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     vendedora_id = Column(Integer, ForeignKey("vendedoras.id"))
@@ -102,6 +240,11 @@ class Pago(Base):
 # -----------------------------
 class Deuda(Base):
     __tablename__ = "deudas"
+    __table_args__ = (
+        Index("ix_deudas_vendedora_estado_fecha", "vendedora_id", "estado", "fecha"),
+        Index("ix_deudas_estado_referencia", "estado", "referencia"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     vendedora_id = Column(Integer, ForeignKey("vendedoras.id"))
     volante_id = Column(Integer, ForeignKey("volantes.id"), nullable=True)  # nuevo
@@ -126,13 +269,75 @@ class Configuracion(Base):
     clave = Column(String, unique=True, index=True, nullable=False)
     valor = Column(String, nullable=False)
     tipo = Column(String, nullable=False)  # "int", "float", "str"
-    
+
+class LimiteVendedora(Base):
+    """
+    Límites particulares que reemplazan a los globales de configuraciones.
+    vendedora_id / categoria_id en NULL = cualquiera; los valores en NULL se
+    heredan del nivel más general (ver routes/config_helper.py).
+    """
+    __tablename__ = "limites_vendedora"
+    __table_args__ = (
+        Index("ix_limites_vendedora_categoria", "vendedora_id", "categoria_id"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    vendedora_id = Column(Integer, ForeignKey("vendedoras.id"), nullable=True)
+    categoria_id = Column(Integer, ForeignKey("categorias.id"), nullable=True)
+    diario = Column(Float, nullable=True)
+    semanal = Column(Float, nullable=True)
+    mensual = Column(Float, nullable=True)
+    costo_excedente = Column(Float, nullable=True)
+    actualizado_en = Column(DateTime, default=datetime.datetime.utcnow, onupdate=datetime.datetime.utcnow)
+
 class Notificacion(Base):
     __tablename__ = "notificaciones"
+    __table_args__ = (
+        Index("ix_notificaciones_vendedora_fecha", "vendedora_id", "fecha"),
+    )
+
     id = Column(Integer, primary_key=True, index=True)
     vendedora_id = Column(Integer, ForeignKey("vendedoras.id"), nullable=False)
     mensaje = Column(String, nullable=False)
     leido = Column(Boolean, default=False)
     fecha = Column(DateTime, default=datetime.datetime.utcnow)
 
-    vendedora = relationship("Vendedora", backref="notificaciones")
\ No newline at end of file
+    vendedora = relationship("Vendedora", backref="notificaciones")
+# -----------------------------
+# CAMBIOS (secuencia para las listas incrementales ?since=)
+# -----------------------------
+class Cambio(Base):
+    """
+    Una fila por fila de pagos, deudas, impresiones y notificaciones, con el
+    `seq` de su último cambio (AUTOINCREMENT: nunca baja ni se reutiliza).
+    La escriben triggers de SQLite (routes/cambios.py); las filas borradas
+    quedan como operacion='delete'.
+    """
+    __tablename__ = "cambios"
+    __table_args__ = (
+        UniqueConstraint("tabla", "fila_id", name="uq_cambios_tabla_fila"),
+        Index("ix_cambios_tabla_seq", "tabla", "seq"),
+        Index("ix_cambios_tabla_vendedora_seq", "tabla", "vendedora_id", "seq"),
+        {"sqlite_autoincrement": True},
+    )
+
+    seq = Column(Integer, primary_key=True)
+    tabla = Column(String, nullable=False)
+    fila_id = Column(Integer, nullable=False)
+    vendedora_id = Column(Integer, nullable=True)
+    operacion = Column(String, nullable=False)  # 'upsert' o 'delete'
+    fecha = Column(DateTime, server_default=func.now())
+
+
+# -----------------------------
+# VERSIONES POR TABLA (ETag de routes/cache_http.py)
+# -----------------------------
+class VersionTabla(Base):
+    """
+    Contador por tabla. Lo suben triggers de SQLite en cada INSERT, UPDATE o
+    DELETE, así lo ven todos los procesos y también los scripts sueltos.
+    """
+    __tablename__ = "versiones_tabla"
+
+    tabla = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
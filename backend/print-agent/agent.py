@@ -1,17 +1,36 @@
-import time, subprocess, requests
+import os, socket, subprocess, time, requests
 
-API_URL = "http://localhost:8000/print/pending"
+API_URL = os.environ.get("MEGAPRINT_API", "http://localhost:8000")
+AGENT = os.environ.get("PRINT_AGENT_ID", socket.gethostname())
+MAX_JOBS = 10
+WAIT = 25  # segundos de long-poll
 
 def send_to_printer(file_path, copies):
-    for _ in range(copies):
-        subprocess.run(["lp", file_path])
+    # Un solo trabajo de CUPS con todas las copias
+    if copies > 0:
+        subprocess.run(["lp", "-n", str(copies), file_path], check=True)
 
 while True:
     try:
-        jobs = requests.get(API_URL).json()
+        # Long-poll: el servidor responde apenas hay trabajos (o a los WAIT segundos)
+        jobs = requests.get(
+            f"{API_URL}/print/pending",
+            params={"agent": AGENT, "max": MAX_JOBS, "wait": WAIT},
+            timeout=WAIT + 10,
+        ).json()
+
+        resultados = []
         for job in jobs:
-            send_to_printer(job["file_path"], job["copies"])
-            requests.post(f"http://localhost:8000/print/mark_done/{job['id']}")
+            impresas = job.get("copias_impresas") or 0
+            try:
+                send_to_printer(job["file_path"], job["copies"] - impresas)
+                resultados.append({"id": job["id"], "estado": "done", "copias": job["copies"]})
+            except Exception as e:
+                # lp falló: no salió ninguna de las pendientes, quedan las de intentos anteriores
+                resultados.append({"id": job["id"], "estado": "failed", "copias": impresas, "error": str(e)})
+
+        if resultados:
+            requests.post(f"{API_URL}/print/ack", json={"agent": AGENT, "resultados": resultados}, timeout=30)
     except Exception as e:
         print("Error:", e)
-    time.sleep(5)
+        time.sleep(5)
@@ -0,0 +1,34 @@
+# rebuild_consumo.py
+# Recalcula los acumulados diarios/semanales (consumo_diario, consumo_semanal)
+# a partir de la tabla impresiones.
+#   python rebuild_consumo.py            -> reconstruye
+#   python rebuild_consumo.py --verify   -> solo verifica, sale con código 1 si hay diferencias
+import sys
+from database import Base, SessionLocal, engine
+import models  # registra las tablas en Base
+from routes.consumo import reconstruir_consumo, verificar_consumo
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if "--verify" in sys.argv:
+            diferencias = verificar_consumo(db)
+            if not diferencias:
+                print("Acumulados de consumo correctos ✅")
+                return 0
+            for tipo, clave, guardado, esperado in diferencias:
+                print(f"❌ {tipo} {clave}: guardado={guardado} esperado={esperado}")
+            print(f"{len(diferencias)} diferencias encontradas")
+            return 1
+
+        diarios, semanales = reconstruir_consumo(db)
+        print(f"Acumulados reconstruidos: {diarios} diarios, {semanales} semanales ✅")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,36 @@
+# rebuild_metricas.py
+# Recalcula los acumulados de estadísticas desde impresiones, pagos y vendedoras:
+# la tabla metricas (dashboard) y el cubo impresiones_cubo (/stats/series).
+#   python rebuild_metricas.py          -> solo verifica, sale con código 1 si hay diferencias
+#   python rebuild_metricas.py --fix    -> borra y recalcula las dos tablas
+import sys
+from database import Base, SessionLocal, engine
+import models  # registra las tablas en Base
+from routes.metricas import reconstruir_metricas, verificar_metricas
+from routes.cubo import reconstruir_cubo, verificar_cubo
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if "--fix" in sys.argv:
+            print(f"Métricas recalculadas: {reconstruir_metricas(db)} filas ✅")
+            print(f"Cubo de impresiones recalculado: {reconstruir_cubo(db)} filas ✅")
+
+        diferencias = [(f"{periodo} {clave}", guardado, esperado)
+                       for periodo, clave, guardado, esperado in verificar_metricas(db)]
+        diferencias += [(f"cubo {clave}", guardado, esperado) for clave, guardado, esperado in verificar_cubo(db)]
+        if not diferencias:
+            print("Métricas y cubo al día con impresiones, pagos y vendedoras ✅")
+            return 0
+        for donde, guardado, esperado in diferencias:
+            print(f"❌ {donde}: guardado={guardado} esperado={esperado}")
+        print(f"{len(diferencias)} diferencias encontradas")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,33 @@
+# reconcile_saldos.py
+# Concilia el libro de saldos (movimientos_saldo / saldos_vendedora) con las
+# tablas deudas y pagos.
+#   python reconcile_saldos.py          -> solo verifica, sale con código 1 si hay diferencias
+#   python reconcile_saldos.py --fix    -> agrega movimientos de ajuste y recalcula los saldos
+import sys
+from database import Base, SessionLocal, engine
+import models  # registra las tablas en Base
+from routes.saldos import verificar_saldos, corregir_saldos
+
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if "--fix" in sys.argv:
+            ajustes = corregir_saldos(db)
+            print(f"Saldos recalculados: {ajustes} movimientos de ajuste ✅")
+
+        diferencias = verificar_saldos(db)
+        if not diferencias:
+            print("Saldos conciliados con deudas y pagos ✅")
+            return 0
+        for vendedora_id, problema, guardado, esperado in diferencias:
+            print(f"❌ vendedora {vendedora_id}: {problema} (guardado={guardado} esperado={esperado})")
+        print(f"{len(diferencias)} diferencias encontradas")
+        return 1
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import Vendedora
 from schemas import VendedoraResponse
+from .metricas import cambiar_estado_vendedora
 # admin.py
 router = APIRouter(tags=["admin"])
 
@@ -33,6 +34,7 @@ def aprobar_vendedora(vendedora_id: int, db: Session = Depends(get_db)):
     if not vendedora:
         raise HTTPException(status_code=404, detail="Vendedora no encontrada")
     
+    cambiar_estado_vendedora(db, vendedora.estado, "aprobada")
     vendedora.estado = "aprobada"
     db.commit()
     db.refresh(vendedora)
@@ -48,6 +50,7 @@ def rechazar_vendedora(vendedora_id: int, db: Session = Depends(get_db)):
     if not vendedora:
         raise HTTPException(status_code=404, detail="Vendedora no encontrada")
     
+    cambiar_estado_vendedora(db, vendedora.estado, "rechazada")
     vendedora.estado = "rechazada"
     db.commit()
     db.refresh(vendedora)
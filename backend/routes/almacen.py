@@ -0,0 +1,215 @@
+# routes/almacen.py
+"""
+Almacén de archivos por contenido (catálogos, volantes y comprobantes).
+
+Cada archivo se guarda una sola vez, por su SHA-256, en subdirectorios de
+dos niveles para que ningún directorio crezca demasiado:
+
+    uploads/archivos/ab/cd/abcd...<sha256>.jpg
+
+Las columnas existentes guardan la clave ('ab/cd/<sha256>.jpg'):
+    Catalogo.archivo / Catalogo.url, Volante.archivo, Deuda.capture_url
+La tabla `archivos` lleva la cuenta de referencias. Subir un archivo que ya
+existe no ocupa disco: el temporal se descarta y solo sube la cuenta.
+
+Los valores viejos (nombre suelto en uploads/catalogos/pdf o ruta en
+uploads/comprobantes) se siguen resolviendo; migrar_almacen.py los mueve aquí.
+"""
+import hashlib
+import os
+import re
+import uuid
+from collections import Counter
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import func
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import Archivo, Catalogo, Volante, Deuda
+from .uploads import recibir_upload, detectar_tipo, TIPOS_CATALOGO, TAM_MAXIMO, TAM_BLOQUE
+
+ALMACEN_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "uploads", "archivos")
+URL_ALMACEN = "/uploads/archivos"
+TEMP_DIR = os.path.join(ALMACEN_DIR, "tmp")
+
+CLAVE_RE = re.compile(r"([0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}\.[a-z0-9]+)$")
+
+
+# ── Claves y rutas ───────────────────────────────────────────
+def clave_para(sha256: str, tipo: str) -> str:
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}.{tipo}"
+
+
+def clave_de(valor) -> str:
+    """Clave del almacén contenida en `valor` (clave, ruta o URL); None si es un valor viejo."""
+    encontrado = CLAVE_RE.search((valor or "").replace("\\", "/"))
+    return encontrado.group(1) if encontrado else None
+
+
+def _nombre_base(valor) -> str:
+    # Algunos valores viejos se guardaron con separadores de Windows
+    return os.path.basename((valor or "").replace("\\", "/"))
+
+
+def ruta_archivo(valor, directorio_viejo: str) -> str:
+    """Ruta en disco de un valor guardado: almacén o, si es viejo, su nombre en `directorio_viejo`."""
+    clave = clave_de(valor)
+    if clave:
+        return os.path.join(ALMACEN_DIR, clave)
+    return os.path.join(directorio_viejo, _nombre_base(valor))
+
+
+def url_archivo(valor, url_vieja: str) -> str:
+    """URL pública de un valor guardado (la misma idea que ruta_archivo)."""
+    clave = clave_de(valor)
+    if clave:
+        return f"{URL_ALMACEN}/{clave}"
+    return f"{url_vieja}/{_nombre_base(valor)}"
+
+
+# ── Alta y baja de referencias (sin commit) ──────────────────
+def _ubicar(temporal: str, destino: str) -> bool:
+    """Mueve el temporal a su lugar; si el contenido ya estaba, lo descarta. True si era nuevo."""
+    if os.path.exists(destino):
+        os.remove(temporal)
+        return False
+    os.makedirs(os.path.dirname(destino), exist_ok=True)
+    os.replace(temporal, destino)
+    return True
+
+
+def referenciar(db: Session, sha256: str, tipo: str, tamano: int) -> str:
+    """Suma una referencia al archivo (creando la fila si hace falta). Devuelve la clave."""
+    clave = clave_para(sha256, tipo)
+    fila = insert(Archivo).values(sha256=sha256, clave=clave, tipo=tipo, tamano=tamano, referencias=1)
+    db.execute(fila.on_conflict_do_update(
+        index_elements=[Archivo.sha256],
+        set_={"referencias": Archivo.referencias + 1}
+    ))
+    return clave
+
+
+async def guardar_archivo(db: Session, archivo: UploadFile, tipos=TIPOS_CATALOGO,
+                          tam_maximo: int = TAM_MAXIMO) -> str:
+    """
+    Guarda el upload en el almacén y le suma una referencia. Devuelve la clave.
+    No hace commit: la referencia se confirma con el registro que la usa.
+    """
+    subido = await recibir_upload(archivo, TEMP_DIR, tipos, tam_maximo)
+    # Primero la referencia (toma el candado de escritura hasta el commit) y
+    # después el disco: así borrar_del_disco no puede borrar el archivo entre
+    # que lo damos por existente y que se confirma la referencia.
+    clave = referenciar(db, subido.sha256, subido.tipo, subido.tamano)
+    nuevo = await run_in_threadpool(_ubicar, subido.ruta, os.path.join(ALMACEN_DIR, clave))
+    if not nuevo:
+        print(f"♻️ Archivo repetido, se reutiliza {clave}")
+    return clave
+
+
+def liberar(db: Session, valor) -> str:
+    """
+    Resta una referencia al archivo de `valor`. Si queda en cero borra la fila
+    y devuelve la ruta a eliminar (borrar_del_disco, después del commit).
+    Los valores viejos no se cuentan y devuelven None.
+    """
+    clave = clave_de(valor)
+    if not clave:
+        return None
+    fila = db.query(Archivo).filter(Archivo.clave == clave).first()
+    if not fila:
+        return None
+    fila.referencias -= 1
+    if fila.referencias > 0:
+        return None
+    db.delete(fila)
+    return os.path.join(ALMACEN_DIR, clave)
+
+
+def borrar_del_disco(db: Session, ruta: str):
+    """
+    Borra el archivo liberado, salvo que otra subida lo haya vuelto a referenciar.
+    Se llama después del commit y hace su propio commit.
+
+    La decisión se toma dentro de un UPDATE sobre su fila, que toma el
+    candado de escritura aunque no toque nada: una subida en curso del mismo
+    contenido ya sumó su referencia (y entonces la fila existe o hay que
+    esperar a su commit) o todavía no llegó a _ubicar (y vuelve a escribir
+    el archivo si lo borramos).
+    """
+    if not ruta or not os.path.exists(ruta):
+        return
+    try:
+        referenciado = db.query(Archivo).filter(Archivo.clave == clave_de(ruta)).update(
+            {Archivo.referencias: Archivo.referencias}, synchronize_session=False
+        )
+        if not referenciado and os.path.exists(ruta):
+            os.remove(ruta)
+        db.commit()
+    except OperationalError as e:
+        db.rollback()
+        print(f"⚠️ No se borró {ruta}, la base está ocupada: {e}")
+
+
+# ── Migración y recuento ─────────────────────────────────────
+def importar_archivo(ruta: str) -> str:
+    """
+    Copia un archivo existente al almacén (sin tocar el original) y devuelve
+    su clave, o None si su tipo no se reconoce. No suma referencias.
+    """
+    with open(ruta, "rb") as origen:
+        tipo = detectar_tipo(origen.read(16))
+    if tipo is None:
+        return None
+
+    os.makedirs(TEMP_DIR, exist_ok=True)
+    temporal = os.path.join(TEMP_DIR, f".{uuid.uuid4().hex}.part")
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as origen, open(temporal, "wb") as destino:
+        for bloque in iter(lambda: origen.read(TAM_BLOQUE), b""):
+            sha.update(bloque)
+            destino.write(bloque)
+
+    clave = clave_para(sha.hexdigest(), tipo)
+    _ubicar(temporal, os.path.join(ALMACEN_DIR, clave))
+    return clave
+
+
+def valores_referenciados(db: Session):
+    """Todos los valores de archivo guardados en catálogos, volantes y deudas."""
+    for (valor,) in db.query(func.coalesce(Catalogo.archivo, Catalogo.url)):
+        yield valor
+    for (valor,) in db.query(Volante.archivo):
+        yield valor
+    for (valor,) in db.query(Deuda.capture_url).filter(Deuda.capture_url.isnot(None)):
+        yield valor
+
+
+def recalcular_referencias(db: Session) -> list:
+    """
+    Vuelve a contar las referencias desde las tablas y crea las filas que
+    falten. Borra las filas sin uso y devuelve sus rutas (borrar después del
+    commit). No hace commit.
+    """
+    db.flush()
+    conteo = Counter(clave for clave in map(clave_de, valores_referenciados(db)) if clave)
+    existentes = {fila.clave: fila for fila in db.query(Archivo)}
+
+    for clave, referencias in conteo.items():
+        fila = existentes.pop(clave, None)
+        if fila:
+            fila.referencias = referencias
+            continue
+        ruta = os.path.join(ALMACEN_DIR, clave)
+        if not os.path.exists(ruta):
+            print(f"⚠️ Falta en el almacén: {ruta}")
+            continue
+        sha256, tipo = clave.rsplit("/", 1)[1].split(".")
+        db.add(Archivo(sha256=sha256, clave=clave, tipo=tipo, tamano=os.path.getsize(ruta),
+                       referencias=referencias))
+
+    for fila in existentes.values():
+        db.delete(fila)
+    return [os.path.join(ALMACEN_DIR, fila.clave) for fila in existentes.values()]
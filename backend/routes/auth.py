@@ -4,6 +4,7 @@ from pydantic import BaseModel, EmailStr
 from database import get_db
 from models import Vendedora
 from schemas import VendedoraCreate, VendedoraResponse
+from .metricas import cambiar_estado_vendedora
 
 router = APIRouter()
 
@@ -45,6 +46,7 @@ def register(data: VendedoraCreate, db: Session = Depends(get_db)):
         role="vendedora"
     )
     db.add(nueva_vendedora)
+    cambiar_estado_vendedora(db, None, nueva_vendedora.estado)
     db.commit()
     db.refresh(nueva_vendedora)
 
@@ -0,0 +1,116 @@
+# routes/cache_http.py
+"""
+Caché HTTP: archivos estáticos con Cache-Control largo y ETag en los
+endpoints JSON que casi no cambian.
+
+Versiones por tabla
+    Triggers de SQLite (instalar_versiones, al arrancar main.py) suben el
+    contador de `versiones_tabla` en cada INSERT / UPDATE / DELETE de las
+    tablas de TABLAS_VERSIONADAS. Al estar en la base los ven todos los
+    workers, y también cuentan los UPDATE masivos y los scripts sueltos
+    (migrar_almacen.py, reconcile_saldos.py --fix, compact_config.py, ...).
+
+ETag en endpoints
+    @router.get("/general", dependencies=[con_etag("catalogos", "categorias")])
+    El ETag se arma con las versiones de esas tablas (una consulta por clave
+    primaria). Si coincide con If-None-Match se responde 304 antes de
+    ejecutar el endpoint. `extra` agrega al ETag lo que no está en la base,
+    por ejemplo la fecha de hoy cuando el rango depende de ella.
+"""
+from fastapi import Depends, Request, Response
+from fastapi.staticfiles import StaticFiles
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import VersionTabla
+
+INMUTABLE = "public, max-age=31536000, immutable"
+REVALIDAR = "no-cache"  # el navegador guarda la respuesta pero pregunta con If-None-Match
+
+TABLAS_VERSIONADAS = ("catalogos", "categorias", "vendedoras", "impresiones_cubo")
+
+
+# ── Versiones por tabla (triggers) ───────────────────────────
+def _trigger_version(tabla: str, evento: str) -> str:
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS version_{tabla}_{evento.lower()}
+        AFTER {evento} ON {tabla}
+        BEGIN
+            UPDATE versiones_tabla SET version = version + 1 WHERE tabla = '{tabla}';
+        END
+    """
+
+
+def instalar_versiones(engine):
+    """Crea las filas y los triggers que faltan (idempotente)."""
+    with engine.begin() as conn:
+        for tabla in TABLAS_VERSIONADAS:
+            conn.execute(text("INSERT OR IGNORE INTO versiones_tabla (tabla, version) VALUES (:tabla, 0)"),
+                         {"tabla": tabla})
+            for evento in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(text(_trigger_version(tabla, evento)))
+
+
+def etag_tablas(db: Session, *tablas, extra: str = None) -> str:
+    versiones = dict(db.query(VersionTabla.tabla, VersionTabla.version).filter(VersionTabla.tabla.in_(tablas)))
+    partes = [str(versiones.get(t, 0)) for t in tablas]
+    if extra:
+        partes.append(extra)
+    return f'"{"-".join(partes)}"'
+
+
+# ── ETag / If-None-Match en endpoints JSON ───────────────────
+class NoModificado(Exception):
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+def respuesta_no_modificado(request: Request, exc: NoModificado):
+    """Manejador de NoModificado (registrado en main.py)."""
+    return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": REVALIDAR})
+
+
+def coincide_etag(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    etiquetas = [e.strip() for e in if_none_match.split(",")]
+    return "*" in etiquetas or etag in etiquetas
+
+
+def verificar_etag(request: Request, response: Response, etag: str):
+    """304 (NoModificado) si If-None-Match coincide; si no, deja el ETag en la respuesta."""
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        raise NoModificado(etag)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = REVALIDAR
+
+
+def con_etag(*tablas, extra=None):
+    """
+    Dependencia para `dependencies=[...]`: 304 si nada de `tablas` cambió,
+    si no agrega el ETag. `extra(request)` devuelve un texto que también
+    forma parte del ETag.
+    """
+    def verificar(request: Request, response: Response, db: Session = Depends(get_db)):
+        etag = etag_tablas(db, *tablas, extra=extra(request) if extra else None)
+        verificar_etag(request, response, etag)
+    return Depends(verificar)
+
+
+# ── Archivos estáticos ───────────────────────────────────────
+class ArchivosEstaticos(StaticFiles):
+    """
+    StaticFiles con Cache-Control. Con inmutable=True (nombres por contenido o
+    con uuid, nunca se sobrescriben) el navegador no vuelve a pedir el
+    archivo; si no, lo revalida con el ETag/Last-Modified de StaticFiles.
+    """
+
+    def __init__(self, *args, inmutable: bool = False, max_age: int = 0, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cache_control = INMUTABLE if inmutable else (f"public, max-age={max_age}" if max_age else REVALIDAR)
+
+    def file_response(self, *args, **kwargs):
+        respuesta = super().file_response(*args, **kwargs)
+        respuesta.headers["Cache-Control"] = self.cache_control
+        return respuesta
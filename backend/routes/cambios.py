@@ -0,0 +1,86 @@
+# routes/cambios.py
+"""
+Listas incrementales: ?since= en pagos, deudas, impresiones y notificaciones.
+
+Secuencia de cambios
+    Triggers de SQLite (instalar_triggers, al arrancar main.py) anotan cada
+    INSERT / UPDATE / DELETE de esas tablas en `cambios` con un `seq` nuevo.
+    Hay una fila por fila de origen (INSERT OR REPLACE), así la tabla no
+    crece con cada edición; las borradas quedan como 'delete'. Al ser
+    triggers también cuentan los UPDATE masivos y los scripts sueltos.
+
+Uso en un endpoint de lista
+    Sin `since`: la lista completa de siempre, con el cursor en la cabecera
+    X-Since (o en el campo "since" si la respuesta es un objeto). Con `since`: {"since": nuevo cursor, "cambios": [filas
+    insertadas o modificadas que siguen en la lista], "borrados": [ids que
+    ya no están]}. Si nada cambió, cambios y borrados vienen vacíos.
+"""
+from fastapi import HTTPException
+from sqlalchemy import func, text
+from sqlalchemy.orm import Session
+
+from models import Cambio
+
+# tabla -> columna con la vendedora
+TABLAS_SEGUIDAS = {
+    "pagos": "vendedora_id",
+    "deudas": "vendedora_id",
+    "impresiones": "usuario_id",
+    "notificaciones": "vendedora_id",
+}
+
+DESCRIPCION_SINCE = "Cursor X-Since de la respuesta anterior: solo lo que cambió desde entonces"
+
+
+# ── Triggers ─────────────────────────────────────────────────
+def _trigger(tabla: str, columna: str, evento: str) -> str:
+    fila, operacion = ("OLD", "delete") if evento == "DELETE" else ("NEW", "upsert")
+    return f"""
+        CREATE TRIGGER IF NOT EXISTS cambios_{tabla}_{evento.lower()}
+        AFTER {evento} ON {tabla}
+        BEGIN
+            INSERT OR REPLACE INTO cambios (tabla, fila_id, vendedora_id, operacion, fecha)
+            VALUES ('{tabla}', {fila}.id, {fila}.{columna}, '{operacion}', CURRENT_TIMESTAMP);
+        END
+    """
+
+
+def instalar_triggers(engine):
+    """Crea los triggers que faltan (idempotente)."""
+    with engine.begin() as conn:
+        for tabla, columna in TABLAS_SEGUIDAS.items():
+            for evento in ("INSERT", "UPDATE", "DELETE"):
+                conn.execute(text(_trigger(tabla, columna, evento)))
+
+
+# ── Lectura ──────────────────────────────────────────────────
+def cursor_actual(db: Session, since: int = None) -> int:
+    """
+    Último seq. Se lee antes que las filas, en la misma transacción: lo que
+    se confirme después queda para la próxima consulta. Un `since` mayor
+    (base restaurada o reiniciada) responde 410 para que el cliente pida la
+    lista completa.
+    """
+    actual = db.query(func.max(Cambio.seq)).scalar() or 0
+    if since is not None and since > actual:
+        raise HTTPException(status_code=410, detail="Cursor desconocido: vuelve a pedir la lista completa")
+    return actual
+
+
+def cambiados(db: Session, tabla: str, since: int, hasta: int, vendedora_id: int = None,
+              columna=Cambio.fila_id):
+    """Subconsulta con los ids (o `columna`) de `tabla` que cambiaron en (since, hasta]."""
+    query = db.query(columna).filter(Cambio.tabla == tabla, Cambio.seq > since, Cambio.seq <= hasta)
+    if vendedora_id is not None:
+        query = query.filter(Cambio.vendedora_id == vendedora_id)
+    return query.distinct()
+
+
+def delta(cambios: list, subconsulta, hasta: int, clave: str = "id") -> dict:
+    """Respuesta con `since`: lo que cambió y sigue en la lista, y lo que ya no está."""
+    presentes = {fila[clave] if isinstance(fila, dict) else getattr(fila, clave) for fila in cambios}
+    return {
+        "since": hasta,
+        "cambios": cambios,
+        "borrados": sorted(i for (i,) in subconsulta.all() if i is not None and i not in presentes),
+    }
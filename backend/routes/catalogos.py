@@ -1,14 +1,15 @@
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from typing import Optional
 import os
-import shutil
-import uuid
 
 from database import get_db
 from models import Catalogo, Categoria
 from schemas import CatalogoSchema
+from .print_renditions import generar_renditions
+from .cache_http import con_etag
+from .almacen import guardar_archivo, liberar, borrar_del_disco, ruta_archivo, url_archivo, URL_ALMACEN
 
 router = APIRouter()
 
@@ -18,7 +19,7 @@ os.makedirs(UPLOAD_DIR, exist_ok=True)
 # -------------------
 # GET: catálogo general (solo PDFs sin vendedora)
 # -------------------
-@router.get("/general", response_model=list[CatalogoSchema])
+@router.get("/general", response_model=list[CatalogoSchema], dependencies=[con_etag("catalogos", "categorias")])
 def get_catalogo_general(db: Session = Depends(get_db)):
     catalogos = db.query(Catalogo).filter(Catalogo.vendedora_id == None).all()
     result = [
@@ -27,7 +28,7 @@ def get_catalogo_general(db: Session = Depends(get_db)):
             nombre=c.nombre,
             categoria=c.categoria.nombre if c.categoria else None,
             vendedora_id=c.vendedora_id,
-            url=f"/catalogos/files/{os.path.basename(c.url)}",
+            url=url_archivo(c.archivo or c.url, "/catalogos/files"),
         )
         for c in catalogos
     ]
@@ -36,7 +37,8 @@ def get_catalogo_general(db: Session = Depends(get_db)):
 # -------------------
 # GET: catálogo por vendedora (sus PDFs + generales)
 # -------------------
-@router.get("/vendedora/{vendedora_id}", response_model=list[CatalogoSchema])
+@router.get("/vendedora/{vendedora_id}", response_model=list[CatalogoSchema],
+            dependencies=[con_etag("catalogos", "categorias")])
 def get_catalogo_vendedora(vendedora_id: int, db: Session = Depends(get_db)):
     catalogos = db.query(Catalogo).filter(
         or_(Catalogo.vendedora_id == vendedora_id, Catalogo.vendedora_id == None)
@@ -47,7 +49,7 @@ def get_catalogo_vendedora(vendedora_id: int, db: Session = Depends(get_db)):
             nombre=c.nombre,
             categoria=c.categoria.nombre if c.categoria else None,
             vendedora_id=c.vendedora_id,
-            url=f"/catalogos/files/{os.path.basename(c.url)}",
+            url=url_archivo(c.archivo or c.url, "/catalogos/files"),
         )
         for c in catalogos
     ]
@@ -58,31 +60,31 @@ def get_catalogo_vendedora(vendedora_id: int, db: Session = Depends(get_db)):
 # -------------------
 @router.post("/upload", response_model=CatalogoSchema)
 async def upload_catalogo(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     nombre: str = Form(...),
     categoria_id: int = Form(...),
     vendedora_id: Optional[int] = Form(None),
     db: Session = Depends(get_db),
 ):
-    # Nombre único para evitar sobrescribir
-    nombre_unico = f"{uuid.uuid4().hex}_{file.filename}"
-    file_path = os.path.join(UPLOAD_DIR, nombre_unico)
+    # Guardar archivo en el almacén (un archivo por contenido)
+    clave = await guardar_archivo(db, file)
 
-    # Guardar archivo
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
-
-    # Guardar solo el nombre del archivo en DB
+    # Guardar la clave del archivo en DB
     nuevo = Catalogo(
         nombre=nombre,
         categoria_id=categoria_id,
         vendedora_id=vendedora_id,
-        url=nombre_unico,
+        url=f"{URL_ALMACEN}/{clave}",
+        archivo=clave,
     )
     db.add(nuevo)
     db.commit()
     db.refresh(nuevo)
 
+    # Versiones listas para imprimir, después de responder
+    background_tasks.add_task(generar_renditions, ruta_archivo(clave, UPLOAD_DIR))
+
     categoria = db.query(Categoria).filter(Categoria.id == categoria_id).first()
 
     return CatalogoSchema(
@@ -90,7 +92,7 @@ async def upload_catalogo(
         nombre=nuevo.nombre,
         categoria=categoria.nombre if categoria else None,
         vendedora_id=nuevo.vendedora_id,
-        url=f"/catalogos/files/{nombre_unico}",
+        url=f"{URL_ALMACEN}/{clave}",
     )
 
 # -------------------
@@ -102,10 +104,13 @@ def eliminar_pdf(pdf_id: int, db: Session = Depends(get_db)):
     if not catalogo:
         raise HTTPException(status_code=404, detail="PDF no encontrado")
 
-    file_path = os.path.join(UPLOAD_DIR, os.path.basename(catalogo.url))
-    if os.path.exists(file_path):
+    # Archivos del almacén: se borran cuando nadie más los usa
+    huerfano = liberar(db, catalogo.archivo or catalogo.url)
+    file_path = ruta_archivo(catalogo.archivo or catalogo.url, UPLOAD_DIR)
+    if not huerfano and file_path.startswith(UPLOAD_DIR) and os.path.exists(file_path):
         os.remove(file_path)
 
     db.delete(catalogo)
     db.commit()
+    borrar_del_disco(db, huerfano)
     return {"msg": "PDF eliminado correctamente"}
@@ -3,6 +3,7 @@ from sqlalchemy.orm import Session
 from database import get_db
 from models import Categoria
 from pydantic import BaseModel
+from .cache_http import con_etag
 
 router = APIRouter()
 
@@ -17,7 +18,7 @@ class CategoriaResponse(BaseModel):
         orm_mode = True
 
 # Listar categorías
-@router.get("/", response_model=list[CategoriaResponse])
+@router.get("/", response_model=list[CategoriaResponse], dependencies=[con_etag("categorias")])
 def listar_categorias(db: Session = Depends(get_db)):
     return db.query(Categoria).all()
 
@@ -0,0 +1,210 @@
+# routes/conciliacion.py
+"""
+Conciliación con el extracto del banco.
+
+POST /conciliacion/banco recibe el CSV del banco y lo lee fila por fila
+(sin cargarlo entero). Cada referencia se busca en un índice hash
+armado con una consulta por tabla:
+    - deudas en 'pendiente_verificacion' (la vendedora cargó el comprobante)
+    - pagos en 'pendiente'
+Las coincidencias se aplican juntas en una transacción: un UPDATE por tabla,
+los abonos al saldo y las notificaciones en un solo INSERT.
+
+Una referencia corta (menos de MIN_DIGITOS_REFERENCIA dígitos, como "PM 0007"
+que queda en "7") coincide con demasiadas cosas: solo se aplica si el monto
+del banco es igual al esperado; si no, la fila va a "observadas".
+"""
+import csv
+import io
+import re
+from collections import defaultdict
+
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import Deuda, Pago
+from .notificaciones import notificar_en_lote
+from .metricas import sumar_metrica
+from .saldos import aplicar_pago, TOLERANCIA
+from .eventos import publicar
+
+router = APIRouter()
+
+# Nombres de columna aceptados (en minúsculas, sin tildes)
+COLUMNAS_REFERENCIA = ("referencia", "ref", "reference", "nro_referencia", "numero_referencia")
+COLUMNAS_MONTO = ("monto", "importe", "amount", "credito", "abono")
+MIN_DIGITOS_REFERENCIA = 6
+
+
+def normalizar_referencia(valor) -> str:
+    """
+    Clave de búsqueda: los dígitos sin ceros a la izquierda ("PM 000777" -> "777").
+    Si la referencia no tiene dígitos se usan sus letras en mayúsculas.
+    """
+    texto = str(valor or "")
+    digitos = re.sub(r"\D", "", texto)
+    if digitos:
+        return digitos.lstrip("0") or "0"
+    return re.sub(r"[^0-9A-Za-z]", "", texto).upper()
+
+
+def _monto(valor):
+    """Acepta 1.234,56 / 1,234.56 / 1234.56; None si la celda está vacía o no es un número."""
+    texto = re.sub(r"[^0-9,.\-]", "", str(valor or ""))
+    if not texto:
+        return None
+    if "," in texto and "." in texto:
+        decimal = "," if texto.rfind(",") > texto.rfind(".") else "."
+        texto = texto.replace("." if decimal == "," else ",", "").replace(",", ".")
+    elif "," in texto:
+        texto = texto.replace(",", ".")
+    try:
+        return float(texto)
+    except ValueError:
+        return None
+
+
+def _monto_aceptado(monto_banco, esperado: float, exacto: bool) -> bool:
+    if exacto:
+        return monto_banco is not None and abs(monto_banco - esperado) <= TOLERANCIA
+    return monto_banco is None or monto_banco + TOLERANCIA >= esperado
+
+
+def _columna(campos, opciones):
+    normalizados = {(c or "").strip().lower().replace(" ", "_"): c for c in campos}
+    for opcion in opciones:
+        if opcion in normalizados:
+            return normalizados[opcion]
+    return None
+
+
+# ── Índice hash de lo pendiente ──────────────────────────────
+def indice_pendientes(db: Session) -> dict:
+    """referencia normalizada -> [(tipo, id, vendedora_id, monto)], una consulta por tabla."""
+    indice = defaultdict(list)
+    deudas = db.query(Deuda.id, Deuda.vendedora_id, Deuda.monto, Deuda.referencia).filter(
+        Deuda.estado == "pendiente_verificacion", Deuda.referencia.isnot(None)
+    ).order_by(Deuda.id)
+    for d in deudas:
+        indice[normalizar_referencia(d.referencia)].append(("deuda", d.id, d.vendedora_id, d.monto))
+
+    pagos = db.query(Pago.id, Pago.vendedora_id, Pago.monto, Pago.referencia).filter(
+        Pago.estado == "pendiente", Pago.referencia.isnot(None)
+    ).order_by(Pago.id)
+    for p in pagos:
+        indice[normalizar_referencia(p.referencia)].append(("pago", p.id, p.vendedora_id, p.monto))
+
+    indice.pop("", None)
+    return indice
+
+
+# ── Endpoint ─────────────────────────────────────────────────
+@router.post("/banco")
+def conciliar_extracto(
+    archivo: UploadFile = File(..., description="CSV del banco con columnas referencia y monto"),
+    simular: bool = Query(False, description="Solo informa las coincidencias, sin aplicar nada"),
+    db: Session = Depends(get_db)
+):
+    muestra = archivo.file.read(4096)
+    archivo.file.seek(0)
+    try:
+        dialecto = csv.Sniffer().sniff(muestra.decode("utf-8-sig", errors="ignore"), delimiters=",;\t|")
+    except csv.Error:
+        dialecto = csv.excel
+
+    lector = csv.DictReader(io.TextIOWrapper(archivo.file, encoding="utf-8-sig", errors="replace", newline=""),
+                            dialect=dialecto)
+    col_ref = _columna(lector.fieldnames or [], COLUMNAS_REFERENCIA)
+    col_monto = _columna(lector.fieldnames or [], COLUMNAS_MONTO)
+    if not col_ref:
+        raise HTTPException(status_code=400, detail=f"El CSV no tiene columna de referencia ({', '.join(COLUMNAS_REFERENCIA)})")
+
+    indice = indice_pendientes(db)
+
+    conciliadas, sin_coincidencia, observadas = [], [], []
+    filas = 0
+    for numero, fila in enumerate(lector, start=2):  # la fila 1 es el encabezado
+        filas += 1
+        referencia = normalizar_referencia(fila.get(col_ref))
+        if not referencia:
+            continue
+        monto_banco = _monto(fila.get(col_monto)) if col_monto else None
+
+        candidatos = indice.get(referencia)
+        if not candidatos:
+            sin_coincidencia.append({"fila": numero, "referencia": fila.get(col_ref), "monto": monto_banco})
+            continue
+
+        confiable = referencia.isdigit() and len(referencia) >= MIN_DIGITOS_REFERENCIA
+        if not confiable and monto_banco is None:
+            observadas.append({"fila": numero, "referencia": fila.get(col_ref), "monto": monto_banco,
+                               "motivo": "referencia corta sin monto para confirmar",
+                               "esperado": [c[3] for c in candidatos]})
+            continue
+
+        # Referencia larga: primer candidato cuyo monto esté cubierto por el
+        # movimiento del banco. Referencia corta: el monto tiene que ser igual.
+        elegido = next((c for c in candidatos if _monto_aceptado(monto_banco, c[3], exacto=not confiable)), None)
+        if elegido is None and not confiable:
+            observadas.append({"fila": numero, "referencia": fila.get(col_ref), "monto": monto_banco,
+                               "motivo": "referencia corta con monto distinto al esperado",
+                               "esperado": [c[3] for c in candidatos]})
+            continue
+        if elegido is None:
+            observadas.append({"fila": numero, "referencia": fila.get(col_ref), "monto": monto_banco,
+                               "motivo": "monto menor al esperado",
+                               "esperado": [c[3] for c in candidatos]})
+            continue
+        candidatos.remove(elegido)  # cada deuda/pago se concilia una sola vez
+
+        tipo, item_id, vendedora_id, monto = elegido
+        conciliadas.append({"fila": numero, "referencia": fila.get(col_ref), "tipo": tipo, "id": item_id,
+                            "vendedora_id": vendedora_id, "monto": monto, "monto_banco": monto_banco})
+
+    if not simular and conciliadas:
+        try:
+            _aplicar(db, conciliadas)
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Error al aplicar la conciliación: {e}")
+
+    return {
+        "filas": filas,
+        "aplicado": not simular,
+        "conciliadas": conciliadas,
+        "sin_coincidencia": sin_coincidencia,
+        "observadas": observadas,
+    }
+
+
+def _aplicar(db: Session, conciliadas: list):
+    """Aplica todas las coincidencias en una sola transacción."""
+    ids_deudas = [c["id"] for c in conciliadas if c["tipo"] == "deuda"]
+    ids_pagos = [c["id"] for c in conciliadas if c["tipo"] == "pago"]
+
+    if ids_deudas:
+        db.query(Deuda).filter(Deuda.id.in_(ids_deudas), Deuda.estado == "pendiente_verificacion") \
+            .update({Deuda.estado: "pagado"}, synchronize_session=False)
+    if ids_pagos:
+        pendientes = db.query(Pago).filter(Pago.id.in_(ids_pagos), Pago.estado == "pendiente")
+        for monto, fecha in pendientes.with_entities(Pago.monto, Pago.fecha):
+            sumar_metrica(db, "ingresos", monto, fecha)
+        pendientes.update({Pago.estado: "completado"}, synchronize_session=False)
+        # Cada pago se descuenta de las deudas pendientes de su vendedora
+        for c in conciliadas:
+            if c["tipo"] == "pago":
+                aplicar_pago(db, c["vendedora_id"], c["monto"], pago_id=c["id"])
+
+    for c in conciliadas:
+        if c["tipo"] == "deuda":
+            publicar(db, "deuda_cambiada", c["vendedora_id"], deuda_id=c["id"], estado="pagado")
+        publicar(db, "pago_aprobado", c["vendedora_id"], **{f"{c['tipo']}_id": c["id"]}, monto=c["monto"])
+
+    notificar_en_lote(db, [
+        (c["vendedora_id"],
+         f"Tu pago de ${c['monto']:.2f} (deuda #{c['id']}) ha sido aprobado ✅" if c["tipo"] == "deuda"
+         else f"Tu pago de ${c['monto']} ha sido aprobado.")
+        for c in conciliadas
+    ])
+    db.commit()
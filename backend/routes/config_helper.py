@@ -1,26 +1,218 @@
 # routes/config_helper.py
-from fastapi import APIRouter, Depends
+import threading
+import time
+from dataclasses import dataclass, field, replace
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import Integer, cast
 from sqlalchemy.orm import Session
 from database import get_db
-from models import Configuracion
+from models import Configuracion, LimiteVendedora
+from schemas import LimiteVendedoraBase, LimiteVendedoraResponse, LimitesEfectivosResponse
+from .cache_http import verificar_etag
 
 router = APIRouter(prefix="/config_helper", tags=["ConfigHelper"])
 
-# Endpoint GET de límites
-@router.get("/limits")
-def get_limits(db: Session = Depends(get_db)):
-    """Devuelve los límites guardados en la BD"""
-    # Mapeo: clave frontend -> clave en base de datos
-    clave_map = {
-        "diario": "diario",
-        "semanal": "semanal",
-        "mensual": "mensual",
-        "costoExcedente": "costo_excedente",
-        "applyToAll": "applyToAll",
-    }
-
-    configs = {}
-    for front_clave, db_clave in clave_map.items():
+# Mapeo: clave frontend -> clave en base de datos
+CLAVE_MAP = {
+    "diario": "diario",
+    "semanal": "semanal",
+    "mensual": "mensual",
+    "costoExcedente": "costo_excedente",
+    "applyToAll": "applyToAll",
+}
+# Claves viejas que routes/configuraciones.py guardaba con el nombre del frontend
+ALIAS = {"costoExcedente": "costo_excedente"}
+
+# Fila con la versión de la configuración: se incrementa en cada cambio
+CLAVE_VERSION = "_version"
+# Cada cuántos segundos se vuelve a mirar la versión (cambios de otros procesos)
+VERSION_TTL = 2.0
+
+
+# ── Límites tipados + caché por versión ──────────────────────
+@dataclass(frozen=True)
+class Limites:
+    diario: float = 0
+    semanal: float = 0
+    mensual: float = 0
+    costo_excedente: float = 0
+    apply_to_all: bool = False
+    version: int = 0
+    origen: str = "global"
+
+    def como_dict(self) -> dict:
+        """Formato que espera el frontend (ConfiguracionTab)."""
+        return {
+            "diario": self.diario,
+            "semanal": self.semanal,
+            "mensual": self.mensual,
+            "costoExcedente": self.costo_excedente,
+            "applyToAll": self.apply_to_all,
+        }
+
+
+# ── Política compilada (globales + excepciones) ──────────────
+CAMPOS_LIMITE = ("diario", "semanal", "mensual", "costo_excedente")
+
+
+@dataclass(frozen=True)
+class PoliticaLimites:
+    """
+    Límites globales más las excepciones de limites_vendedora, ya combinadas.
+    `tabla` va de (vendedora_id, categoria_id) a Limites con la herencia
+    resuelta al compilar, así resolver() son a lo sumo tres búsquedas en un dict.
+
+    Con applyToAll activo se aplican los globales a todas y las excepciones
+    quedan guardadas pero sin efecto (los endpoints de /overrides lo indican
+    con vigente=False) hasta que se desactive.
+    """
+    base: Limites
+    tabla: dict = field(default_factory=dict)
+
+    def resolver(self, vendedora_id: int, categoria_id: int = None) -> Limites:
+        if self.base.apply_to_all or not self.tabla:
+            return self.base
+        tabla = self.tabla
+        return (
+            tabla.get((vendedora_id, categoria_id))
+            or tabla.get((vendedora_id, None))
+            or tabla.get((None, categoria_id))
+            or self.base
+        )
+
+
+def _aplicar(limites: Limites, fila: LimiteVendedora, origen: str) -> Limites:
+    cambios = {c: getattr(fila, c) for c in CAMPOS_LIMITE if getattr(fila, c) is not None}
+    return replace(limites, origen=origen, **cambios)
+
+
+def _compilar_politica(base: Limites, filas) -> PoliticaLimites:
+    """
+    Precedencia: vendedora+categoría > vendedora > categoría > global.
+    Se precompila (vendedora, categoría) para cada vendedora con excepción y
+    cada categoría con excepción, aunque no haya fila que las combine: si no,
+    resolver() encontraría (vendedora, None) y dejaría de lado la categoría.
+    """
+    por_vendedora = {f.vendedora_id: f for f in filas if f.vendedora_id is not None and f.categoria_id is None}
+    por_categoria = {f.categoria_id: f for f in filas if f.vendedora_id is None and f.categoria_id is not None}
+    combinadas = {(f.vendedora_id, f.categoria_id): f for f in filas
+                  if f.vendedora_id is not None and f.categoria_id is not None}
+
+    tabla = {}
+    for categoria_id, fila in por_categoria.items():
+        tabla[(None, categoria_id)] = _aplicar(base, fila, "categoria")
+    for vendedora_id, fila in por_vendedora.items():
+        tabla[(vendedora_id, None)] = _aplicar(base, fila, "vendedora")
+
+    claves = set(combinadas) | {(v, c) for v in por_vendedora for c in por_categoria}
+    for vendedora_id, categoria_id in claves:
+        limites = base
+        if categoria_id in por_categoria:
+            limites = _aplicar(limites, por_categoria[categoria_id], "categoria")
+        if vendedora_id in por_vendedora:
+            limites = _aplicar(limites, por_vendedora[vendedora_id], "vendedora")
+        if (vendedora_id, categoria_id) in combinadas:
+            limites = _aplicar(limites, combinadas[(vendedora_id, categoria_id)], "vendedora_categoria")
+        tabla[(vendedora_id, categoria_id)] = limites
+    return PoliticaLimites(base=base, tabla=tabla)
+
+
+_cache = None          # PoliticaLimites vigente
+_cache_revisado = 0.0  # time.monotonic() de la última lectura de la versión
+_cache_lock = threading.Lock()
+
+
+def _leer_version(db: Session) -> int:
+    valor = db.query(Configuracion.valor).filter(Configuracion.clave == CLAVE_VERSION).scalar()
+    return int(valor) if valor else 0
+
+
+def _leer_limites(db: Session, version: int) -> Limites:
+    """Lee todas las claves en una sola consulta; si hay historial gana la fila más nueva."""
+    claves_db = set(CLAVE_MAP.values()) | set(ALIAS)
+    filas = (
+        db.query(Configuracion.clave, Configuracion.valor)
+        .filter(Configuracion.clave.in_(claves_db))
+        .order_by(Configuracion.id)
+        .all()
+    )
+    valores = {ALIAS.get(clave, clave): valor for clave, valor in filas}
+
+    def numero(clave):
+        return float(valores[clave]) if clave in valores else 0
+
+    return Limites(
+        diario=numero("diario"),
+        semanal=numero("semanal"),
+        mensual=numero("mensual"),
+        costo_excedente=numero("costo_excedente"),
+        apply_to_all=bool(int(float(valores["applyToAll"]))) if "applyToAll" in valores else False,
+        version=version,
+    )
+
+
+def cargar_politica(db: Session, al_dia: bool = False) -> PoliticaLimites:
+    """
+    Política vigente desde la caché del proceso. La versión se revisa como
+    mucho cada VERSION_TTL segundos (una consulta por clave única); solo si
+    cambió se vuelven a leer los valores y a compilar las excepciones.
+    Con al_dia=True se revisa siempre (endpoints con ETag de la versión).
+    """
+    global _cache, _cache_revisado
+    ahora = time.monotonic()
+    with _cache_lock:
+        if _cache is not None and not al_dia and ahora - _cache_revisado < VERSION_TTL:
+            return _cache
+        actual = _cache
+
+    version = _leer_version(db)
+    if actual is None or actual.base.version != version:
+        actual = _compilar_politica(_leer_limites(db, version), db.query(LimiteVendedora).all())
+
+    with _cache_lock:
+        _cache, _cache_revisado = actual, ahora
+    return actual
+
+
+def cargar_limites(db: Session) -> Limites:
+    """Límites globales vigentes."""
+    return cargar_politica(db).base
+
+
+def limites_para(db: Session, vendedora_id: int, categoria_id: int = None) -> Limites:
+    """Límites efectivos de una vendedora (y categoría del catálogo), sin consultas extra."""
+    return cargar_politica(db).resolver(vendedora_id, categoria_id)
+
+
+def invalidar_limites():
+    global _cache
+    with _cache_lock:
+        _cache = None
+
+
+def _valor_texto(valor) -> str:
+    if isinstance(valor, bool):
+        return "1" if valor else "0"
+    return str(valor)
+
+
+def _subir_version(db: Session):
+    """Versión monotónica (UPDATE atómico): los demás procesos la ven y recargan."""
+    filas = db.query(Configuracion).filter(Configuracion.clave == CLAVE_VERSION).update(
+        {Configuracion.valor: cast(Configuracion.valor, Integer) + 1}, synchronize_session=False
+    )
+    if not filas:
+        db.add(Configuracion(clave=CLAVE_VERSION, valor="1", tipo="int"))
+
+
+def guardar_limites(db: Session, new_limits: dict) -> Limites:
+    """Actualiza las claves recibidas, sube la versión y refresca la caché."""
+    for front_clave, valor in new_limits.items():
+        if valor is None:
+            continue
+        db_clave = CLAVE_MAP.get(front_clave, front_clave)
         config = (
             db.query(Configuracion)
             .filter(Configuracion.clave == db_clave)
@@ -28,32 +220,138 @@ def get_limits(db: Session = Depends(get_db)):
             .first()
         )
         if config:
-            if front_clave == "applyToAll":
-                configs[front_clave] = bool(int(config.valor))
-            else:
-                configs[front_clave] = float(config.valor)
+            config.valor = _valor_texto(valor)
         else:
-            configs[front_clave] = 0 if front_clave != "applyToAll" else False
-    return configs
+            db.add(Configuracion(clave=db_clave, valor=_valor_texto(valor), tipo="limit"))
+
+    _subir_version(db)
+    db.commit()
+
+    invalidar_limites()
+    return cargar_limites(db)
+
+
+def compactar_configuraciones(db: Session) -> int:
+    """
+    Deja una sola fila por clave (la más nueva) y pasa las claves viejas a
+    su nombre actual. Devuelve cuántas filas se borraron.
+    """
+    filas = db.query(Configuracion).order_by(Configuracion.id).all()
+    ultimas = {}
+    for config in filas:
+        ultimas[ALIAS.get(config.clave, config.clave)] = config
+
+    conservar = {config.id for config in ultimas.values()}
+    borradas = 0
+    for config in filas:
+        if config.id not in conservar:
+            db.delete(config)
+            borradas += 1
+    db.flush()
+    renombradas = 0
+    for clave, config in ultimas.items():
+        if config.clave != clave:
+            config.clave = clave
+            renombradas += 1
+
+    if borradas or renombradas:
+        _subir_version(db)
+    db.commit()
+    invalidar_limites()
+    return borradas
+
+
+def _etag_config(request: Request, response: Response, db: Session = Depends(get_db)):
+    """
+    ETag de /limits y /overrides: la fila _version, que suben todos los
+    cambios de límites y excepciones (de cualquier proceso o script).
+    """
+    verificar_etag(request, response, f'"config-{_leer_version(db)}"')
+
+
+# Endpoint GET de límites
+@router.get("/limits", dependencies=[Depends(_etag_config)])
+def get_limits(db: Session = Depends(get_db)):
+    """Devuelve los límites guardados en la BD"""
+    return cargar_politica(db, al_dia=True).base.como_dict()
 
 
 # Endpoint PUT para actualizar límites
 @router.put("/limits")
 def update_limits(new_limits: dict, db: Session = Depends(get_db)):
-    clave_map = {
-        "diario": "diario",
-        "semanal": "semanal",
-        "mensual": "mensual",
-        "costoExcedente": "costo_excedente",
-        "applyToAll": "applyToAll",
-    }
+    guardar_limites(db, new_limits)
+    return {"message": "Configuración guardada correctamente"}
 
-    for front_clave, valor in new_limits.items():
-        db_clave = clave_map.get(front_clave, front_clave)
-        config = db.query(Configuracion).filter(Configuracion.clave == db_clave).first()
-        if config:
-            config.valor = valor
-        else:
-            db.add(Configuracion(clave=db_clave, valor=valor, tipo="limit"))
+
+# Límites efectivos de una vendedora
+@router.get("/limits/{vendedora_id}", response_model=LimitesEfectivosResponse)
+def get_limits_vendedora(vendedora_id: int, categoria_id: Optional[int] = None, db: Session = Depends(get_db)):
+    limites = limites_para(db, vendedora_id, categoria_id)
+    return LimitesEfectivosResponse(
+        vendedora_id=vendedora_id,
+        categoria_id=categoria_id,
+        diario=limites.diario,
+        semanal=limites.semanal,
+        mensual=limites.mensual,
+        costo_excedente=limites.costo_excedente,
+        origen=limites.origen,
+        version=limites.version,
+    )
+
+
+# ── Excepciones por vendedora / categoría ────────────────────
+# Con applyToAll activo las excepciones no se aplican: se devuelven con vigente=False.
+def _respuesta_excepcion(excepcion: LimiteVendedora, vigente: bool) -> LimiteVendedoraResponse:
+    return LimiteVendedoraResponse.model_validate(excepcion).model_copy(update={"vigente": vigente})
+
+
+@router.get("/overrides", response_model=List[LimiteVendedoraResponse], dependencies=[Depends(_etag_config)])
+def listar_excepciones(db: Session = Depends(get_db)):
+    vigente = not cargar_politica(db, al_dia=True).base.apply_to_all
+    excepciones = db.query(LimiteVendedora).order_by(LimiteVendedora.id).all()
+    return [_respuesta_excepcion(e, vigente) for e in excepciones]
+
+
+@router.put("/overrides", response_model=LimiteVendedoraResponse)
+def guardar_excepcion(datos: LimiteVendedoraBase, db: Session = Depends(get_db)):
+    """
+    Crea o reemplaza la excepción de (vendedora_id, categoria_id). Se guarda
+    también con applyToAll activo, pero responde vigente=False: no se aplica
+    hasta desactivarlo.
+    """
+    if datos.vendedora_id is None and datos.categoria_id is None:
+        raise HTTPException(status_code=400, detail="Indica vendedora_id, categoria_id o ambos")
+
+    excepcion = db.query(LimiteVendedora).filter(
+        LimiteVendedora.vendedora_id.is_(None) if datos.vendedora_id is None
+        else LimiteVendedora.vendedora_id == datos.vendedora_id,
+        LimiteVendedora.categoria_id.is_(None) if datos.categoria_id is None
+        else LimiteVendedora.categoria_id == datos.categoria_id,
+    ).first()
+    if not excepcion:
+        excepcion = LimiteVendedora(vendedora_id=datos.vendedora_id, categoria_id=datos.categoria_id)
+        db.add(excepcion)
+    for campo in CAMPOS_LIMITE:
+        setattr(excepcion, campo, getattr(datos, campo))
+
+    _subir_version(db)
     db.commit()
-    return {"message": "Configuración guardada correctamente"}
+    db.refresh(excepcion)
+    invalidar_limites()
+
+    vigente = not cargar_limites(db).apply_to_all
+    if not vigente:
+        print(f"⚠️ Excepción {excepcion.id} guardada, pero applyToAll está activo: se usan los límites globales")
+    return _respuesta_excepcion(excepcion, vigente)
+
+
+@router.delete("/overrides/{excepcion_id}")
+def eliminar_excepcion(excepcion_id: int, db: Session = Depends(get_db)):
+    excepcion = db.query(LimiteVendedora).filter(LimiteVendedora.id == excepcion_id).first()
+    if not excepcion:
+        raise HTTPException(status_code=404, detail="Excepción no encontrada")
+    db.delete(excepcion)
+    _subir_version(db)
+    db.commit()
+    invalidar_limites()
+    return {"message": "Excepción eliminada"}
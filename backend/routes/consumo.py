@@ -0,0 +1,108 @@
+# routes/consumo.py
+from collections import defaultdict
+from datetime import date
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import Impresion, ConsumoDiario, ConsumoSemanal
+
+
+def semana_iso(fecha: date):
+    """Devuelve (año ISO, semana ISO) de una fecha."""
+    anio, semana, _ = fecha.isocalendar()
+    return anio, semana
+
+
+# ── Lectura de totales (O(1), por clave primaria) ────────────
+def obtener_totales(db: Session, usuario_id: int, fecha: date):
+    """
+    Devuelve (total_hoy, total_semana) del usuario para la fecha dada
+    leyendo los acumulados en lugar de sumar la tabla de impresiones.
+    """
+    anio, semana = semana_iso(fecha)
+
+    total_hoy = db.query(ConsumoDiario.total).filter(
+        ConsumoDiario.usuario_id == usuario_id,
+        ConsumoDiario.fecha == fecha
+    ).scalar() or 0
+
+    total_semana = db.query(ConsumoSemanal.total).filter(
+        ConsumoSemanal.usuario_id == usuario_id,
+        ConsumoSemanal.anio == anio,
+        ConsumoSemanal.semana == semana
+    ).scalar() or 0
+
+    return total_hoy, total_semana
+
+
+# ── Actualización incremental (misma transacción que la impresión) ──
+def registrar_consumo(db: Session, usuario_id: int, fecha: date, cantidad: int):
+    """
+    Suma `cantidad` a los acumulados diario y semanal del usuario.
+    No hace commit: se confirma junto con el INSERT de la impresión.
+    """
+    anio, semana = semana_iso(fecha)
+
+    diario = insert(ConsumoDiario).values(usuario_id=usuario_id, fecha=fecha, total=cantidad)
+    db.execute(diario.on_conflict_do_update(
+        index_elements=[ConsumoDiario.usuario_id, ConsumoDiario.fecha],
+        set_={"total": ConsumoDiario.total + diario.excluded.total}
+    ))
+
+    semanal = insert(ConsumoSemanal).values(usuario_id=usuario_id, anio=anio, semana=semana, total=cantidad)
+    db.execute(semanal.on_conflict_do_update(
+        index_elements=[ConsumoSemanal.usuario_id, ConsumoSemanal.anio, ConsumoSemanal.semana],
+        set_={"total": ConsumoSemanal.total + semanal.excluded.total}
+    ))
+
+
+# ── Reconstrucción / verificación desde la tabla impresiones ─
+def _calcular_desde_impresiones(db: Session):
+    filas = (
+        db.query(Impresion.usuario_id, Impresion.fecha, func.sum(Impresion.cantidad_impresa))
+        .group_by(Impresion.usuario_id, Impresion.fecha)
+        .all()
+    )
+
+    diarios = {}
+    semanales = defaultdict(int)
+    for usuario_id, fecha, total in filas:
+        diarios[(usuario_id, fecha)] = int(total or 0)
+        semanales[(usuario_id, *semana_iso(fecha))] += int(total or 0)
+    return diarios, dict(semanales)
+
+
+def reconstruir_consumo(db: Session):
+    """Borra y recalcula todos los acumulados. Devuelve (filas diarias, filas semanales)."""
+    diarios, semanales = _calcular_desde_impresiones(db)
+
+    db.query(ConsumoDiario).delete()
+    db.query(ConsumoSemanal).delete()
+    db.bulk_insert_mappings(ConsumoDiario, [
+        {"usuario_id": u, "fecha": f, "total": t} for (u, f), t in diarios.items()
+    ])
+    db.bulk_insert_mappings(ConsumoSemanal, [
+        {"usuario_id": u, "anio": a, "semana": s, "total": t} for (u, a, s), t in semanales.items()
+    ])
+    db.commit()
+    return len(diarios), len(semanales)
+
+
+def verificar_consumo(db: Session):
+    """
+    Compara los acumulados guardados con los recalculados.
+    Devuelve una lista de diferencias (vacía si todo cuadra).
+    """
+    esperados_d, esperados_s = _calcular_desde_impresiones(db)
+    guardados_d = {(c.usuario_id, c.fecha): c.total for c in db.query(ConsumoDiario).all()}
+    guardados_s = {(c.usuario_id, c.anio, c.semana): c.total for c in db.query(ConsumoSemanal).all()}
+
+    diferencias = []
+    for clave in esperados_d.keys() | guardados_d.keys():
+        if esperados_d.get(clave, 0) != guardados_d.get(clave, 0):
+            diferencias.append(("diario", clave, guardados_d.get(clave, 0), esperados_d.get(clave, 0)))
+    for clave in esperados_s.keys() | guardados_s.keys():
+        if esperados_s.get(clave, 0) != guardados_s.get(clave, 0):
+            diferencias.append(("semanal", clave, guardados_s.get(clave, 0), esperados_s.get(clave, 0)))
+    return diferencias
@@ -0,0 +1,212 @@
+# routes/contabilidad.py
+"""
+Registro contable de impresiones en una sola unidad de trabajo.
+
+Todo lo que se desprende de imprimir (impresión, acumulados de consumo,
+deudas por exceso, movimientos de saldo, notificación y trabajo de la cola)
+se escribe en la misma transacción y se confirma con un único commit; no
+hay refresh posteriores. Lo usan POST /impresiones/ y POST /impresiones/batch.
+"""
+import os
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from models import Impresion, Deuda, Catalogo, Notificacion
+from .almacen import ruta_archivo
+from .config_helper import cargar_politica
+from .consumo import obtener_totales, registrar_consumo
+from .cubo import registrar_en_cubo
+from .metricas import sumar_metrica
+from .print_queue import encolar_trabajo, despertar
+from .saldos import registrar_movimiento
+from .eventos import publicar
+
+UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "uploads", "catalogos", "pdf")
+
+
+@dataclass
+class LineaImpresion:
+    usuario_id: int
+    catalogo: Catalogo
+    cantidad: int
+
+
+# ── Archivo a imprimir de un catálogo ────────────────────────
+def ruta_catalogo(catalogo: Catalogo) -> str:
+    return ruta_archivo(catalogo.archivo or catalogo.url, UPLOAD_DIR)
+
+
+# ── Crear o actualizar deuda (sin commit) ────────────────────
+def crear_o_actualizar_deuda(db: Session, usuario_id: int, monto_extra: float, fecha: date, tipo: str,
+                             impresion_id: int = None, cantidad_excedida: int = 0):
+    """
+    Deja una sola deuda pendiente por día ('diaria') o semana ('semanal') con
+    el monto acumulado, y mueve el saldo por la diferencia.
+    """
+    if monto_extra <= 0:
+        return None
+
+    if tipo == "diaria":
+        deuda = db.query(Deuda).filter(
+            Deuda.vendedora_id == usuario_id,
+            func.date(Deuda.fecha) == fecha,
+            Deuda.tipo == "diaria",
+            Deuda.estado == "pendiente"
+        ).first()
+    else:  # semanal
+        inicio_semana = fecha - timedelta(days=fecha.weekday())
+        deuda = db.query(Deuda).filter(
+            Deuda.vendedora_id == usuario_id,
+            Deuda.fecha >= inicio_semana,
+            Deuda.tipo == "semanal",
+            Deuda.estado == "pendiente"
+        ).first()
+
+    if deuda:
+        # El saldo se mueve solo por la diferencia con el monto anterior
+        registrar_movimiento(db, usuario_id, monto_extra - deuda.monto, "cargo",
+                             f"Exceso {tipo} actualizado", deuda_id=deuda.id)
+        deuda.monto = monto_extra
+        deuda.cantidad_excedida = cantidad_excedida
+        deuda.impresion_id = impresion_id
+        deuda.referencia = f"{cantidad_excedida} excedió el límite"
+        deuda.fecha = fecha
+    else:
+        deuda = Deuda(
+            vendedora_id=usuario_id,
+            impresion_id=impresion_id,
+            monto=monto_extra,
+            cantidad_excedida=cantidad_excedida,
+            referencia=f"{cantidad_excedida} excedió el límite",
+            estado="pendiente",
+            fecha=fecha,
+            tipo=tipo
+        )
+        db.add(deuda)
+        db.flush()  # id para el movimiento
+        registrar_movimiento(db, usuario_id, monto_extra, "cargo", f"Exceso {tipo}", deuda_id=deuda.id)
+    return deuda
+
+
+# ── Unidad de trabajo ────────────────────────────────────────
+def registrar_impresiones(db: Session, fecha: date, lineas: list):
+    """
+    Registra las líneas (LineaImpresion) y todo lo que generan, con un solo
+    commit. Los límites y totales se leen una vez por usuario y el exceso se
+    reparte entre las líneas en el orden recibido.
+    Devuelve (impresiones, deudas, deuda_total) como dicts listos para responder.
+    Si algo falla hace rollback y relanza la excepción.
+    """
+    politica = cargar_politica(db)
+
+    try:
+        # Totales actuales, una vez por usuario
+        totales = {}
+        for usuario_id in dict.fromkeys(l.usuario_id for l in lineas):
+            total_hoy, total_semana = obtener_totales(db, usuario_id, fecha)
+            totales[usuario_id] = {"hoy": total_hoy, "semana": total_semana, "ultima": None,
+                                   "limites": None, "exceso_nuevo": 0}
+
+        nuevas = []
+        for linea in lineas:
+            t = totales[linea.usuario_id]
+            nuevo_hoy = t["hoy"] + linea.cantidad
+            nuevo_semana = t["semana"] + linea.cantidad
+            limites = politica.resolver(linea.usuario_id, linea.catalogo.categoria_id)
+
+            # Solo el exceso que agrega esta línea
+            exceso_diario = int(max(nuevo_hoy - limites.diario, 0) - max(t["hoy"] - limites.diario, 0))
+            exceso_semanal = int(max(nuevo_semana - limites.semanal, 0) - max(t["semana"] - limites.semanal, 0))
+            exceso = max(exceso_diario, exceso_semanal)
+
+            nueva = Impresion(
+                usuario_id=linea.usuario_id,
+                catalogo_id=linea.catalogo.id,
+                fecha=fecha,
+                cantidad_impresa=linea.cantidad,
+                exceso=exceso,
+                costo_extra=exceso * limites.costo_excedente if exceso > 0 else 0
+            )
+            db.add(nueva)
+            registrar_consumo(db, linea.usuario_id, fecha, linea.cantidad)
+            registrar_en_cubo(db, fecha, linea.usuario_id, linea.catalogo.id, linea.cantidad,
+                              exceso, nueva.costo_extra)
+            nuevas.append((nueva, linea.catalogo))
+
+            t["hoy"], t["semana"], t["ultima"], t["limites"] = nuevo_hoy, nuevo_semana, nueva, limites
+            t["exceso_nuevo"] += exceso
+
+        db.flush()  # asigna los IDs sin confirmar la transacción
+
+        # Métricas del dashboard
+        sumar_metrica(db, "impresiones", len(nuevas), fecha)
+        sumar_metrica(db, "copias", sum(n.cantidad_impresa for n, _ in nuevas), fecha)
+
+        # Trabajos de impresión, uno por línea
+        for nueva, catalogo in nuevas:
+            file_path = ruta_catalogo(catalogo)
+            if os.path.exists(file_path):
+                encolar_trabajo(db, file_path, nueva.cantidad_impresa, usuario_id=nueva.usuario_id,
+                                catalogo_id=nueva.catalogo_id, impresion_id=nueva.id)
+            else:
+                print(f"⚠️ Archivo de catálogo no encontrado: {file_path}")
+
+        impresiones = [
+            {
+                "id": n.id,
+                "usuario_id": n.usuario_id,
+                "catalogo_id": n.catalogo_id,
+                "fecha": n.fecha,
+                "cantidad_impresa": n.cantidad_impresa,
+                "exceso": n.exceso,
+                "costo_extra": float(n.costo_extra)
+            }
+            for n, _ in nuevas
+        ]
+
+        # Deudas: una diaria y una semanal por usuario con el exceso acumulado
+        # (con los límites de su última línea)
+        deudas = []
+        deuda_total = 0.0
+        for usuario_id, t in totales.items():
+            limites = t["limites"]
+            exceso_diario = int(max(t["hoy"] - limites.diario, 0))
+            exceso_semanal = int(max(t["semana"] - limites.semanal, 0))
+            resumen = {"usuario_id": usuario_id, "exceso_diario": exceso_diario, "exceso_semanal": exceso_semanal}
+
+            for tipo, exceso in (("diaria", exceso_diario), ("semanal", exceso_semanal)):
+                if exceso <= 0:
+                    continue
+                monto = exceso * limites.costo_excedente
+                crear_o_actualizar_deuda(
+                    db, usuario_id, monto, fecha, tipo,
+                    impresion_id=t["ultima"].id,
+                    cantidad_excedida=exceso
+                )
+                resumen["monto_diario" if tipo == "diaria" else "monto_semanal"] = monto
+                deuda_total += monto
+            deudas.append(resumen)
+
+            publicar(db, "impresion_creada", usuario_id,
+                     impresiones=sum(1 for n, _ in nuevas if n.usuario_id == usuario_id),
+                     copias=sum(n.cantidad_impresa for n, _ in nuevas if n.usuario_id == usuario_id))
+
+            # Aviso a la vendedora solo si esta vez se pasó del límite
+            if t["exceso_nuevo"] > 0:
+                db.add(Notificacion(
+                    vendedora_id=usuario_id,
+                    mensaje=(f"Superaste tu límite de impresiones ({exceso_diario} hoy, "
+                             f"{exceso_semanal} en la semana). Se generó un cargo por exceso ⚠️")
+                ))
+                publicar(db, "notificacion_creada", usuario_id)
+
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+
+    despertar()
+    return impresiones, deudas, deuda_total
@@ -0,0 +1,97 @@
+# routes/cubo.py
+"""
+Cubo de impresiones: órdenes, copias, exceso y costo extra por
+(periodo, vendedora, catálogo), ya sumados por día, semana y mes.
+Se actualiza en la misma transacción que la impresión
+(routes/contabilidad.py); /stats/series lee el nivel pedido directamente.
+"""
+from collections import defaultdict
+from datetime import date, timedelta
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import Impresion, ImpresionCubo
+
+MEDIDAS = ("ordenes", "copias", "exceso", "costo_extra")
+NIVELES = ("dia", "semana", "mes")
+
+
+def inicio_periodo(dia: date, nivel: str) -> date:
+    """Primer día del periodo que contiene `dia` (las semanas empiezan el lunes)."""
+    if nivel == "semana":
+        return dia - timedelta(days=dia.weekday())
+    if nivel == "mes":
+        return dia.replace(day=1)
+    return dia
+
+
+def siguiente_periodo(inicio: date, nivel: str) -> date:
+    if nivel == "mes":
+        return (inicio.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return inicio + timedelta(days=7 if nivel == "semana" else 1)
+
+
+# ── Actualización incremental (sin commit) ───────────────────
+def registrar_en_cubo(db: Session, dia: date, vendedora_id: int, catalogo_id: int,
+                      copias: int, exceso: int = 0, costo_extra: float = 0):
+    """Suma una impresión en sus tres niveles (día, semana, mes)."""
+    fila = insert(ImpresionCubo).values([
+        {"nivel": nivel, "inicio": inicio_periodo(dia, nivel), "vendedora_id": vendedora_id,
+         "catalogo_id": catalogo_id, "ordenes": 1, "copias": copias, "exceso": exceso,
+         "costo_extra": float(costo_extra or 0)}
+        for nivel in NIVELES
+    ])
+    db.execute(fila.on_conflict_do_update(
+        index_elements=[ImpresionCubo.nivel, ImpresionCubo.inicio,
+                        ImpresionCubo.vendedora_id, ImpresionCubo.catalogo_id],
+        set_={m: getattr(ImpresionCubo, m) + getattr(fila.excluded, m) for m in MEDIDAS}
+    ))
+
+
+# ── Reconstrucción / verificación desde la tabla impresiones ─
+def _calcular_desde_impresiones(db: Session) -> dict:
+    filas = (
+        db.query(
+            Impresion.fecha, Impresion.usuario_id, Impresion.catalogo_id,
+            func.count(Impresion.id), func.sum(Impresion.cantidad_impresa),
+            func.sum(Impresion.exceso), func.sum(Impresion.costo_extra)
+        )
+        .filter(Impresion.fecha.isnot(None), Impresion.catalogo_id.isnot(None))
+        .group_by(Impresion.fecha, Impresion.usuario_id, Impresion.catalogo_id)
+        .all()
+    )
+    valores = defaultdict(lambda: [0, 0, 0, 0.0])
+    for dia, vendedora_id, catalogo_id, *medidas in filas:
+        for nivel in NIVELES:
+            acumulado = valores[(nivel, inicio_periodo(dia, nivel), vendedora_id, catalogo_id)]
+            for i, valor in enumerate(medidas):
+                acumulado[i] += float(valor or 0) if i == 3 else int(valor or 0)
+    return {clave: (o, c, e, round(costo, 2)) for clave, (o, c, e, costo) in valores.items()}
+
+
+def reconstruir_cubo(db: Session) -> int:
+    """Borra y recalcula el cubo. Devuelve la cantidad de filas."""
+    valores = _calcular_desde_impresiones(db)
+    db.query(ImpresionCubo).delete()
+    db.bulk_insert_mappings(ImpresionCubo, [
+        {"nivel": n, "inicio": i, "vendedora_id": v, "catalogo_id": c, **dict(zip(MEDIDAS, medidas))}
+        for (n, i, v, c), medidas in valores.items()
+    ])
+    db.commit()
+    return len(valores)
+
+
+def verificar_cubo(db: Session):
+    """[(clave, guardado, esperado)] donde el cubo no coincide con impresiones."""
+    esperados = _calcular_desde_impresiones(db)
+    guardados = {
+        (f.nivel, f.inicio, f.vendedora_id, f.catalogo_id): (f.ordenes, f.copias, f.exceso, round(f.costo_extra, 2))
+        for f in db.query(ImpresionCubo).all()
+    }
+    return [
+        (clave, guardados.get(clave), esperados.get(clave))
+        for clave in sorted(esperados.keys() | guardados.keys())
+        if guardados.get(clave) != esperados.get(clave)
+    ]
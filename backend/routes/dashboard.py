@@ -1,50 +1,101 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from sqlalchemy import extract, func
+from sqlalchemy import func
 from datetime import datetime
+from typing import Optional
+import os
+import re
+import threading
+import time
 
 from database import get_db
-from models import Vendedora, Pago, Impresion, Deuda
+from models import Deuda
+from .metricas import leer_periodos, leer_meses, periodo_mes, ACTUAL
 
 router = APIRouter()
+
+# Microcaché: el dashboard se pide seguido y tolera unos segundos de atraso
+DASHBOARD_TTL = float(os.environ.get("DASHBOARD_TTL", "5"))
+_cache = {}  # clave -> (vence, respuesta)
+_cache_lock = threading.Lock()
+
+
+def _cacheado(clave, calcular):
+    ahora = time.monotonic()
+    with _cache_lock:
+        guardado = _cache.get(clave)
+        if guardado and guardado[0] > ahora:
+            return guardado[1]
+    respuesta = calcular()
+    with _cache_lock:
+        _cache[clave] = (ahora + DASHBOARD_TTL, respuesta)
+    return respuesta
+
+
+def _validar_mes(mes: Optional[str]) -> str:
+    if mes is None:
+        return periodo_mes(datetime.now())
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", mes):
+        raise HTTPException(status_code=400, detail="Mes inválido, usa YYYY-MM")
+    return mes
+
+
+def _mes_anterior(mes: str, n: int) -> str:
+    anio, m = map(int, mes.split("-"))
+    total = anio * 12 + (m - 1) - n
+    return f"{total // 12:04d}-{total % 12 + 1:02d}"
+
+
 @router.get("/dashboard")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    now = datetime.now()
-
-    # Vendedoras
-    aprobadas = db.query(func.count(Vendedora.id)).filter(Vendedora.estado == "aprobada").scalar() or 0
-    pendientes = db.query(func.count(Vendedora.id)).filter(Vendedora.estado == "pendiente").scalar() or 0
-    rechazadas = db.query(func.count(Vendedora.id)).filter(Vendedora.estado == "rechazada").scalar() or 0
-
-    # Órdenes activas (mes actual)
-    ordenes_activas = (
-        db.query(func.count(Impresion.id))
-        .filter(Impresion.fecha.isnot(None))
-        .filter(extract("month", Impresion.fecha) == now.month)
-        .filter(extract("year", Impresion.fecha) == now.year)
-        .scalar() or 0
-    )
-
-    # Pagos pendientes (deudas en estado pendiente)
-    pagos_pendientes = db.query(func.count(Deuda.id)).filter(Deuda.estado == "pendiente").scalar() or 0
-
-    # Ingresos del mes actual
-    ingresos_mes_total = (
-        db.query(func.coalesce(func.sum(Pago.monto), 0))
-        .filter(Pago.estado == "completado")   # 👈 este es clave
-        .filter(Pago.fecha.isnot(None))
-        .filter(extract("month", Pago.fecha) == now.month)
-        .filter(extract("year", Pago.fecha) == now.year)
-        .scalar() or 0
-    )
-
-    return {
-        "vendedoras": {
-            "aprobadas": aprobadas,
-            "pendientes": pendientes,
-            "rechazadas": rechazadas
-        },
-        "ordenes_activas": ordenes_activas,
-        "pagos_pendientes": pagos_pendientes,  # 👈 ahora sí
-        "ingresos_mes": float(ingresos_mes_total)
-    }
\ No newline at end of file
+def get_dashboard_stats(
+    mes: Optional[str] = Query(None, description="Mes YYYY-MM (por defecto el actual)"),
+    db: Session = Depends(get_db)
+):
+    mes = _validar_mes(mes)
+
+    def calcular():
+        # Métricas acumuladas (routes/metricas.py): una consulta por clave primaria
+        metricas = leer_periodos(db, [mes, ACTUAL])
+        del_mes, actual = metricas.get(mes, {}), metricas.get(ACTUAL, {})
+
+        # Pagos pendientes (deudas en estado pendiente), por índice
+        pagos_pendientes = db.query(func.count(Deuda.id)).filter(Deuda.estado == "pendiente").scalar() or 0
+
+        return {
+            "vendedoras": {
+                "aprobadas": int(actual.get("vendedoras_aprobada", 0)),
+                "pendientes": int(actual.get("vendedoras_pendiente", 0)),
+                "rechazadas": int(actual.get("vendedoras_rechazada", 0))
+            },
+            "ordenes_activas": int(del_mes.get("impresiones", 0)),
+            "pagos_pendientes": pagos_pendientes,  # 👈 ahora sí
+            "ingresos_mes": float(del_mes.get("ingresos", 0))
+        }
+
+    return _cacheado(("dashboard", mes), calcular)
+
+
+@router.get("/dashboard/mensual")
+def get_dashboard_mensual(
+    meses: int = Query(12, ge=1, le=120, description="Cantidad de meses hacia atrás"),
+    hasta: Optional[str] = Query(None, description="Último mes YYYY-MM (por defecto el actual)"),
+    db: Session = Depends(get_db)
+):
+    """Serie mensual de órdenes, copias e ingresos (meses sin actividad en cero)."""
+    hasta = _validar_mes(hasta)
+    desde = _mes_anterior(hasta, meses - 1)
+
+    def calcular():
+        valores = leer_meses(db, desde, hasta, ("impresiones", "copias", "ingresos"))
+        lista = [_mes_anterior(hasta, n) for n in range(meses - 1, -1, -1)]
+        return [
+            {
+                "mes": m,
+                "ordenes": int(valores["impresiones"].get(m, 0)),
+                "copias": int(valores["copias"].get(m, 0)),
+                "ingresos": float(valores["ingresos"].get(m, 0))
+            }
+            for m in lista
+        ]
+
+    return _cacheado(("mensual", desde, hasta), calcular)
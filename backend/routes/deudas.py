@@ -1,11 +1,18 @@
 # routes/deudas.py
-from fastapi import APIRouter,  UploadFile, File, Form, Depends, HTTPException
+from fastapi import APIRouter,  UploadFile, File, Form, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session, joinedload
-from sqlalchemy import func
+from sqlalchemy import func, case, update
 from database import get_db
-from models import Deuda, Vendedora, Notificacion
-import shutil
+from models import Deuda, Vendedora, Notificacion, Cambio
+from .saldos import registrar_movimiento, obtener_saldo
+from .notificaciones import notificar_en_lote
+from .eventos import publicar
+from .cambios import cursor_actual, cambiados, delta, DESCRIPCION_SINCE
+from .uploads import TIPOS_COMPROBANTE
+from .almacen import guardar_archivo, liberar, borrar_del_disco, URL_ALMACEN
+from schemas import DecisionesPagoRequest
 from datetime import datetime
+from typing import Optional
 
 
 import os
@@ -14,31 +21,87 @@ UPLOAD_DIR = "uploads/comprobantes"
 os.makedirs(UPLOAD_DIR, exist_ok=True)
 router = APIRouter()
 
+ESTADOS_ABIERTOS = ["pendiente", "pendiente_verificacion"]
+
 @router.get("/deudas")
-def obtener_deudas(db: Session = Depends(get_db)):
-    # Traer vendedoras con deudas pendientes o en verificación, sumando monto
-    vendedoras = db.query(
-        Deuda.vendedora_id,
-        Vendedora.nombre,
-        func.count(Deuda.id).label("cantidad_deudas"),
-        func.sum(Deuda.monto).label("total_deuda")
-    ).join(Vendedora, Vendedora.id == Deuda.vendedora_id) \
-     .filter(Deuda.estado.in_(["pendiente", "pendiente_verificacion"])) \
-     .group_by(Deuda.vendedora_id, Vendedora.nombre) \
-     .all()
+def obtener_deudas(
+    response: Response,
+    resumen: bool = Query(False, description="Solo totales por vendedora, sin el detalle"),
+    cursor: Optional[int] = Query(None, description="Último vendedora_id de la página anterior"),
+    limite: Optional[int] = Query(None, ge=1, le=500, description="Vendedoras por página (sin límite por defecto)"),
+    since: Optional[int] = Query(None, ge=0, description=DESCRIPCION_SINCE),
+    db: Session = Depends(get_db)
+):
+    """
+    Vendedoras con deudas pendientes o en verificación, con su total.
+    - Una sola consulta: el detalle se trae ordenado por vendedora y se agrupa en una pasada.
+    - resumen=true: solo el GROUP BY, sin filas de detalle.
+    - Paginación por vendedora (keyset): el siguiente cursor va en la cabecera X-Next-Cursor.
+    - since: solo las vendedoras con alguna deuda modificada (el grupo completo);
+      en "borrados" las que ya no tienen deudas abiertas. Sin paginación.
+    """
+    hasta = cursor_actual(db, since)
+    filtro = [Deuda.estado.in_(ESTADOS_ABIERTOS)]
+    if since is not None:
+        vendedoras = cambiados(db, "deudas", since, hasta, columna=Cambio.vendedora_id)
+        filtro.append(Deuda.vendedora_id.in_(vendedoras))
+        cursor = limite = None
+    if cursor is not None:
+        filtro.append(Deuda.vendedora_id > cursor)
 
-    resultado = []
+    if resumen:
+        query = db.query(
+            Deuda.vendedora_id,
+            Vendedora.nombre,
+            func.count(Deuda.id).label("cantidad_deudas"),
+            func.sum(Deuda.monto).label("total_deuda")
+        ).join(Vendedora, Vendedora.id == Deuda.vendedora_id) \
+         .filter(*filtro) \
+         .group_by(Deuda.vendedora_id, Vendedora.nombre) \
+         .order_by(Deuda.vendedora_id)
+        if limite:
+            query = query.limit(limite)
+        resultado = [
+            {
+                "vendedora_id": v.vendedora_id,
+                "nombre": v.nombre,
+                "cantidad_deudas": v.cantidad_deudas,
+                "total_deuda": float(v.total_deuda),
+            }
+            for v in query.all()
+        ]
+    else:
+        if limite:
+            # Página de vendedoras con deudas abiertas
+            pagina = db.query(Deuda.vendedora_id).filter(*filtro).distinct() \
+                .order_by(Deuda.vendedora_id).limit(limite).subquery()
+            filtro.append(Deuda.vendedora_id.in_(db.query(pagina.c.vendedora_id)))
 
-    for v in vendedoras:
-        # Detalle de deudas
-        deudas_detalle = db.query(Deuda).filter(
-            Deuda.vendedora_id == v.vendedora_id,
-            Deuda.estado.in_(["pendiente", "pendiente_verificacion"])
-        ).all()
+        filas = db.query(
+            Deuda.vendedora_id, Vendedora.nombre,
+            Deuda.id, Deuda.monto, Deuda.cantidad_excedida, Deuda.metodo, Deuda.referencia,
+            Deuda.capture_url, Deuda.estado, Deuda.tipo, Deuda.volante_id, Deuda.impresion_id,
+            func.strftime("%Y-%m-%d %H:%M:%S", Deuda.fecha).label("fecha")
+        ).join(Vendedora, Vendedora.id == Deuda.vendedora_id) \
+         .filter(*filtro) \
+         .order_by(Deuda.vendedora_id, Deuda.id) \
+         .all()
 
-        deudas_list = []
-        for d in deudas_detalle:
-            deudas_list.append({
+        resultado = []
+        actual = None
+        for d in filas:
+            if actual is None or actual["vendedora_id"] != d.vendedora_id:
+                actual = {
+                    "vendedora_id": d.vendedora_id,
+                    "nombre": d.nombre,
+                    "cantidad_deudas": 0,
+                    "total_deuda": 0.0,
+                    "deudas": []
+                }
+                resultado.append(actual)
+            actual["cantidad_deudas"] += 1
+            actual["total_deuda"] += d.monto
+            actual["deudas"].append({
                 "id": d.id,
                 "monto": d.monto,
                 "cantidad_excedida": d.cantidad_excedida,
@@ -46,43 +109,48 @@ def obtener_deudas(db: Session = Depends(get_db)):
                 "referencia": d.referencia,
                 "capture_url": d.capture_url,
                 "estado": d.estado,
-                "fecha": d.fecha.strftime("%Y-%m-%d %H:%M:%S"),
+                "fecha": d.fecha,
                 "tipo": d.tipo,
                 "volante_id": d.volante_id,
                 "impresion_id": d.impresion_id
             })
 
-        resultado.append({
-            "vendedora_id": v.vendedora_id,
-            "nombre": v.nombre,
-            "cantidad_deudas": v.cantidad_deudas,
-            "total_deuda": float(v.total_deuda),
-            "deudas": deudas_list
-        })
+    if since is not None:
+        return delta(resultado, vendedoras, hasta, clave="vendedora_id")
+    if limite and len(resultado) == limite:
+        response.headers["X-Next-Cursor"] = str(resultado[-1]["vendedora_id"])
+    response.headers["X-Since"] = str(hasta)
 
     return resultado
 
 
 @router.get("/deudas/{usuario_id}")
-def obtener_deudas_usuario(usuario_id: int, db: Session = Depends(get_db)):
+def obtener_deudas_usuario(
+    usuario_id: int,
+    since: Optional[int] = Query(None, ge=0, description=DESCRIPCION_SINCE),
+    db: Session = Depends(get_db)
+):
     """
     Devuelve todas las deudas pendientes de un usuario,
     acumulando correctamente los montos extras y respetando los tipos.
+    Con `since`, en "deudas" solo las modificadas y en "borrados" las que
+    dejaron de estar pendientes.
     """
-    deudas = db.query(Deuda).filter(
+    hasta = cursor_actual(db, since)
+    query = db.query(Deuda).filter(
         Deuda.vendedora_id == usuario_id,
         Deuda.estado == "pendiente"  # solo pendientes
-    ).order_by(Deuda.fecha.asc()).all()
+    )
+    if since is not None:
+        ids = cambiados(db, "deudas", since, hasta, usuario_id)
+        query = query.filter(Deuda.id.in_(ids))
+    deudas = query.order_by(Deuda.fecha.asc()).all()
 
     resultado = []
-    total_deuda = 0.0
-
     for d in deudas:
-        monto = d.monto
-        total_deuda += monto
         resultado.append({
             "id": d.id,
-            "monto": float(monto),
+            "monto": float(d.monto),
             "cantidad_excedida": d.cantidad_excedida,
             "referencia": d.referencia,
             "tipo": d.tipo,
@@ -90,11 +158,15 @@ def obtener_deudas_usuario(usuario_id: int, db: Session = Depends(get_db)):
             "estado": d.estado
         })
 
-    return {
+    respuesta = {
         "usuario_id": usuario_id,
-        "total_deuda": float(total_deuda),
+        "total_deuda": obtener_saldo(db, usuario_id),  # saldo materializado (routes/saldos.py)
+        "since": hasta,
         "deudas": resultado
     }
+    if since is not None:
+        respuesta["borrados"] = delta(resultado, ids, hasta)["borrados"]
+    return respuesta
 
 
 @router.post("/registrar-pago")
@@ -110,48 +182,135 @@ async def registrar_pago(
     if not deuda:
         raise HTTPException(status_code=404, detail="Deuda no encontrada")
 
-    # Guardar archivo comprobante
-    timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-    filename = f"{deuda_id}_{timestamp}_{comprobante.filename}"
-    file_path = os.path.join(UPLOAD_DIR, filename)
+    # Guardar comprobante en el almacén (el mismo archivo se guarda una sola vez)
+    clave = await guardar_archivo(db, comprobante, tipos=TIPOS_COMPROBANTE)
+    file_path = f"{URL_ALMACEN.lstrip('/')}/{clave}"  # relativa, como los comprobantes viejos
+    anterior = liberar(db, deuda.capture_url)
 
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(comprobante.file, buffer)
+    # Una deuda pendiente que pasa a verificación deja de sumar al saldo
+    if deuda.estado == "pendiente":
+        registrar_movimiento(db, deuda.vendedora_id, -deuda.monto, "verificacion",
+                             f"Pago registrado ({banco} {referencia})", deuda_id=deuda.id)
 
     # Actualizar deuda
     deuda.metodo = banco
     deuda.referencia = referencia
     deuda.capture_url = file_path
     deuda.estado = "pendiente_verificacion"  # 👈 pasa a estado intermedio
+    publicar(db, "deuda_cambiada", deuda.vendedora_id, deuda_id=deuda.id, estado=deuda.estado)
     db.commit()
+    borrar_del_disco(db, anterior)  # comprobante reemplazado que ya nadie usa
     db.refresh(deuda)
 
     return {"message": "Pago registrado correctamente", "deuda": deuda.id}
 
+# ── Verificación de pagos (aprobar / rechazar) ───────────────
+ESTADO_DECISION = {"aprobar": "pagado", "rechazar": "rechazado"}
+
+def _mensaje_decision(decision: str, deuda_id: int, monto: float) -> str:
+    if decision == "aprobar":
+        return f"Tu pago de ${monto:.2f} (deuda #{deuda_id}) ha sido aprobado ✅"
+    return (f"Tu pago de ${monto:.2f} (deuda #{deuda_id}) fue rechazado. "
+            "Por favor revisa el comprobante o contacta soporte.")
+
+def resolver_verificaciones(db: Session, decisiones: dict) -> dict:
+    """
+    Aplica {deuda_id: "aprobar" | "rechazar"} en una transacción:
+    una consulta para validar, un UPDATE con CASE (RETURNING de las que
+    cambiaron) y las notificaciones en un solo INSERT. Solo se notifican las
+    que el UPDATE cambió; las que otra petición resolvió antes quedan como
+    "estado_invalido".
+    Devuelve {deuda_id: "aprobado" | "rechazado" | "no_encontrada" | "estado_invalido"}.
+    """
+    resultados = {}
+    if not decisiones:
+        return resultados
+
+    filas = db.query(Deuda.id, Deuda.estado, Deuda.vendedora_id, Deuda.monto) \
+        .filter(Deuda.id.in_(list(decisiones))).all()
+    encontradas = {f.id: f for f in filas}
+
+    validas = {}
+    for deuda_id, decision in decisiones.items():
+        fila = encontradas.get(deuda_id)
+        if fila is None:
+            resultados[deuda_id] = "no_encontrada"
+        elif fila.estado != "pendiente_verificacion":
+            resultados[deuda_id] = "estado_invalido"
+        else:
+            validas[deuda_id] = decision
+
+    if validas:
+        # Solo cuentan las que el UPDATE cambió de verdad: otra petición pudo
+        # resolverlas entre la lectura y este punto
+        cambiadas = set(db.execute(
+            update(Deuda)
+            .where(Deuda.id.in_(list(validas)), Deuda.estado == "pendiente_verificacion")
+            .values(estado=case({i: ESTADO_DECISION[d] for i, d in validas.items()}, value=Deuda.id))
+            .returning(Deuda.id)
+            .execution_options(synchronize_session=False)
+        ).scalars())
+        for deuda_id in validas.keys() - cambiadas:
+            resultados[deuda_id] = "estado_invalido"
+        validas = {i: d for i, d in validas.items() if i in cambiadas}
+
+    if validas:
+        notificar_en_lote(db, [
+            (encontradas[i].vendedora_id, _mensaje_decision(d, i, encontradas[i].monto))
+            for i, d in validas.items()
+        ])
+        for deuda_id, decision in validas.items():
+            resultados[deuda_id] = "aprobado" if decision == "aprobar" else "rechazado"
+            vendedora_id = encontradas[deuda_id].vendedora_id
+            publicar(db, "deuda_cambiada", vendedora_id, deuda_id=deuda_id, estado=ESTADO_DECISION[decision])
+            if decision == "aprobar":
+                publicar(db, "pago_aprobado", vendedora_id, deuda_id=deuda_id, monto=encontradas[deuda_id].monto)
+    db.commit()
+    return resultados
+
+def _resolver_una(db: Session, deuda_id: int, decision: str):
+    resultado = resolver_verificaciones(db, {deuda_id: decision})[deuda_id]
+    if resultado == "no_encontrada":
+        raise HTTPException(status_code=404, detail="Deuda no encontrada")
+    if resultado == "estado_invalido":
+        raise HTTPException(status_code=400, detail="La deuda no está en estado pendiente de verificación")
+
 @router.post("/aprobar-pago/{deuda_id}")
 def aprobar_pago(deuda_id: int, db: Session = Depends(get_db)):
     """
     Endpoint para que un admin apruebe un pago y cambie
     el estado de la deuda a 'pagado'.
     """
-    deuda = db.query(Deuda).filter(Deuda.id == deuda_id).first()
-    if not deuda:
-        raise HTTPException(status_code=404, detail="Deuda no encontrada")
-    
-    if deuda.estado != "pendiente_verificacion":
-        raise HTTPException(status_code=400, detail="La deuda no está en estado pendiente de verificación")
+    _resolver_una(db, deuda_id, "aprobar")
+    return {"message": f"Deuda {deuda_id} aprobada correctamente", "deuda_id": deuda_id}
 
-    # Cambiar estado a pagado
-    deuda.estado = "pagado"
-    db.commit()
-    db.refresh(deuda)
-    
-    mensaje = f"Tu pago de ${deuda.monto:.2f} (deuda #{deuda.id}) ha sido aprobado ✅"
-    n = Notificacion(vendedora_id=deuda.vendedora_id, mensaje=mensaje)
-    db.add(n)
-    db.commit()
+@router.post("/verificar-pagos")
+def verificar_pagos(data: DecisionesPagoRequest, db: Session = Depends(get_db)):
+    """
+    Aprueba o rechaza varias deudas en verificación de una vez.
+    Si un id aparece con decisiones distintas no se aplica ninguna ("conflicto").
+    """
+    decisiones, conflictos = {}, set()
+    for d in data.decisiones:
+        if decisiones.get(d.deuda_id, d.decision) != d.decision:
+            conflictos.add(d.deuda_id)
+        decisiones[d.deuda_id] = d.decision
+    for deuda_id in conflictos:
+        del decisiones[deuda_id]
+
+    resultados = resolver_verificaciones(db, decisiones)
+    resultados.update({deuda_id: "conflicto" for deuda_id in conflictos})
 
-    return {"message": f"Deuda {deuda_id} aprobada correctamente", "deuda_id": deuda.id}
+    resumen = {}
+    for r in resultados.values():
+        resumen[r] = resumen.get(r, 0) + 1
+    return {
+        "resultados": [
+            {"deuda_id": i, "resultado": resultados[i]}
+            for i in dict.fromkeys(d.deuda_id for d in data.decisiones)  # orden recibido
+        ],
+        "resumen": resumen
+    }
 
 from schemas import DeudaExcesoCreate
 
@@ -173,6 +332,8 @@ def crear_exceso(
         estado="pendiente"
     )
     db.add(nueva_deuda)
+    db.flush()
+    registrar_movimiento(db, data.usuario_id, data.monto, "cargo", nueva_deuda.referencia, deuda_id=nueva_deuda.id)
     db.commit()
     db.refresh(nueva_deuda)
 
@@ -190,21 +351,5 @@ def crear_exceso(
 
 @router.post("/rechazar-pago/{deuda_id}")
 def rechazar_pago(deuda_id: int, db: Session = Depends(get_db)):
-    deuda = db.query(Deuda).filter(Deuda.id == deuda_id).first()
-    if not deuda:
-        raise HTTPException(status_code=404, detail="Deuda no encontrada")
-    
-    if deuda.estado != "pendiente_verificacion":
-        raise HTTPException(status_code=400, detail="La deuda no está en estado pendiente de verificación")
-    
-    # Cambiar estado a rechazado
-    deuda.estado = "rechazado"
-    db.commit()
-    db.refresh(deuda)
-    
-    mensaje = f"Tu pago de ${deuda.monto:.2f} (deuda #{deuda.id}) fue rechazado. Por favor revisa el comprobante o contacta soporte."
-    n = Notificacion(vendedora_id=deuda.vendedora_id, mensaje=mensaje)
-    db.add(n)
-    db.commit()
-    
-    return {"message": f"Deuda {deuda_id} rechazada correctamente", "deuda_id": deuda.id}
+    _resolver_una(db, deuda_id, "rechazar")
+    return {"message": f"Deuda {deuda_id} rechazada correctamente", "deuda_id": deuda_id}
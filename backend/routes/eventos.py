@@ -0,0 +1,213 @@
+# routes/eventos.py
+"""
+Eventos en vivo: reemplazan el polling de los paneles.
+
+Publicación
+    publicar(db, "impresion_creada", vendedora_id=5, copias=10)
+    El evento queda en la sesión y se entrega recién cuando la transacción
+    hace commit (si hay rollback se descarta), igual que las versiones de
+    routes/cache_http.py. Tipos: impresion_creada, deuda_cambiada,
+    pago_registrado, pago_aprobado y notificacion_creada.
+
+Suscripción
+    GET /eventos/stream?vendedora_id=5&tipos=deuda_cambiada,notificacion_creada   (SSE)
+    WS  /eventos/ws?vendedora_id=5&tipos=...                                       (WebSocket)
+    Sin vendedora_id llegan los eventos de todas (panel de admin).
+    Al conectar (y al reconectar) se envía "conectado": es el momento de
+    pedir las listas completas; después basta con los eventos.
+
+Cada cliente tiene un buffer acotado. Los eventos del mismo tipo y
+vendedora que todavía no se enviaron se fusionan en uno (con `cantidad`);
+si aun así el buffer se llena, se vacía y el cliente recibe "resync"
+para volver a pedir las listas.
+"""
+import asyncio
+import itertools
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from sqlalchemy import event
+
+from database import SessionLocal
+
+router = APIRouter()
+
+TIPOS = ("impresion_creada", "deuda_cambiada", "pago_registrado", "pago_aprobado", "notificacion_creada")
+BUFFER_MAXIMO = int(os.environ.get("EVENTOS_BUFFER", "100"))  # eventos pendientes por cliente
+PING = 20  # segundos sin eventos antes de mandar un latido
+
+_secuencia = itertools.count(1)
+_suscripciones = set()
+_suscripciones_lock = threading.Lock()
+
+
+# ── Publicación (en la transacción de quien llama) ───────────
+def publicar(db, tipo: str, vendedora_id: Optional[int] = None, **datos):
+    """Deja el evento pendiente en la sesión; sale con el próximo commit."""
+    db.info.setdefault("eventos_pendientes", []).append((tipo, vendedora_id, datos))
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _entregar_pendientes(session):
+    pendientes = session.info.pop("eventos_pendientes", None)
+    if pendientes:
+        fecha = datetime.utcnow().isoformat(timespec="seconds")
+        entregar([
+            {"id": next(_secuencia), "tipo": tipo, "vendedora_id": vendedora_id,
+             "fecha": fecha, "cantidad": 1, "datos": datos}
+            for tipo, vendedora_id, datos in pendientes
+        ])
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _descartar_pendientes(session):
+    session.info.pop("eventos_pendientes", None)
+
+
+def entregar(eventos: list):
+    """Reparte los eventos a los suscriptores. Se puede llamar desde cualquier hilo."""
+    with _suscripciones_lock:
+        suscripciones = list(_suscripciones)
+    for suscripcion in suscripciones:
+        elegidos = [e for e in eventos if suscripcion.acepta(e)]
+        if elegidos:
+            try:
+                suscripcion.loop.call_soon_threadsafe(suscripcion.encolar, elegidos)
+            except RuntimeError:
+                pass  # loop cerrado: el cliente ya se fue
+
+
+# ── Suscripciones ────────────────────────────────────────────
+class Suscripcion:
+    """Buffer de un cliente. encolar() y siguientes() corren en su event loop."""
+
+    def __init__(self, vendedora_id: Optional[int], tipos):
+        self.loop = asyncio.get_running_loop()
+        self.vendedora_id = vendedora_id
+        self.tipos = set(tipos)
+        self.pendientes = OrderedDict()  # (tipo, vendedora_id) -> evento
+        self.desbordada = False
+        self.cerrada = False
+        self.aviso = asyncio.Event()
+
+    def acepta(self, evento: dict) -> bool:
+        if evento["tipo"] not in self.tipos:
+            return False
+        return self.vendedora_id is None or evento["vendedora_id"] == self.vendedora_id
+
+    def encolar(self, eventos: list):
+        for evento in eventos:
+            clave = (evento["tipo"], evento["vendedora_id"])
+            anterior = self.pendientes.pop(clave, None)
+            if anterior is not None:
+                evento = {**evento, "cantidad": anterior["cantidad"] + evento["cantidad"]}
+            self.pendientes[clave] = evento
+        if len(self.pendientes) > BUFFER_MAXIMO:
+            self.pendientes.clear()
+            self.desbordada = True
+        self.aviso.set()
+
+    def cerrar(self):
+        self.cerrada = True
+        self.aviso.set()
+
+    async def siguientes(self, espera: float) -> list:
+        """Eventos acumulados; [] si pasó `espera` sin novedades o la suscripción se cerró."""
+        try:
+            await asyncio.wait_for(self.aviso.wait(), espera)
+        except asyncio.TimeoutError:
+            return []
+        self.aviso.clear()
+        if self.desbordada:
+            self.desbordada = False
+            return [{"id": next(_secuencia), "tipo": "resync", "vendedora_id": self.vendedora_id}]
+        eventos = list(self.pendientes.values())
+        self.pendientes.clear()
+        return eventos
+
+
+def _suscribir(vendedora_id: Optional[int], tipos: Optional[str]) -> Suscripcion:
+    elegidos = [t for t in (tipos or "").split(",") if t in TIPOS] or TIPOS
+    suscripcion = Suscripcion(vendedora_id, elegidos)
+    with _suscripciones_lock:
+        _suscripciones.add(suscripcion)
+    return suscripcion
+
+
+def _desuscribir(suscripcion: Suscripcion):
+    with _suscripciones_lock:
+        _suscripciones.discard(suscripcion)
+
+
+def cerrar_todas():
+    """Cierra los streams abiertos (al apagar la API)."""
+    with _suscripciones_lock:
+        suscripciones = list(_suscripciones)
+    for suscripcion in suscripciones:
+        try:
+            suscripcion.loop.call_soon_threadsafe(suscripcion.cerrar)
+        except RuntimeError:
+            pass
+
+
+def _conectado(suscripcion: Suscripcion) -> dict:
+    return {"id": next(_secuencia), "tipo": "conectado", "vendedora_id": suscripcion.vendedora_id,
+            "tipos": sorted(suscripcion.tipos)}
+
+
+# ── Endpoints ────────────────────────────────────────────────
+DESCRIPCION_TIPOS = f"Separados por coma; por defecto todos ({', '.join(TIPOS)})"
+
+
+def _sse(evento: dict) -> str:
+    return f"id: {evento['id']}\nevent: {evento['tipo']}\ndata: {json.dumps(evento, ensure_ascii=False)}\n\n"
+
+
+@router.get("/stream")
+async def stream_eventos(
+    request: Request,
+    vendedora_id: Optional[int] = None,
+    tipos: Optional[str] = Query(None, description=DESCRIPCION_TIPOS),
+):
+    suscripcion = _suscribir(vendedora_id, tipos)
+
+    async def generar():
+        try:
+            yield "retry: 5000\n\n" + _sse(_conectado(suscripcion))
+            while not suscripcion.cerrada:
+                eventos = await suscripcion.siguientes(PING)
+                if await request.is_disconnected():
+                    break
+                yield "".join(_sse(e) for e in eventos) if eventos else ": ping\n\n"
+        finally:
+            _desuscribir(suscripcion)
+
+    return StreamingResponse(generar(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"})
+
+
+@router.websocket("/ws")
+async def ws_eventos(
+    websocket: WebSocket,
+    vendedora_id: Optional[int] = None,
+    tipos: Optional[str] = None,
+):
+    await websocket.accept()
+    suscripcion = _suscribir(vendedora_id, tipos)
+    try:
+        await websocket.send_json([_conectado(suscripcion)])
+        while not suscripcion.cerrada:
+            eventos = await suscripcion.siguientes(PING)
+            await websocket.send_json(eventos)  # [] hace de latido
+    except (WebSocketDisconnect, RuntimeError):
+        pass
+    finally:
+        _desuscribir(suscripcion)
+        if suscripcion.cerrada:
+            await websocket.close()
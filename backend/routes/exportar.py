@@ -0,0 +1,160 @@
+# routes/exportar.py
+"""
+Exportación del historial completo para contabilidad.
+
+GET /export/{tabla}?formato=csv|ndjson&desde=YYYY-MM-DD&hasta=YYYY-MM-DD
+    tabla: impresiones, pagos o deudas
+
+Las filas se leen con un cursor (yield_per) y se envían en bloques a medida
+que salen de la base: la memoria no crece con el tamaño del historial y el
+primer byte (la cabecera del CSV) sale antes de terminar la consulta.
+"""
+import csv
+import io
+import json
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Literal, Optional
+
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+
+from database import SessionLocal
+from models import Impresion, Pago, Deuda, Vendedora, Catalogo
+
+router = APIRouter()
+
+FILAS_POR_LOTE = 1000  # filas por ida a la base y por bloque enviado
+
+# tabla -> (modelo, columnas exportadas, joins extra)
+TABLAS = {
+    "impresiones": (
+        Impresion,
+        [
+            Impresion.id, Impresion.fecha, Impresion.usuario_id.label("vendedora_id"),
+            Vendedora.nombre.label("vendedora"), Impresion.catalogo_id,
+            Catalogo.nombre.label("catalogo"), Impresion.cantidad_impresa,
+            Impresion.exceso, Impresion.costo_extra, Impresion.creado_en,
+        ],
+        [(Vendedora, Vendedora.id == Impresion.usuario_id), (Catalogo, Catalogo.id == Impresion.catalogo_id)],
+    ),
+    "pagos": (
+        Pago,
+        [
+            Pago.id, Pago.fecha, Pago.vendedora_id, Vendedora.nombre.label("vendedora"),
+            Pago.monto, Pago.metodo, Pago.referencia, Pago.estado, Pago.capture_url,
+        ],
+        [(Vendedora, Vendedora.id == Pago.vendedora_id)],
+    ),
+    "deudas": (
+        Deuda,
+        [
+            Deuda.id, Deuda.fecha, Deuda.vendedora_id, Vendedora.nombre.label("vendedora"),
+            Deuda.tipo, Deuda.monto, Deuda.cantidad_excedida, Deuda.estado, Deuda.metodo,
+            Deuda.referencia, Deuda.volante_id, Deuda.impresion_id,
+        ],
+        [(Vendedora, Vendedora.id == Deuda.vendedora_id)],
+    ),
+}
+
+
+def _consulta(tabla: str, desde: Optional[date], hasta: Optional[date], vendedora_id: Optional[int]):
+    modelo, columnas, joins = TABLAS[tabla]
+    query = select(*columnas).select_from(modelo)
+    for destino, condicion in joins:
+        query = query.outerjoin(destino, condicion)
+
+    # impresiones.fecha es Date; en pagos y deudas es DateTime: rango semiabierto
+    if tabla == "impresiones":
+        if desde:
+            query = query.where(modelo.fecha >= desde)
+        if hasta:
+            query = query.where(modelo.fecha <= hasta)
+    else:
+        if desde:
+            query = query.where(modelo.fecha >= datetime.combine(desde, time.min))
+        if hasta:
+            query = query.where(modelo.fecha < datetime.combine(hasta + timedelta(days=1), time.min))
+    if vendedora_id is not None:
+        query = query.where(columnas[2] == vendedora_id)
+    return query.order_by(modelo.id)
+
+
+def _valor_json(valor):
+    if isinstance(valor, (date, datetime)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return float(valor)
+    return valor
+
+
+def _filas(query):
+    """Lotes de filas leídos con cursor. La sesión es propia: vive lo que dura la respuesta."""
+    db = SessionLocal()
+    try:
+        resultado = db.execute(query.execution_options(yield_per=FILAS_POR_LOTE))
+        yield resultado.keys()
+        for lote in resultado.partitions():
+            yield lote
+    finally:
+        db.close()
+
+
+def _csv(query):
+    buffer = io.StringIO()
+    escritor = csv.writer(buffer)
+    lotes = _filas(query)
+    try:
+        escritor.writerow(next(lotes))
+        yield buffer.getvalue()
+        for lote in lotes:
+            buffer.seek(0)
+            buffer.truncate()
+            escritor.writerows(lote)
+            yield buffer.getvalue()
+    finally:
+        lotes.close()  # si el cliente corta la descarga se libera la sesión
+
+
+def _ndjson(query):
+    lotes = _filas(query)
+    try:
+        nombres = list(next(lotes))
+        for lote in lotes:
+            yield "".join(
+                json.dumps({n: _valor_json(v) for n, v in zip(nombres, fila)}, ensure_ascii=False) + "\n"
+                for fila in lote
+            )
+    finally:
+        lotes.close()
+
+
+@router.get("/{tabla}")
+def exportar(
+    tabla: str,
+    formato: Literal["csv", "ndjson"] = "csv",
+    desde: Optional[date] = Query(None, description="Inclusive; sin límite si se omite"),
+    hasta: Optional[date] = Query(None, description="Inclusive; sin límite si se omite"),
+    vendedora_id: Optional[int] = None,
+):
+    if tabla not in TABLAS:
+        raise HTTPException(status_code=404, detail=f"Tabla no exportable (usa: {', '.join(TABLAS)})")
+    if desde and hasta and desde > hasta:
+        raise HTTPException(status_code=400, detail="`desde` no puede ser posterior a `hasta`")
+
+    query = _consulta(tabla, desde, hasta, vendedora_id)
+    nombre = "_".join([tabla] + [d.isoformat() for d in (desde, hasta) if d])
+    if formato == "csv":
+        contenido, tipo = _csv(query), "text/csv; charset=utf-8"
+    else:
+        contenido, tipo = _ndjson(query), "application/x-ndjson"
+
+    return StreamingResponse(
+        contenido,
+        media_type=tipo,
+        headers={
+            "Content-Disposition": f'attachment; filename="{nombre}.{formato}"',
+            "Cache-Control": "no-store",
+        },
+    )
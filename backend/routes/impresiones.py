@@ -1,236 +1,172 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
 from sqlalchemy.orm import Session
-from sqlalchemy import func
-from datetime import date, timedelta
+from sqlalchemy import func, and_, type_coerce, String
+from datetime import date, datetime, time, timedelta
+from typing import Optional
 from database import get_db
-from models import Impresion, Vendedora, Deuda, Catalogo
-from routes.config_helper import get_limits
-from schemas import ImpresionCreate, ImpresionResponse
-import win32print
-import win32ui
-import win32con
-from PIL import Image
-import threading
+from models import Impresion, Vendedora, Catalogo, Cambio
+from schemas import ImpresionCreate, ImpresionResponse, ImpresionLoteCreate, ImpresionLoteResponse
 import traceback
-import os
-from .print_utils import print_file 
+from .contabilidad import registrar_impresiones, LineaImpresion
+from .cambios import cursor_actual, cambiados, DESCRIPCION_SINCE
 
 router = APIRouter()
 
 
-# ── Función para crear o actualizar deuda
-
-UPLOAD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "uploads", "catalogos", "pdf")
-
-# ── Worker de impresión ──────────────────────────────────────
-def _print_worker(file_path: str, cantidad: int = 1):
-    from .print_utils import print_file
-    for _ in range(cantidad):
-        print_file(file_path)
-    
-# ── Crear o actualizar deuda ──────────────────────────────────
-def crear_o_actualizar_deuda(usuario_id: int, monto_extra: float, fecha: date, tipo: str,
-                              db: Session, catalogo_id: int = None, impresion_id: int = None,
-                              cantidad_excedida: int = 0):
-    if monto_extra <= 0:
-        return None
-
-    if tipo == "diaria":
-        deuda = db.query(Deuda).filter(
-            Deuda.vendedora_id == usuario_id,
-            func.date(Deuda.fecha) == fecha,
-            Deuda.tipo == "diaria",
-            Deuda.estado == "pendiente"
-        ).first()
-    else:  # semanal
-        inicio_semana = fecha - timedelta(days=fecha.weekday())
-        deuda = db.query(Deuda).filter(
-            Deuda.vendedora_id == usuario_id, 
-            Deuda.fecha >= inicio_semana,
-            Deuda.tipo == "semanal",
-            Deuda.estado == "pendiente"
-        ).first()
-
-    if deuda:
-        deuda.monto = monto_extra
-        deuda.cantidad_excedida = cantidad_excedida
-        deuda.impresion_id = impresion_id
-        deuda.catalogo_id = catalogo_id
-        deuda.referencia = f"{cantidad_excedida} excedió el límite"
-        deuda.fecha = fecha
-    else:
-        deuda = Deuda(
-            vendedora_id=usuario_id,
-            catalogo_id=catalogo_id,
-            impresion_id=impresion_id,
-            monto=monto_extra,
-            cantidad_excedida=cantidad_excedida,
-            referencia=f"{cantidad_excedida} excedió el límite",
-            estado="pendiente",
-            fecha=fecha,
-            tipo=tipo
-        )
-        db.add(deuda)
-
-    db.commit()
-    db.refresh(deuda)
-    return deuda
-
 # ── Endpoint crear impresión ─────────────────────────────────
 @router.post("/", response_model=ImpresionResponse)
 def crear_impresion(impresion: ImpresionCreate, db: Session = Depends(get_db)):
     print("Columnas reconocidas por SQLAlchemy:", Impresion.__table__.columns.keys())
 
-    try:
-        # Validaciones iniciales
-        usuario_existente = db.query(Impresion).filter(Impresion.usuario_id == impresion.usuario_id).first()
-        if not usuario_existente:
-            print(f"⚠️ Usuario ID {impresion.usuario_id} no tiene impresiones previas, revisa existencia")
-        catalogo = db.query(Catalogo).filter(Catalogo.id == impresion.catalogo_id).first()
-        if not catalogo:
-            raise HTTPException(status_code=404, detail=f"Catálogo ID {impresion.catalogo_id} no encontrado")
-
-        hoy = impresion.fecha
-        inicio_semana = hoy - timedelta(days=hoy.weekday())
+    # Validaciones iniciales
+    usuario_existente = db.query(Impresion).filter(Impresion.usuario_id == impresion.usuario_id).first()
+    if not usuario_existente:
+        print(f"⚠️ Usuario ID {impresion.usuario_id} no tiene impresiones previas, revisa existencia")
+    catalogo = db.query(Catalogo).filter(Catalogo.id == impresion.catalogo_id).first()
+    if not catalogo:
+        raise HTTPException(status_code=404, detail=f"Catálogo ID {impresion.catalogo_id} no encontrado")
 
-        # Totales actuales
-        total_hoy = db.query(func.sum(Impresion.cantidad_impresa)).filter(
-            Impresion.usuario_id == impresion.usuario_id,
-            Impresion.fecha == hoy
-        ).scalar() or 0
-
-        total_semana = db.query(func.sum(Impresion.cantidad_impresa)).filter(
-            Impresion.usuario_id == impresion.usuario_id,
-            Impresion.fecha >= inicio_semana
-        ).scalar() or 0
-
-        nuevo_total_hoy = total_hoy + impresion.cantidad_impresa
-        nuevo_total_semana = total_semana + impresion.cantidad_impresa
-
-        # Límites
-        limites = get_limits(db)
-        LIMITE_DIARIO = limites.get("diario", 30)
-        LIMITE_SEMANAL = limites.get("semanal", 150)
-        COSTO_EXTRA = limites.get("costoExcedente", 0.5)
-
-        exceso_diario = max(nuevo_total_hoy - LIMITE_DIARIO, 0)
-        exceso_semanal = max(nuevo_total_semana - LIMITE_SEMANAL, 0)
-        exceso_total = max(exceso_diario, exceso_semanal)
-        costo_extra = exceso_total * COSTO_EXTRA if exceso_total > 0 else 0
-
-        # Crear impresión
-        nueva_impresion = Impresion(
-            usuario_id=impresion.usuario_id,
-            catalogo_id=impresion.catalogo_id,
-            fecha=hoy,
-            cantidad_impresa=impresion.cantidad_impresa,
-            exceso=exceso_total,
-            costo_extra=costo_extra
+    try:
+        # Impresión, consumo, deudas, saldo, notificación y cola: un solo commit
+        impresiones, deudas, _ = registrar_impresiones(
+            db, impresion.fecha,
+            [LineaImpresion(impresion.usuario_id, catalogo, impresion.cantidad_impresa)]
         )
-
-        db.add(nueva_impresion)
-        db.commit()
-        db.refresh(nueva_impresion)
-        print(f"✅ Impresión registrada: ID {nueva_impresion.id}, usuario {impresion.usuario_id}")
-
-        # ── Imprimir archivo en segundo plano ──────────────────────
-        file_name = catalogo.archivo or os.path.basename(catalogo.url or "")
-        file_path = os.path.join(UPLOAD_DIR, file_name)
-
-        print(f"Intentando imprimir: {file_path}") 
-
-        if os.path.exists(file_path):
-            threading.Thread(target=_print_worker, args=(file_path,impresion.cantidad_impresa), daemon=True).start()
-        else:
-            print(f"⚠️ Archivo de catálogo no encontrado: {file_path}")
-
-        # ── Crear deudas si hay exceso ────────────────────────────
-        from .impresiones_utils import crear_o_actualizar_deuda
-        if exceso_diario > 0:
-            deuda_diaria = crear_o_actualizar_deuda(
-                usuario_id=impresion.usuario_id,
-                monto_extra=exceso_diario * COSTO_EXTRA,
-                fecha=hoy,
-                tipo="diaria",
-                db=db,
-                catalogo_id=impresion.catalogo_id,
-                impresion_id=nueva_impresion.id,
-                cantidad_excedida=exceso_diario
-            )
-            print(f"⚠️ Deuda diaria creada/actualizada: {deuda_diaria.id if deuda_diaria else 'N/A'}")
-        if exceso_semanal > 0:
-            deuda_semanal = crear_o_actualizar_deuda(
-                usuario_id=impresion.usuario_id,
-                monto_extra=exceso_semanal * COSTO_EXTRA,
-                fecha=hoy,
-                tipo="semanal",
-                db=db,
-                catalogo_id=impresion.catalogo_id,
-                impresion_id=nueva_impresion.id,
-                cantidad_excedida=exceso_semanal
-            )
-            print(f"⚠️ Deuda semanal creada/actualizada: {deuda_semanal.id if deuda_semanal else 'N/A'}")
-
-        return nueva_impresion
-
     except Exception as e:
         print("❌ Error en crear_impresion:")
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
-@router.get("/impresiones/")
-def obtener_todas_impresiones(db: Session = Depends(get_db)):
-    vendedoras = db.query(Vendedora).all()
-    resultado = []
 
-    for v in vendedoras:
-        hoy = date.today()
-        inicio_semana = hoy - timedelta(days=hoy.weekday())
+    nueva = impresiones[0]
+    print(f"✅ Impresión registrada: ID {nueva['id']}, usuario {impresion.usuario_id}")
+    for d in deudas:
+        if d["exceso_diario"] or d["exceso_semanal"]:
+            print(f"⚠️ Deuda por exceso: {d['exceso_diario']} diario, {d['exceso_semanal']} semanal")
+    return nueva
+
+# ── Endpoint registrar impresiones en lote ───────────────────
+@router.post("/batch", response_model=ImpresionLoteResponse)
+def crear_impresiones_lote(lote: ImpresionLoteCreate, db: Session = Depends(get_db)):
+    """
+    Registra varias líneas (catalogo_id, cantidad) de uno o más usuarios en una
+    sola transacción. Los límites y totales se cargan una vez por usuario y el
+    exceso se reparte entre las líneas en el orden recibido.
+    """
+    if not lote.lineas:
+        raise HTTPException(status_code=400, detail="El lote no tiene líneas")
+
+    ids_catalogos = {l.catalogo_id for l in lote.lineas}
+    catalogos = {c.id: c for c in db.query(Catalogo).filter(Catalogo.id.in_(ids_catalogos)).all()}
+    faltantes = sorted(ids_catalogos - catalogos.keys())
+    if faltantes:
+        raise HTTPException(status_code=404, detail=f"Catálogos no encontrados: {faltantes}")
 
-        impresiones_hoy = (
-            db.query(Impresion)
-            .filter(
-                Impresion.usuario_id == v.id,
-                func.date(Impresion.creado_en) == hoy
-            )
-            .order_by(Impresion.creado_en.desc())
-            .all()
+    try:
+        lineas, deudas, deuda_total = registrar_impresiones(
+            db, lote.fecha,
+            [LineaImpresion(l.usuario_id, catalogos[l.catalogo_id], l.cantidad_impresa) for l in lote.lineas]
         )
+    except Exception as e:
+        print("❌ Error en crear_impresiones_lote:")
+        traceback.print_exc()
+        raise HTTPException(status_code=500, detail=f"Error interno: {str(e)}")
 
-        impresiones_semana = (
-            db.query(Impresion)
-            .filter(
-                Impresion.usuario_id == v.id,
-                func.date(Impresion.creado_en) >= inicio_semana
-            )
-            .order_by(Impresion.creado_en.desc())
-            .all()
-        )
+    print(f"✅ Lote registrado: {len(lineas)} impresiones, {len(deudas)} usuarios")
+    return {"lineas": lineas, "deudas": deudas, "deuda_total": deuda_total}
 
-        # IDs de catálogos
-        ids_catalogos = set([imp.catalogo_id for imp in impresiones_hoy] +
-                            [imp.catalogo_id for imp in impresiones_semana])
-        catalogos = db.query(Catalogo).filter(Catalogo.id.in_(ids_catalogos)).all()
-        catalogos_info = {cat.id: {"id": cat.id, "nombre": cat.nombre, "archivo": cat.archivo} for cat in catalogos}
+@router.get("/impresiones/")
+def obtener_todas_impresiones(
+    response: Response,
+    desde: Optional[date] = None,
+    hasta: Optional[date] = None,
+    vendedora_id: Optional[int] = None,
+    catalogo_id: Optional[int] = None,
+    cursor: Optional[int] = Query(None, description="Último usuario.id de la página anterior"),
+    limite: Optional[int] = Query(None, ge=1, le=500, description="Vendedoras por página (sin límite por defecto)"),
+    since: Optional[int] = Query(None, ge=0, description=DESCRIPCION_SINCE),
+    db: Session = Depends(get_db)
+):
+    """
+    Impresiones por vendedora en una sola consulta.
+    - Rango por defecto: desde el lunes de la semana de `hasta` (hoy) hasta `hasta`.
+    - conteosDiarios: impresiones del día `hasta`; conteosSemanales: todo el rango.
+    - Paginación opcional por vendedora (keyset, con `limite`): el siguiente cursor va
+      en la cabecera X-Next-Cursor. Sin `limite` vienen todas.
+    - since: solo las vendedoras con impresiones nuevas o modificadas, sin paginar.
+    """
+    ultimo = cursor_actual(db, since)
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(days=hasta.weekday())
+
+    # Rango sobre la columna (sin func.date) para poder usar el índice. Los
+    # límites van como texto 'AAAA-MM-DD': creado_en se guarda como texto
+    # ('2026-10-14 00:00:00' de CURRENT_TIMESTAMP) y un datetime se enlazaría
+    # con microsegundos ('2026-10-14 00:00:00.000000'), que deja afuera la medianoche.
+    creado_en = type_coerce(Impresion.creado_en, String)
+    inicio_rango = desde.isoformat()
+    fin_rango = (hasta + timedelta(days=1)).isoformat()
+    inicio_dia = datetime.combine(hasta, time.min)
+
+    pagina = db.query(Vendedora.id, Vendedora.nombre)
+    if cursor is not None:
+        pagina = pagina.filter(Vendedora.id > cursor)
+    if vendedora_id is not None:
+        pagina = pagina.filter(Vendedora.id == vendedora_id)
+    if since is not None:
+        vendedoras = cambiados(db, "impresiones", since, ultimo, vendedora_id, columna=Cambio.vendedora_id)
+        pagina = pagina.filter(Vendedora.id.in_(vendedoras)).order_by(Vendedora.id)
+    else:
+        pagina = pagina.order_by(Vendedora.id)
+        if limite:
+            pagina = pagina.limit(limite)
+    pagina = pagina.subquery()
+
+    condicion = and_(
+        Impresion.usuario_id == pagina.c.id,
+        creado_en >= inicio_rango,
+        creado_en < fin_rango
+    )
+    if catalogo_id is not None:
+        condicion = and_(condicion, Impresion.catalogo_id == catalogo_id)
+
+    filas = (
+        db.query(
+            pagina.c.id, pagina.c.nombre,
+            Impresion.catalogo_id, Impresion.cantidad_impresa, Impresion.creado_en,
+            Catalogo.id.label("cat_id"), Catalogo.nombre.label("cat_nombre"), Catalogo.archivo
+        )
+        .select_from(pagina)
+        .outerjoin(Impresion, condicion)
+        .outerjoin(Catalogo, Catalogo.id == Impresion.catalogo_id)
+        .order_by(pagina.c.id, Impresion.creado_en.desc())
+        .all()
+    )
 
-        resultado.append({
-            "usuario": {"id": v.id, "nombre": v.nombre},
-            "conteosDiarios": [
-                {
-                    "catalogo": catalogos_info.get(imp.catalogo_id, {"id": imp.catalogo_id, "nombre": "Desconocido"}),
-                    "total": imp.cantidad_impresa,
-                    "fecha_hora": imp.creado_en
-                }
-                for imp in impresiones_hoy
-            ],
-            "conteosSemanales": [
-                {
-                    "catalogo": catalogos_info.get(imp.catalogo_id, {"id": imp.catalogo_id, "nombre": "Desconocido"}),
-                    "total": imp.cantidad_impresa,
-                    "fecha_hora": imp.creado_en
-                }
-                for imp in impresiones_semana
-            ],
-        })
+    # Agrupar en Python con la misma forma de respuesta
+    resultado = []
+    actual = None
+    for f in filas:
+        if actual is None or actual["usuario"]["id"] != f.id:
+            actual = {"usuario": {"id": f.id, "nombre": f.nombre}, "conteosDiarios": [], "conteosSemanales": []}
+            resultado.append(actual)
+        if f.cantidad_impresa is None:  # vendedora sin impresiones en el rango
+            continue
+
+        if f.cat_id is not None:
+            catalogo = {"id": f.cat_id, "nombre": f.cat_nombre, "archivo": f.archivo}
+        else:
+            catalogo = {"id": f.catalogo_id, "nombre": "Desconocido"}
+        item = {"catalogo": catalogo, "total": f.cantidad_impresa, "fecha_hora": f.creado_en}
+
+        actual["conteosSemanales"].append(item)
+        if f.creado_en >= inicio_dia:
+            actual["conteosDiarios"].append(item)
+
+    if since is not None:
+        return {"since": ultimo, "cambios": resultado, "borrados": []}
+    if limite and len(resultado) == limite:
+        response.headers["X-Next-Cursor"] = str(resultado[-1]["usuario"]["id"])
+    response.headers["X-Since"] = str(ultimo)
 
     return resultado
 
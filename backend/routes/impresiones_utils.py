@@ -1,5 +0,0 @@
-def crear_o_actualizar_deuda(usuario_id, monto_extra, fecha, tipo, db, catalogo_id, impresion_id, cantidad_excedida):
-    # Aquí va tu lógica real
-    class Dummy:
-        id = 1
-    return Dummy()
\ No newline at end of file
@@ -0,0 +1,126 @@
+# routes/metricas.py
+"""
+Métricas del dashboard (tabla metricas), acumuladas al escribir.
+
+Cada evento suma en su mes ('YYYY-MM') y en su día ('YYYY-MM-DD'):
+    impresiones   impresiones registradas (órdenes)
+    copias        copias impresas
+    ingresos      monto de los pagos completados (por la fecha del pago)
+Y en el periodo 'actual':
+    vendedoras_<estado>   vendedoras por estado
+
+Las funciones no hacen commit: van en la transacción del registro que las
+mueve. reconstruir_metricas() las recalcula desde las tablas
+(rebuild_metricas.py o al crear la tabla).
+"""
+from collections import defaultdict
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from models import Metrica, Impresion, Pago, Vendedora
+
+ACTUAL = "actual"
+
+
+def periodo_mes(fecha) -> str:
+    return fecha.strftime("%Y-%m")
+
+
+def periodo_dia(fecha) -> str:
+    return fecha.strftime("%Y-%m-%d")
+
+
+# ── Escritura (sin commit) ───────────────────────────────────
+def _sumar(db: Session, periodo: str, clave: str, valor: float):
+    fila = insert(Metrica).values(periodo=periodo, clave=clave, valor=valor)
+    db.execute(fila.on_conflict_do_update(
+        index_elements=[Metrica.periodo, Metrica.clave],
+        set_={"valor": Metrica.valor + fila.excluded.valor}
+    ))
+
+
+def sumar_metrica(db: Session, clave: str, valor: float, fecha):
+    """Suma `valor` en el mes y el día de `fecha` (sin fecha no cuenta, igual que al reconstruir)."""
+    if not valor or fecha is None:
+        return
+    _sumar(db, periodo_mes(fecha), clave, valor)
+    _sumar(db, periodo_dia(fecha), clave, valor)
+
+
+def cambiar_estado_vendedora(db: Session, anterior, nuevo):
+    """Mueve el contador de vendedoras por estado (anterior=None al registrarse)."""
+    if anterior == nuevo:
+        return
+    if anterior:
+        _sumar(db, ACTUAL, f"vendedoras_{anterior}", -1)
+    if nuevo:
+        _sumar(db, ACTUAL, f"vendedoras_{nuevo}", 1)
+
+
+# ── Lectura ──────────────────────────────────────────────────
+def leer_periodos(db: Session, periodos) -> dict:
+    """{periodo: {clave: valor}} de los periodos pedidos, en una consulta."""
+    resultado = defaultdict(dict)
+    for periodo, clave, valor in db.query(Metrica.periodo, Metrica.clave, Metrica.valor).filter(
+        Metrica.periodo.in_(list(periodos))
+    ):
+        resultado[periodo][clave] = valor
+    return resultado
+
+
+def leer_meses(db: Session, desde: str, hasta: str, claves) -> dict:
+    """{clave: {'YYYY-MM': valor}} entre dos meses (inclusive), en una consulta. Solo buckets mensuales."""
+    resultado = {clave: {} for clave in claves}
+    filas = db.query(Metrica.periodo, Metrica.clave, Metrica.valor).filter(
+        Metrica.periodo.between(desde, hasta),
+        Metrica.clave.in_(list(claves)),
+        func.length(Metrica.periodo) == 7,
+    )
+    for periodo, clave, valor in filas:
+        resultado[clave][periodo] = valor
+    return resultado
+
+
+# ── Reconstrucción desde las tablas ──────────────────────────
+def _agregados(db: Session) -> dict:
+    valores = defaultdict(float)
+    for formato in ("%Y-%m", "%Y-%m-%d"):
+        periodo = func.strftime(formato, Impresion.fecha)
+        for p, ordenes, copias in db.query(
+            periodo, func.count(Impresion.id), func.sum(Impresion.cantidad_impresa)
+        ).filter(Impresion.fecha.isnot(None)).group_by(periodo):
+            valores[(p, "impresiones")] += ordenes or 0
+            valores[(p, "copias")] += copias or 0
+
+        periodo = func.strftime(formato, Pago.fecha)
+        for p, total in db.query(periodo, func.sum(Pago.monto)).filter(
+            Pago.estado == "completado", Pago.fecha.isnot(None)
+        ).group_by(periodo):
+            valores[(p, "ingresos")] += total or 0
+
+    for estado, total in db.query(Vendedora.estado, func.count(Vendedora.id)).group_by(Vendedora.estado):
+        if estado:
+            valores[(ACTUAL, f"vendedoras_{estado}")] += total
+    return {k: v for k, v in valores.items() if v}
+
+
+def reconstruir_metricas(db: Session) -> int:
+    """Borra y recalcula la tabla. Devuelve la cantidad de filas."""
+    valores = _agregados(db)
+    db.query(Metrica).delete()
+    db.add_all([Metrica(periodo=p, clave=c, valor=v) for (p, c), v in valores.items()])
+    db.commit()
+    return len(valores)
+
+
+def verificar_metricas(db: Session):
+    """[(periodo, clave, guardado, esperado)] donde la tabla no coincide con los datos."""
+    esperados = _agregados(db)
+    guardados = {(p, c): v for p, c, v in db.query(Metrica.periodo, Metrica.clave, Metrica.valor)}
+    return [
+        (p, c, guardados.get((p, c), 0), esperados.get((p, c), 0))
+        for p, c in sorted(set(esperados) | set(guardados))
+        if abs(guardados.get((p, c), 0) - esperados.get((p, c), 0)) > 0.005
+    ]
@@ -0,0 +1,212 @@
+# routes/miniaturas.py
+"""
+Miniaturas y vistas previas de comprobantes, catálogos y volantes.
+
+GET /miniaturas/{tamano}?src=<url del archivo>
+    tamano: 'mini' (listas) o 'vista' (modal de vista previa)
+    src:    la misma URL que ya usa el frontend, por ejemplo
+            /uploads/archivos/ab/cd/<sha256>.jpg, uploads/comprobantes/x.jpg
+            o /catalogos/files/x.jpg
+
+Cada derivado se genera una sola vez en un pool de procesos (Pillow no
+bloquea el event loop ni compite por el GIL) y se guarda en disco con nombre
+por contenido. La caché tiene un tope de tamaño: al pasarlo se borran los
+derivados usados hace más tiempo (LRU por mtime, que se renueva en cada uso).
+
+La respuesta lleva un ETag fuerte (sha256 del original + tamaño): con
+If-None-Match la respuesta es 304 sin leer ni enviar el derivado.
+
+Configuración por variables de entorno:
+    MINIATURAS_WORKERS   procesos del pool (por defecto 2)
+    MINIATURAS_MAX_MB    tope de la caché en disco (por defecto 200)
+"""
+import asyncio
+import os
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
+
+from .almacen import clave_de, ruta_archivo
+from .cache_http import coincide_etag, INMUTABLE
+from .print_renditions import hash_archivo, EXTENSIONES_IMAGEN
+
+router = APIRouter()
+
+CACHE_DIR = "uploads/miniaturas"
+CACHE_MAX = int(os.environ.get("MINIATURAS_MAX_MB", "200")) * 1024 * 1024
+WORKERS = int(os.environ.get("MINIATURAS_WORKERS", "2"))
+
+# tamano -> lado mayor en píxeles
+TAMANOS = {"mini": 256, "vista": 1024}
+CALIDAD = 80
+VERSION = 1  # subirla invalida todos los derivados (cambia el ETag)
+
+# Prefijo de URL -> directorio de los archivos viejos (fuera del almacén)
+DIRECTORIOS = (
+    ("uploads/comprobantes/", "uploads/comprobantes"),
+    ("catalogos/files/", "uploads/catalogos/pdf"),
+)
+
+
+# ── Generación (corre en el pool de procesos) ────────────────
+def generar_miniatura(origen: str, destino: str, lado: int) -> int:
+    """Escala `origen` para que su lado mayor sea `lado` y lo guarda como JPEG. Devuelve el tamaño."""
+    from PIL import Image, ImageOps
+
+    with Image.open(origen) as img:
+        img = ImageOps.exif_transpose(img)  # fotos de celular giradas
+        img.thumbnail((lado, lado), Image.LANCZOS)
+        if img.mode != "RGB":
+            fondo = Image.new("RGB", img.size, "white")
+            fondo.paste(img, mask=img.convert("RGBA").split()[-1])
+            img = fondo
+        os.makedirs(os.path.dirname(destino), exist_ok=True)
+        temporal = f"{destino}.{uuid.uuid4().hex}.part"
+        img.save(temporal, "JPEG", quality=CALIDAD, optimize=True, progressive=True)
+    os.replace(temporal, destino)
+    return os.path.getsize(destino)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_en_curso = {}  # destino -> asyncio.Future, para no generar dos veces lo mismo
+
+
+def _obtener_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=max(WORKERS, 1))
+        return _pool
+
+
+def detener():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+# ── Caché en disco con tope (LRU) ────────────────────────────
+_ocupado = None  # bytes en CACHE_DIR; None hasta el primer recorrido
+_ocupado_lock = threading.Lock()
+
+
+def _derivados():
+    for raiz, _, nombres in os.walk(CACHE_DIR):
+        for nombre in nombres:
+            if nombre.endswith(".jpg"):
+                yield os.path.join(raiz, nombre)
+
+
+def _sumar(bytes_nuevos: int, conservar: str):
+    """
+    Suma a la ocupación y, si pasa el tope, borra los menos usados hasta bajar
+    al 90%. `conservar` (el derivado recién generado) nunca se borra.
+    """
+    global _ocupado
+    with _ocupado_lock:
+        if _ocupado is None:
+            _ocupado = sum(os.path.getsize(r) for r in _derivados())
+        else:
+            _ocupado += bytes_nuevos
+        if _ocupado <= CACHE_MAX:
+            return
+
+        archivos = []
+        for ruta in _derivados():
+            try:
+                st = os.stat(ruta)
+            except FileNotFoundError:
+                continue
+            archivos.append((st.st_mtime, st.st_size, ruta))
+        archivos.sort()
+
+        _ocupado = sum(tam for _, tam, _ in archivos)
+        borrados = 0
+        for _, tam, ruta in archivos:
+            if _ocupado <= CACHE_MAX * 0.9:
+                break
+            if ruta == conservar:
+                continue
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            _ocupado -= tam
+            borrados += 1
+        if borrados:
+            print(f"🧹 Miniaturas: {borrados} derivados viejos borrados")
+
+
+def _tocar(ruta: str) -> bool:
+    """Marca el derivado como recién usado. False si ya no existe."""
+    try:
+        os.utime(ruta)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+# ── Resolución del archivo original ──────────────────────────
+def resolver_origen(src: str):
+    """(ruta en disco, digest) del archivo de `src`; 404 si no es un archivo conocido."""
+    clave = clave_de(src)
+    if clave:
+        # En el almacén el nombre ya es el sha256: no hace falta leer el archivo
+        return ruta_archivo(clave, ""), clave.rsplit("/", 1)[1].split(".")[0]
+
+    limpio = (src or "").replace("\\", "/").lstrip("/")
+    for prefijo, directorio in DIRECTORIOS:
+        if limpio.startswith(prefijo):
+            ruta = ruta_archivo(limpio, directorio)
+            if os.path.isfile(ruta):
+                return ruta, hash_archivo(ruta)
+    raise HTTPException(status_code=404, detail="Archivo no encontrado")
+
+
+# ── Endpoint ─────────────────────────────────────────────────
+@router.get("/{tamano}")
+async def obtener_miniatura(
+    request: Request,
+    tamano: str,
+    src: str = Query(..., description="URL del archivo tal como la devuelve la API"),
+):
+    if tamano not in TAMANOS:
+        raise HTTPException(status_code=404, detail=f"Tamaño no válido (usa: {', '.join(TAMANOS)})")
+    if os.path.splitext(src.lower())[1] not in EXTENSIONES_IMAGEN:
+        raise HTTPException(status_code=415, detail="Solo hay vista previa para imágenes")
+
+    origen, digest = await run_in_threadpool(resolver_origen, src)
+    etag = f'"{digest[:32]}-{tamano}-{VERSION}"'
+    # Los del almacén nunca cambian de contenido; los viejos se revalidan con el ETag
+    cache_control = INMUTABLE if clave_de(src) else "public, no-cache"
+    encabezados = {"ETag": etag, "Cache-Control": cache_control}
+
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=encabezados)
+
+    destino = os.path.join(CACHE_DIR, digest[:2], f"{digest}_{tamano}_v{VERSION}.jpg")
+    if not await run_in_threadpool(_tocar, destino):
+        if not os.path.isfile(origen):
+            raise HTTPException(status_code=404, detail="Archivo no encontrado")
+        futuro = _en_curso.get(destino)
+        propio = futuro is None
+        if propio:
+            loop = asyncio.get_running_loop()
+            futuro = loop.run_in_executor(_obtener_pool(), generar_miniatura, origen, destino, TAMANOS[tamano])
+            _en_curso[destino] = futuro
+            futuro.add_done_callback(lambda _: _en_curso.pop(destino, None))
+        try:
+            tamano_nuevo = await asyncio.shield(futuro)
+        except Exception as e:
+            raise HTTPException(status_code=422, detail=f"No se pudo generar la vista previa: {e}")
+        if propio:
+            await run_in_threadpool(_sumar, tamano_nuevo, destino)
+
+    return FileResponse(destino, media_type="image/jpeg", headers=encabezados)
@@ -1,14 +1,28 @@
 # routes/notificaciones.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import insert
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from database import get_db
 from models import Notificacion, Vendedora
 from pydantic import BaseModel
 from datetime import datetime
+from .eventos import publicar
+from .cambios import cursor_actual, cambiados, delta, DESCRIPCION_SINCE
 
 router = APIRouter()
 
+# ── Inserción en lote (sin commit: va en la transacción de quien llama) ──
+def notificar_en_lote(db: Session, avisos):
+    """Inserta [(vendedora_id, mensaje), ...] con un solo INSERT de varias filas."""
+    ahora = datetime.utcnow()
+    filas = [{"vendedora_id": v, "mensaje": m, "leido": False, "fecha": ahora} for v, m in avisos]
+    if filas:
+        db.execute(insert(Notificacion), filas)
+    for vendedora_id in dict.fromkeys(v for v, _ in avisos):
+        publicar(db, "notificacion_creada", vendedora_id)
+    return len(filas)
+
 class NotificacionCreate(BaseModel):
     vendedora_id: int
     mensaje: str
@@ -20,6 +34,7 @@ def crear_notificacion(payload: NotificacionCreate, db: Session = Depends(get_db
         raise HTTPException(status_code=404, detail="Vendedora no encontrada")
     n = Notificacion(vendedora_id=payload.vendedora_id, mensaje=payload.mensaje, fecha=datetime.utcnow())
     db.add(n)
+    publicar(db, "notificacion_creada", payload.vendedora_id)
     db.commit()
     db.refresh(n)
     return {"message": "Notificación creada", "notificacion": {
@@ -27,8 +42,18 @@ def crear_notificacion(payload: NotificacionCreate, db: Session = Depends(get_db
     }}
 
 @router.get("/{vendedora_id}", summary="Obtener notificaciones de la vendedora")
-def obtener_notificaciones(vendedora_id: int, db: Session = Depends(get_db)):
-    notifs = db.query(Notificacion).filter(Notificacion.vendedora_id == vendedora_id).order_by(Notificacion.fecha.desc()).all()
+def obtener_notificaciones(
+    vendedora_id: int,
+    response: Response,
+    since: Optional[int] = Query(None, ge=0, description=DESCRIPCION_SINCE),
+    db: Session = Depends(get_db)
+):
+    hasta = cursor_actual(db, since)
+    query = db.query(Notificacion).filter(Notificacion.vendedora_id == vendedora_id)
+    if since is not None:
+        ids = cambiados(db, "notificaciones", since, hasta, vendedora_id)
+        query = query.filter(Notificacion.id.in_(ids))
+    notifs = query.order_by(Notificacion.fecha.desc()).all()
     resultado = []
     for n in notifs:
         resultado.append({
@@ -38,6 +63,9 @@ def obtener_notificaciones(vendedora_id: int, db: Session = Depends(get_db)):
             "leido": n.leido,
             "fecha": n.fecha.strftime("%Y-%m-%d %H:%M:%S")
         })
+    if since is not None:
+        return delta(resultado, ids, hasta)
+    response.headers["X-Since"] = str(hasta)
     return resultado
 
 @router.patch("/{notificacion_id}/leer", summary="Marcar una notificación como leída")
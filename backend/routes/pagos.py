@@ -1,11 +1,15 @@
 # routes/pagos.py
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy.orm import Session
 from database import get_db
-from models import Pago, Deuda, Vendedora
-from schemas import PagoCreate, PagoResponse
-from typing import List
+from models import Pago, Vendedora
+from schemas import PagoCreate, PagoResponse, PagosDelta
+from typing import List, Optional, Union
 from datetime import datetime
+from .saldos import aplicar_pago
+from .metricas import sumar_metrica
+from .eventos import publicar
+from .cambios import cursor_actual, cambiados, delta, DESCRIPCION_SINCE
 
 router = APIRouter(prefix="/pagos", tags=["Pagos"])
 
@@ -25,47 +29,55 @@ def create_pago(pago: PagoCreate, db: Session = Depends(get_db)):
         metodo=pago.metodo,
         referencia=pago.referencia,
         capture_url=pago.capture_url,
-        estado=pago.estado or "pendiente",
-        fecha=pago.fecha or datetime.utcnow()
+        estado="pendiente",
+        fecha=datetime.utcnow()
     )
     db.add(nuevo_pago)
+    db.flush()
+
+    # Aplicar pago a deudas pendientes (lee el saldo; sin deuda no recorre nada)
+    aplicar_pago(db, pago.vendedora_id, nuevo_pago.monto, pago_id=nuevo_pago.id)
+    publicar(db, "pago_registrado", pago.vendedora_id, pago_id=nuevo_pago.id)
+
     db.commit()
     db.refresh(nuevo_pago)
+    return nuevo_pago
 
-    # Aplicar pago a deudas pendientes
-    deudas = (
-        db.query(Deuda)
-        .filter(Deuda.vendedora_id == pago.vendedora_id, Deuda.estado == "pendiente")
-        .order_by(Deuda.fecha.asc())
-        .all()
-    )
 
-    monto_restante = nuevo_pago.monto
-    for deuda in deudas:
-        if monto_restante <= 0:
-            break
-        if monto_restante >= deuda.monto:
-            monto_restante -= deuda.monto
-            deuda.estado = "pagada"
-        else:
-            deuda.monto -= monto_restante
-            monto_restante = 0
-        db.add(deuda)
+# ── Listas (completas o solo lo cambiado desde `since`)
+def _listar_pagos(db: Session, response: Response, since: Optional[int], vendedora_id: Optional[int] = None):
+    hasta = cursor_actual(db, since)
+    query = db.query(Pago)
+    if vendedora_id is not None:
+        query = query.filter(Pago.vendedora_id == vendedora_id)
+    if since is None:
+        response.headers["X-Since"] = str(hasta)
+        return query.order_by(Pago.fecha.desc()).all()
 
-    db.commit()
-    return nuevo_pago
+    ids = cambiados(db, "pagos", since, hasta, vendedora_id)
+    pagos = query.filter(Pago.id.in_(ids)).order_by(Pago.fecha.desc()).all()
+    return delta(pagos, ids, hasta)
 
 
 # ── Listar todos los pagos
-@router.get("/", response_model=List[PagoResponse])
-def get_all_pagos(db: Session = Depends(get_db)):
-    return db.query(Pago).order_by(Pago.fecha.desc()).all()
+@router.get("/", response_model=Union[List[PagoResponse], PagosDelta])
+def get_all_pagos(
+    response: Response,
+    since: Optional[int] = Query(None, ge=0, description=DESCRIPCION_SINCE),
+    db: Session = Depends(get_db)
+):
+    return _listar_pagos(db, response, since)
 
 
 # ── Listar pagos de una vendedora
-@router.get("/vendedora/{vendedora_id}", response_model=List[PagoResponse])
-def get_pagos_vendedora(vendedora_id: int, db: Session = Depends(get_db)):
-    return db.query(Pago).filter(Pago.vendedora_id == vendedora_id).order_by(Pago.fecha.desc()).all()
+@router.get("/vendedora/{vendedora_id}", response_model=Union[List[PagoResponse], PagosDelta])
+def get_pagos_vendedora(
+    vendedora_id: int,
+    response: Response,
+    since: Optional[int] = Query(None, ge=0, description=DESCRIPCION_SINCE),
+    db: Session = Depends(get_db)
+):
+    return _listar_pagos(db, response, since, vendedora_id)
 
 
 # ── Aprobar manualmente un pago (Admin)
@@ -76,28 +88,13 @@ def pagar_pago(pago_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Pago no encontrado")
 
     # ✅ Cambiar a "completado" para que el dashboard lo tome
+    if pago.estado != "completado":
+        sumar_metrica(db, "ingresos", pago.monto, pago.fecha)
     pago.estado = "completado"
     db.add(pago)
 
     # Aplicar a deudas pendientes
-    deudas = (
-        db.query(Deuda)
-        .filter(Deuda.vendedora_id == pago.vendedora_id, Deuda.estado == "pendiente")
-        .order_by(Deuda.fecha.asc())
-        .all()
-    )
-
-    monto_restante = pago.monto
-    for deuda in deudas:
-        if monto_restante <= 0:
-            break
-        if monto_restante >= deuda.monto:
-            monto_restante -= deuda.monto
-            deuda.estado = "pagada"
-        else:
-            deuda.monto -= monto_restante
-            monto_restante = 0
-        db.add(deuda)
+    aplicar_pago(db, pago.vendedora_id, pago.monto, pago_id=pago.id)
 
     # Crear notificación
     from models import Notificacion
@@ -107,6 +104,8 @@ def pagar_pago(pago_id: int, db: Session = Depends(get_db)):
         leido=False
     )
     db.add(notificacion)
+    publicar(db, "pago_aprobado", pago.vendedora_id, pago_id=pago.id, monto=pago.monto)
+    publicar(db, "notificacion_creada", pago.vendedora_id)
 
     db.commit()
     db.refresh(pago)
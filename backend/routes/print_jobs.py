@@ -1,14 +1,133 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
+from sqlalchemy.orm import Session
+from typing import List, Optional, Literal
+import asyncio
+import os
+
+from database import get_db, SessionLocal
+from models import PrintJob, Volante
+from schemas import PrintJobResponse
+from .almacen import ruta_archivo
+from .print_queue import (
+    encolar_trabajo, despertar, resumen_cola, reclamar_trabajos, completar_trabajo,
+    confirmar_trabajos, suscripcion_async, ESTADOS, LEASE_SEGUNDOS, ESPERA_MAXIMA
+)
 
 router = APIRouter()
 
+UPLOAD_DIR = "uploads/catalogos/pdf"
+AGENTE_POR_DEFECTO = "agente"  # dueño del lease de los agentes que no mandan `agent`
+
 class PrintRequest(BaseModel):
     volante_id: int
     copies: int
     user_id: int
 
 @router.post("/request")
-async def request_print(data: PrintRequest):
-    # Aquí guardamos en BD el trabajo
-    return {"msg": f"Trabajo agregado: {data.copies} copias del volante {data.volante_id}"}
+def request_print(data: PrintRequest, db: Session = Depends(get_db)):
+    volante = db.query(Volante).filter(Volante.id == data.volante_id).first()
+    if not volante:
+        raise HTTPException(status_code=404, detail="Volante no encontrado")
+
+    file_path = os.path.abspath(ruta_archivo(volante.archivo, UPLOAD_DIR))
+    if not os.path.isfile(file_path):
+        raise HTTPException(status_code=404, detail=f"Archivo del volante no encontrado: {volante.archivo}")
+
+    trabajo = encolar_trabajo(db, file_path, data.copies, usuario_id=data.user_id)
+    db.commit()
+    despertar()
+    return {"msg": f"Trabajo agregado: {data.copies} copias del volante {data.volante_id}", "job_id": trabajo.id}
+
+# ── Estado de la cola ────────────────────────────────────────
+@router.get("/queue")
+def estado_cola(db: Session = Depends(get_db)):
+    """Cantidad de trabajos por estado y profundidad de la cola (queued + printing)."""
+    return resumen_cola(db)
+
+@router.get("/jobs", response_model=List[PrintJobResponse])
+def listar_trabajos(
+    estado: Optional[str] = None,
+    usuario_id: Optional[int] = None,
+    limite: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    query = db.query(PrintJob)
+    if estado:
+        if estado not in ESTADOS:
+            raise HTTPException(status_code=400, detail="Estado inválido")
+        query = query.filter(PrintJob.estado == estado)
+    if usuario_id is not None:
+        query = query.filter(PrintJob.usuario_id == usuario_id)
+    return query.order_by(PrintJob.id.desc()).limit(limite).all()
+
+@router.get("/jobs/{job_id}", response_model=PrintJobResponse)
+def obtener_trabajo(job_id: int, db: Session = Depends(get_db)):
+    trabajo = db.query(PrintJob).filter(PrintJob.id == job_id).first()
+    if not trabajo:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado")
+    return trabajo
+
+# ── Protocolo de agentes: long-poll + lease + ack en lote ────
+class AckItem(BaseModel):
+    id: int
+    estado: Literal["done", "failed"]
+    copias: Optional[int] = None
+    error: Optional[str] = None
+
+class AckRequest(BaseModel):
+    agent: str
+    resultados: List[AckItem]
+
+def _reclamar(agent: str, maximo: int, lease: int):
+    with SessionLocal() as db:
+        trabajos = reclamar_trabajos(db, agent, limite=maximo, lease_segundos=lease)
+        return [PrintJobResponse.model_validate(t).model_dump() for t in trabajos]
+
+@router.get("/pending")
+async def trabajos_pendientes(
+    agent: str = Query(AGENTE_POR_DEFECTO, description="Identificador del agente (dueño del lease)"),
+    max: int = Query(10, ge=1, le=100),
+    wait: float = Query(25, ge=0, le=60, description="Segundos de espera si no hay trabajos"),
+    lease: int = Query(LEASE_SEGUNDOS, ge=10, le=3600),
+):
+    """
+    Entrega hasta `max` trabajos tomados con lease para `agent`.
+    Si la cola está vacía espera hasta `wait` segundos y responde apenas se
+    encola algo. Si el agente no confirma antes de que venza el lease, el
+    trabajo vuelve a la cola.
+    """
+    loop = asyncio.get_running_loop()
+    limite = loop.time() + wait
+    while True:
+        with suscripcion_async() as aviso:
+            trabajos = await run_in_threadpool(_reclamar, agent, max, lease)
+            restante = limite - loop.time()
+            if trabajos or restante <= 0:
+                return trabajos
+            # Se vuelve a mirar la cola cada ESPERA_MAXIMA por backoffs y leases vencidos
+            try:
+                await asyncio.wait_for(aviso.wait(), min(restante, ESPERA_MAXIMA))
+            except asyncio.TimeoutError:
+                pass
+
+@router.post("/ack")
+def confirmar(data: AckRequest, db: Session = Depends(get_db)):
+    """Confirma en una sola transacción el resultado de varios trabajos del agente."""
+    resultados = confirmar_trabajos(db, data.agent, [r.model_dump() for r in data.resultados])
+    return {"resultados": resultados}
+
+@router.post("/mark_done/{job_id}")
+def marcar_hecho(
+    job_id: int,
+    agent: str = Query(AGENTE_POR_DEFECTO, description="Dueño del lease; los agentes viejos no lo mandan"),
+    db: Session = Depends(get_db)
+):
+    """
+    Compatibilidad con agentes viejos: confirma un solo trabajo. Sin `agent`
+    solo vale para los tomados con el dueño por defecto de /pending.
+    """
+    if not completar_trabajo(db, job_id, agent):
+        raise HTTPException(status_code=409, detail="El trabajo no está tomado por este agente")
+    return {"id": job_id, "estado": "done"}
@@ -0,0 +1,310 @@
+# routes/print_queue.py
+"""
+Cola persistente de impresión (tabla print_jobs) y pool fijo de workers.
+
+Estados: queued -> printing -> done | failed.
+Un worker "toma" un trabajo con un lease (lease_owner / lease_until); si el
+proceso muere, al vencer el lease el trabajo vuelve a estar disponible.
+Los fallos se reintentan con backoff exponencial hasta max_intentos.
+
+Los agentes externos (print-agent/agent.py) usan el mismo protocolo de
+lease vía GET /print/pending (long-poll) y POST /print/ack.
+
+Configuración por variables de entorno:
+    PRINT_WORKERS    cantidad de workers del pool (0 = solo agentes externos)
+La impresora se elige en routes/printers.py (PRINT_BACKEND, PRINTER_NAME).
+"""
+import asyncio
+import os
+import threading
+import traceback
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+from sqlalchemy import and_, or_, func
+from sqlalchemy.orm import Session
+
+from database import SessionLocal
+from models import PrintJob
+from .print_utils import print_file
+
+ESTADOS = ("queued", "printing", "done", "failed")
+LEASE_SEGUNDOS = 120
+BACKOFF_BASE = 5        # segundos; se duplica en cada intento
+BACKOFF_MAXIMO = 600
+ESPERA_MAXIMA = 5       # un worker inactivo revisa la cola al menos cada N segundos
+
+_hay_trabajo = threading.Condition()
+
+# Esperas de long-poll: (loop, asyncio.Event) de cada request en espera
+_esperas_async = set()
+_esperas_lock = threading.Lock()
+
+
+# ── Encolar ──────────────────────────────────────────────────
+def encolar_trabajo(db: Session, file_path: str, copies: int = 1, usuario_id: int = None,
+                    catalogo_id: int = None, impresion_id: int = None) -> PrintJob:
+    """
+    Agrega un trabajo a la cola. No hace commit: se guarda en la misma
+    transacción que la impresión. Llamar a despertar() después del commit.
+    """
+    trabajo = PrintJob(
+        usuario_id=usuario_id,
+        catalogo_id=catalogo_id,
+        impresion_id=impresion_id,
+        file_path=file_path,
+        copies=copies,
+        estado="queued",
+        disponible_en=datetime.utcnow()
+    )
+    db.add(trabajo)
+    return trabajo
+
+
+def despertar():
+    """Avisa a los workers y a los long-polls en espera que hay trabajos nuevos."""
+    with _hay_trabajo:
+        _hay_trabajo.notify_all()
+    with _esperas_lock:
+        esperas = list(_esperas_async)
+    for loop, evento in esperas:
+        try:
+            loop.call_soon_threadsafe(evento.set)
+        except RuntimeError:
+            pass  # loop cerrado
+
+
+@contextmanager
+def suscripcion_async():
+    """
+    Registra un asyncio.Event que se activa con despertar(). Se registra antes
+    de consultar la cola para no perder avisos entre la consulta y la espera.
+    """
+    registro = (asyncio.get_running_loop(), asyncio.Event())
+    with _esperas_lock:
+        _esperas_async.add(registro)
+    try:
+        yield registro[1]
+    finally:
+        with _esperas_lock:
+            _esperas_async.discard(registro)
+
+
+# ── Tomar / cerrar trabajos ──────────────────────────────────
+def _disponibles(ahora: datetime):
+    """Trabajos en cola listos para intentar, o tomados con el lease vencido."""
+    return and_(
+        PrintJob.intentos < PrintJob.max_intentos,
+        or_(
+            and_(PrintJob.estado == "queued", PrintJob.disponible_en <= ahora),
+            and_(PrintJob.estado == "printing", PrintJob.lease_until < ahora)
+        )
+    )
+
+
+def reclamar_trabajos(db: Session, owner: str, limite: int = 1, lease_segundos: int = LEASE_SEGUNDOS):
+    """
+    Toma hasta `limite` trabajos para `owner` y hace commit.
+    Cada trabajo se toma con un UPDATE condicional, así dos workers nunca
+    se quedan con el mismo.
+    """
+    ahora = datetime.utcnow()
+
+    # Leases vencidos sin intentos restantes -> failed
+    db.query(PrintJob).filter(
+        PrintJob.estado == "printing",
+        PrintJob.lease_until < ahora,
+        PrintJob.intentos >= PrintJob.max_intentos
+    ).update({
+        PrintJob.estado: "failed",
+        PrintJob.error: "Lease vencido sin intentos restantes",
+        PrintJob.lease_owner: None,
+        PrintJob.actualizado_en: ahora
+    }, synchronize_session=False)
+
+    candidatos = [
+        fila.id for fila in
+        db.query(PrintJob.id).filter(_disponibles(ahora)).order_by(PrintJob.id).limit(limite * 2).all()
+    ]
+
+    tomados = []
+    for job_id in candidatos:
+        if len(tomados) >= limite:
+            break
+        filas = db.query(PrintJob).filter(PrintJob.id == job_id, _disponibles(ahora)).update({
+            PrintJob.estado: "printing",
+            PrintJob.lease_owner: owner,
+            PrintJob.lease_until: ahora + timedelta(seconds=lease_segundos),
+            PrintJob.intentos: PrintJob.intentos + 1,
+            PrintJob.actualizado_en: ahora
+        }, synchronize_session=False)
+        if filas:
+            tomados.append(job_id)
+    db.commit()
+
+    if not tomados:
+        return []
+    return db.query(PrintJob).filter(PrintJob.id.in_(tomados)).order_by(PrintJob.id).all()
+
+
+def registrar_progreso(db: Session, job_id: int, owner: str, copias_impresas: int):
+    """Actualiza las copias impresas y renueva el lease del trabajo."""
+    ahora = datetime.utcnow()
+    db.query(PrintJob).filter(PrintJob.id == job_id, PrintJob.lease_owner == owner).update({
+        PrintJob.copias_impresas: copias_impresas,
+        PrintJob.lease_until: ahora + timedelta(seconds=LEASE_SEGUNDOS),
+        PrintJob.actualizado_en: ahora
+    }, synchronize_session=False)
+    db.commit()
+
+
+def _marcar_done(db: Session, job_id: int, owner: str, copias_impresas) -> bool:
+    filtro = [PrintJob.id == job_id, PrintJob.estado == "printing", PrintJob.lease_owner == owner]
+    valores = {
+        PrintJob.estado: "done",
+        PrintJob.error: None,
+        PrintJob.lease_owner: None,
+        PrintJob.lease_until: None,
+        PrintJob.actualizado_en: datetime.utcnow()
+    }
+    valores[PrintJob.copias_impresas] = PrintJob.copies if copias_impresas is None else copias_impresas
+    return bool(db.query(PrintJob).filter(*filtro).update(valores, synchronize_session=False))
+
+
+def _marcar_fallo(db: Session, job_id: int, owner: str, error: str, copias_impresas=None) -> bool:
+    filtro = [PrintJob.id == job_id, PrintJob.estado == "printing", PrintJob.lease_owner == owner]
+    trabajo = db.query(PrintJob).filter(*filtro).first()
+    if not trabajo:
+        return False
+
+    ahora = datetime.utcnow()
+    trabajo.error = (error or "")[:500]
+    trabajo.lease_owner = None
+    trabajo.lease_until = None
+    if copias_impresas is not None:
+        trabajo.copias_impresas = copias_impresas
+    if trabajo.intentos >= trabajo.max_intentos:
+        trabajo.estado = "failed"
+    else:
+        espera = min(BACKOFF_BASE * 2 ** (trabajo.intentos - 1), BACKOFF_MAXIMO)
+        trabajo.estado = "queued"
+        trabajo.disponible_en = ahora + timedelta(seconds=espera)
+    return True
+
+
+def completar_trabajo(db: Session, job_id: int, owner: str, copias_impresas: int = None) -> bool:
+    """
+    Marca el trabajo como done. Devuelve False si ya no está tomado por `owner`.
+    """
+    ok = _marcar_done(db, job_id, owner, copias_impresas)
+    db.commit()
+    return ok
+
+
+def fallar_trabajo(db: Session, job_id: int, owner: str, error: str, copias_impresas: int = None) -> bool:
+    """
+    Registra un fallo. Si quedan intentos el trabajo vuelve a la cola con
+    backoff exponencial; si no, queda en failed.
+    """
+    ok = _marcar_fallo(db, job_id, owner, error, copias_impresas)
+    db.commit()
+    return ok
+
+
+def confirmar_trabajos(db: Session, owner: str, resultados: list) -> dict:
+    """
+    Confirma varios trabajos en una sola transacción.
+    `resultados`: dicts con id, estado ("done" | "failed"), copias y error opcionales.
+    Devuelve {id: "ok" | "lease_perdido" | "estado_invalido"}.
+    """
+    salida = {}
+    for r in resultados:
+        if r["estado"] == "done":
+            ok = _marcar_done(db, r["id"], owner, r.get("copias"))
+        elif r["estado"] == "failed":
+            ok = _marcar_fallo(db, r["id"], owner, r.get("error") or "Fallo reportado por el agente", r.get("copias"))
+        else:
+            salida[r["id"]] = "estado_invalido"
+            continue
+        salida[r["id"]] = "ok" if ok else "lease_perdido"
+    db.commit()
+    if any(r["estado"] == "failed" for r in resultados):
+        despertar()
+    return salida
+
+
+# ── Estado de la cola ────────────────────────────────────────
+def resumen_cola(db: Session) -> dict:
+    conteos = dict(
+        db.query(PrintJob.estado, func.count(PrintJob.id)).group_by(PrintJob.estado).all()
+    )
+    resumen = {estado: conteos.get(estado, 0) for estado in ESTADOS}
+    resumen["profundidad"] = resumen["queued"] + resumen["printing"]
+    return resumen
+
+
+# ── Pool de workers ──────────────────────────────────────────
+class PoolImpresion:
+    """Cantidad fija de hilos que drenan la cola de print_jobs."""
+
+    def __init__(self, workers: int = 2):
+        self.workers = workers
+        self._hilos = []
+        self._parar = threading.Event()
+        self._prefijo = f"{os.getpid()}-{uuid.uuid4().hex[:6]}"
+
+    def iniciar(self):
+        for i in range(self.workers):
+            hilo = threading.Thread(target=self._bucle, args=(f"{self._prefijo}-w{i}",), daemon=True)
+            hilo.start()
+            self._hilos.append(hilo)
+        print(f"🖨️ Pool de impresión iniciado con {self.workers} workers")
+
+    def detener(self, timeout: float = 5):
+        self._parar.set()
+        despertar()
+        for hilo in self._hilos:
+            hilo.join(timeout)
+        self._hilos = []
+
+    def _bucle(self, owner: str):
+        while not self._parar.is_set():
+            try:
+                with SessionLocal() as db:
+                    trabajos = reclamar_trabajos(db, owner, limite=1)
+                    for trabajo in trabajos:
+                        self._procesar(db, trabajo, owner)
+            except Exception:
+                traceback.print_exc()
+                trabajos = []
+
+            if not trabajos:
+                with _hay_trabajo:
+                    _hay_trabajo.wait(ESPERA_MAXIMA)
+
+    def _procesar(self, db: Session, trabajo: PrintJob, owner: str):
+        job_id, file_path, copies = trabajo.id, trabajo.file_path, trabajo.copies
+        impresas = trabajo.copias_impresas or 0
+
+        if not os.path.exists(file_path):
+            fallar_trabajo(db, job_id, owner, f"Archivo no encontrado: {file_path}")
+            return
+
+        try:
+            # Todas las copias pendientes en un solo trabajo de impresión
+            pendientes = copies - impresas
+            if pendientes > 0:
+                impresas += print_file(file_path, copias=pendientes)
+                if impresas < copies:
+                    raise RuntimeError(f"La impresora aceptó {impresas} de {copies} copias")
+        except Exception as e:
+            print(f"❌ Trabajo {job_id} falló ({impresas}/{copies} copias): {e}")
+            fallar_trabajo(db, job_id, owner, str(e), impresas)
+            return
+
+        completar_trabajo(db, job_id, owner, impresas)
+        print(f"✅ Trabajo {job_id} impreso: {impresas} copias")
+
+
+pool = PoolImpresion(int(os.environ.get("PRINT_WORKERS", "2")))
@@ -0,0 +1,133 @@
+# routes/print_renditions.py
+"""
+Versiones listas para imprimir ("renditions") de los catálogos.
+
+Al subir un catálogo se genera en segundo plano un PNG del tamaño de la
+página por cada papel y resolución configurados: la imagen ya escalada y
+centrada. Al imprimir, print_file() usa ese PNG en vez de abrir y escalar
+la imagen original en cada trabajo. Es una imagen (no un PDF) para que
+Win32Backend la mande por el mismo camino que las imágenes: un solo
+documento con una página por copia.
+
+Los archivos se nombran por contenido (sha256 del original + papel + dpi),
+así dos subidas del mismo archivo comparten la misma versión.
+
+Configuración por variables de entorno:
+    PRINT_PAPERS   tamaños de papel separados por coma (por defecto carta)
+    PRINT_DPI      resoluciones separadas por coma (por defecto 300)
+"""
+import hashlib
+import os
+import threading
+
+RENDITION_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "uploads", "catalogos", "print")
+
+# Tamaño de página en pulgadas (ancho, alto)
+PAPELES = {
+    "carta": (8.5, 11),
+    "oficio": (8.5, 14),
+    "a4": (8.27, 11.69),
+}
+
+EXTENSIONES_IMAGEN = (".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp")
+
+
+def _lista_env(nombre: str, por_defecto: str):
+    return [v.strip().lower() for v in os.environ.get(nombre, por_defecto).split(",") if v.strip()]
+
+
+def papeles_configurados():
+    papeles = [p for p in _lista_env("PRINT_PAPERS", "carta") if p in PAPELES]
+    return papeles or ["carta"]
+
+
+def dpis_configurados():
+    return [int(d) for d in _lista_env("PRINT_DPI", "300") if d.isdigit()] or [300]
+
+
+# ── Hash del original ────────────────────────────────────────
+# path -> (mtime, tamaño, sha256); evita releer el archivo en cada impresión
+_hashes = {}
+_hashes_lock = threading.Lock()
+
+
+def hash_archivo(file_path: str) -> str:
+    st = os.stat(file_path)
+    with _hashes_lock:
+        cache = _hashes.get(file_path)
+    if cache and cache[0] == st.st_mtime and cache[1] == st.st_size:
+        return cache[2]
+
+    sha = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for bloque in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloque)
+    digest = sha.hexdigest()
+    with _hashes_lock:
+        _hashes[file_path] = (st.st_mtime, st.st_size, digest)
+    return digest
+
+
+def ruta_rendition(digest: str, papel: str, dpi: int) -> str:
+    return os.path.join(RENDITION_DIR, f"{digest}_{papel}_{dpi}.png")
+
+
+# ── Generación ───────────────────────────────────────────────
+def generar_rendition(origen: str, papel: str, dpi: int):
+    """
+    Genera (si no existe) la página lista para imprimir de `origen`.
+    Devuelve la ruta, o None si el archivo no es una imagen.
+    """
+    if not origen.lower().endswith(EXTENSIONES_IMAGEN):
+        return None  # PDFs y otros formatos se imprimen tal cual
+
+    destino = ruta_rendition(hash_archivo(origen), papel, dpi)
+    if os.path.exists(destino):
+        return destino
+
+    from PIL import Image
+
+    ancho_pg, alto_pg = (round(medida * dpi) for medida in PAPELES[papel])
+    with Image.open(origen) as img:
+        img = img.convert("RGB")
+        # Girar si la imagen es apaisada, para aprovechar la hoja
+        if img.width > img.height:
+            img = img.rotate(90, expand=True)
+        escala = min(ancho_pg / img.width, alto_pg / img.height)
+        tam = (max(1, int(img.width * escala)), max(1, int(img.height * escala)))
+        img = img.resize(tam, Image.LANCZOS)
+
+        pagina = Image.new("RGB", (ancho_pg, alto_pg), "white")
+        pagina.paste(img, ((ancho_pg - tam[0]) // 2, (alto_pg - tam[1]) // 2))
+
+    os.makedirs(RENDITION_DIR, exist_ok=True)
+    temporal = f"{destino}.{threading.get_ident()}.tmp"
+    pagina.save(temporal, "PNG", dpi=(dpi, dpi))
+    os.replace(temporal, destino)  # atómico: nunca se lee una página a medias
+    return destino
+
+
+def generar_renditions(origen: str):
+    """Genera todas las versiones configuradas. Pensado para BackgroundTasks."""
+    for papel in papeles_configurados():
+        for dpi in dpis_configurados():
+            try:
+                ruta = generar_rendition(origen, papel, dpi)
+                if ruta is None:
+                    return
+                print(f"🖨️ Versión de impresión lista: {ruta}")
+            except Exception as e:
+                print(f"❌ No se pudo generar la versión {papel}/{dpi} de {origen}: {e}")
+
+
+def rendition_existente(origen: str, papel: str = None, dpi: int = None):
+    """Ruta de la versión ya generada para imprimir `origen`, o None."""
+    if not origen.lower().endswith(EXTENSIONES_IMAGEN):
+        return None
+    papel = papel or papeles_configurados()[0]
+    dpi = dpi or dpis_configurados()[0]
+    try:
+        ruta = ruta_rendition(hash_archivo(origen), papel, dpi)
+    except OSError:
+        return None
+    return ruta if os.path.exists(ruta) else None
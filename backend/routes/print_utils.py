@@ -1,56 +1,28 @@
 # routes/print_utils.py
 import os
-import win32print
-import win32ui
-from PIL import Image, ImageWin
-import win32api
+from .printers import get_backend
+from .print_renditions import rendition_existente
 
-def print_file(file_path: str, printer_name: str = "HPI21F282"):
+def print_file(file_path: str, printer_name: str = None, copias: int = 1) -> int:
     """
-    Imprime un archivo directamente:
-    - Si es PDF → usa ShellExecute (aplicación predeterminada de Windows).
-    - Si es imagen (JPG/PNG) → la envía directo a la impresora.
+    Imprime `copias` copias de un archivo en un solo trabajo, con el backend
+    configurado (ver routes/printers.py):
+    - win32: PDF con ShellExecute, imágenes directo a la impresora.
+    - cups: comando `lp -n`.
+    - file: copia a una carpeta.
+    Si el catálogo ya tiene su versión lista para imprimir (ver
+    routes/print_renditions.py) se manda esa en lugar de la imagen original;
+    es un PNG del tamaño de la página, así que también sale en un solo trabajo.
+    Devuelve cuántas copias aceptó la impresora (0 si hubo un error).
     """
     if not os.path.exists(file_path):
         print(f"❌ El archivo {file_path} no existe")
-        return
+        return 0
 
-    ext = os.path.splitext(file_path)[1].lower()
+    file_path = rendition_existente(file_path) or file_path
 
     try:
-        # Verificar impresoras disponibles
-        printer_list = [p[2] for p in win32print.EnumPrinters(2)]
-        if printer_name not in printer_list:
-            print(f"❌ Impresora {printer_name} no encontrada. Impresoras disponibles: {printer_list}")
-            return
-
-        if ext == ".pdf":
-            # Imprimir PDF con aplicación predeterminada
-            win32api.ShellExecute(0, "print", file_path, f'/d:"{printer_name}"', ".", 0)
-            print(f"✅ PDF {file_path} enviado a impresora {printer_name}")
-        else:
-            # Imprimir imagen directamente
-            hprinter = win32print.OpenPrinter(printer_name)
-            hdc = win32ui.CreateDC()
-            hdc.CreatePrinterDC(printer_name)
-
-            hdc.StartDoc(file_path)
-            hdc.StartPage()
-
-            img = Image.open(file_path)
-            dib = ImageWin.Dib(img)
-
-            # Ajustar imagen al tamaño de la página de la impresora
-            width = hdc.GetDeviceCaps(8)   # HORZRES
-            height = hdc.GetDeviceCaps(10) # VERTRES
-            dib.draw(hdc.GetHandleOutput(), (0, 0, width, height))
-
-            hdc.EndPage()
-            hdc.EndDoc()
-            hdc.DeleteDC()
-            win32print.ClosePrinter(hprinter)
-
-            print(f"✅ Imagen {file_path} enviada a impresora {printer_name}")
-
+        return get_backend().imprimir(file_path, printer_name, copias)
     except Exception as e:
-        print(f"❌ Error al imprimir {file_path}: {e}") 
+        print(f"❌ Error al imprimir {file_path}: {e}")
+        return 0
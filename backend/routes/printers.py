@@ -0,0 +1,168 @@
+# routes/printers.py
+"""
+Backends de impresión detrás de print_file().
+
+    win32  -> spooler de Windows (pywin32); se importa solo al imprimir
+    cups   -> comando `lp` de CUPS (Linux / macOS), igual que print-agent
+    file   -> copia el archivo a una carpeta (pruebas o servidores sin impresora)
+
+Las copias se mandan en un solo trabajo (páginas repetidas en win32,
+`lp -n` en CUPS) y cada backend devuelve cuántas copias aceptó.
+
+Se elige con variables de entorno:
+    PRINT_BACKEND    win32 | cups | file   (por defecto win32 en Windows, cups en el resto)
+    PRINTER_NAME     impresora destino (por defecto HPI21F282 en win32; en CUPS
+                     la predeterminada del sistema)
+    PRINT_SINK_DIR   carpeta del backend file (por defecto print_sink)
+"""
+import os
+import shutil
+import subprocess
+import time
+from abc import ABC, abstractmethod
+from datetime import datetime
+
+IMPRESORA_POR_DEFECTO = "HPI21F282"
+
+
+class PrinterBackend(ABC):
+    """Interfaz común: imprimir() devuelve cuántas copias aceptó la impresora (0 = error)."""
+    nombre = "base"
+    impresora_por_defecto = None  # si no se configura PRINTER_NAME
+
+    def __init__(self, printer_name: str = None):
+        self.printer_name = printer_name or self.impresora_por_defecto
+
+    @abstractmethod
+    def imprimir(self, file_path: str, printer_name: str = None, copias: int = 1) -> int:
+        ...
+
+
+# ── Windows (win32print / win32ui) ───────────────────────────
+class Win32Backend(PrinterBackend):
+    nombre = "win32"
+    impresora_por_defecto = IMPRESORA_POR_DEFECTO
+    CACHE_IMPRESORAS = 60  # segundos
+
+    def __init__(self, printer_name: str = None):
+        super().__init__(printer_name)
+        self._impresoras = None
+        self._impresoras_ts = 0
+
+    def _impresoras_disponibles(self):
+        """EnumPrinters(2) es lento: se cachea unos segundos."""
+        import win32print
+        if self._impresoras is None or time.monotonic() - self._impresoras_ts > self.CACHE_IMPRESORAS:
+            self._impresoras = [p[2] for p in win32print.EnumPrinters(2)]
+            self._impresoras_ts = time.monotonic()
+        return self._impresoras
+
+    def imprimir(self, file_path: str, printer_name: str = None, copias: int = 1) -> int:
+        import win32print
+        import win32ui
+        import win32api
+        from PIL import Image, ImageWin
+
+        printer_name = printer_name or self.printer_name
+        ext = os.path.splitext(file_path)[1].lower()
+
+        # Verificar impresoras disponibles
+        printer_list = self._impresoras_disponibles()
+        if printer_name not in printer_list:
+            self._impresoras = None  # forzar recarga la próxima vez
+            print(f"❌ Impresora {printer_name} no encontrada. Impresoras disponibles: {printer_list}")
+            return 0
+
+        if ext == ".pdf":
+            # ShellExecute no permite indicar copias: se lanza una vez por copia
+            for _ in range(copias):
+                win32api.ShellExecute(0, "print", file_path, f'/d:"{printer_name}"', ".", 0)
+            print(f"✅ PDF {file_path} enviado a impresora {printer_name} ({copias} copias)")
+            return copias
+
+        # Imprimir imagen: un solo documento con una página por copia
+        hprinter = win32print.OpenPrinter(printer_name)
+        hdc = win32ui.CreateDC()
+        hdc.CreatePrinterDC(printer_name)
+
+        img = Image.open(file_path)
+        dib = ImageWin.Dib(img)
+
+        # Ajustar imagen al tamaño de la página de la impresora
+        width = hdc.GetDeviceCaps(8)   # HORZRES
+        height = hdc.GetDeviceCaps(10) # VERTRES
+
+        hdc.StartDoc(file_path)
+        for _ in range(copias):
+            hdc.StartPage()
+            dib.draw(hdc.GetHandleOutput(), (0, 0, width, height))
+            hdc.EndPage()
+        hdc.EndDoc()
+        hdc.DeleteDC()
+        win32print.ClosePrinter(hprinter)
+
+        print(f"✅ Imagen {file_path} enviada a impresora {printer_name} ({copias} copias)")
+        return copias
+
+
+# ── CUPS (lp) ────────────────────────────────────────────────
+class CupsBackend(PrinterBackend):
+    """Sin impresora configurada no se pasa -d: CUPS usa su destino predeterminado."""
+    nombre = "cups"
+
+    def imprimir(self, file_path: str, printer_name: str = None, copias: int = 1) -> int:
+        printer_name = printer_name or self.printer_name
+        comando = ["lp", "-n", str(copias)]
+        if printer_name:
+            comando += ["-d", printer_name]
+        comando.append(file_path)
+
+        resultado = subprocess.run(comando, capture_output=True, text=True)
+        if resultado.returncode != 0:
+            print(f"❌ lp falló ({resultado.returncode}): {resultado.stderr.strip()}")
+            return 0
+        print(f"✅ {file_path} enviado a CUPS ({printer_name or 'predeterminada'}, {copias} copias): {resultado.stdout.strip()}")
+        return copias
+
+
+# ── Carpeta (sumidero de archivos) ───────────────────────────
+class FileSinkBackend(PrinterBackend):
+    nombre = "file"
+
+    def __init__(self, printer_name: str = None, directorio: str = None):
+        super().__init__(printer_name)
+        self.directorio = directorio or os.environ.get("PRINT_SINK_DIR", "print_sink")
+
+    def imprimir(self, file_path: str, printer_name: str = None, copias: int = 1) -> int:
+        # Un solo archivo por trabajo; las copias quedan en el nombre
+        os.makedirs(self.directorio, exist_ok=True)
+        nombre = f"{datetime.utcnow().strftime('%Y%m%d%H%M%S%f')}_x{copias}_{os.path.basename(file_path)}"
+        shutil.copyfile(file_path, os.path.join(self.directorio, nombre))
+        return copias
+
+
+BACKENDS = {
+    Win32Backend.nombre: Win32Backend,
+    CupsBackend.nombre: CupsBackend,
+    FileSinkBackend.nombre: FileSinkBackend,
+}
+
+_backend = None
+
+
+def get_backend() -> PrinterBackend:
+    """Backend configurado (se crea una sola vez por proceso)."""
+    global _backend
+    if _backend is None:
+        por_defecto = "win32" if os.name == "nt" else "cups"
+        nombre = os.environ.get("PRINT_BACKEND", por_defecto).lower()
+        if nombre not in BACKENDS:
+            raise ValueError(f"PRINT_BACKEND inválido: {nombre} (opciones: {', '.join(BACKENDS)})")
+        _backend = BACKENDS[nombre](os.environ.get("PRINTER_NAME"))
+    return _backend
+
+
+def set_backend(backend: PrinterBackend):
+    """Reemplaza el backend del proceso (p. ej. un FileSinkBackend en pruebas)."""
+    global _backend
+    _backend = backend
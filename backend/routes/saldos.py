@@ -0,0 +1,217 @@
+# routes/saldos.py
+"""
+Saldo por vendedora: libro de movimientos (movimientos_saldo, solo inserción)
+y saldo materializado (saldos_vendedora) que se actualiza en la misma
+transacción que la deuda o el pago que lo mueve.
+
+Saldo = suma de las deudas en estado 'pendiente'. Toda función que cambie
+el monto o el estado de una deuda pendiente debe registrar su movimiento aquí.
+"""
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Query
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from database import get_db
+from models import Deuda, Pago, MovimientoSaldo, SaldoVendedora
+from .eventos import publicar
+
+router = APIRouter()
+
+TOLERANCIA = 0.005  # diferencias menores a medio centavo se ignoran
+
+
+# ── Escritura (sin commit: va en la transacción de quien llama) ──
+def registrar_movimiento(db: Session, vendedora_id: int, monto: float, tipo: str,
+                         concepto: str = None, deuda_id: int = None, pago_id: int = None):
+    """Agrega el movimiento al libro y lo suma al saldo materializado."""
+    if not monto:
+        return None
+    movimiento = MovimientoSaldo(
+        vendedora_id=vendedora_id,
+        tipo=tipo,
+        monto=monto,
+        deuda_id=deuda_id,
+        pago_id=pago_id,
+        concepto=concepto
+    )
+    db.add(movimiento)
+
+    ahora = datetime.utcnow()
+    saldo = insert(SaldoVendedora).values(vendedora_id=vendedora_id, saldo=monto, actualizado_en=ahora)
+    db.execute(saldo.on_conflict_do_update(
+        index_elements=[SaldoVendedora.vendedora_id],
+        set_={"saldo": SaldoVendedora.saldo + saldo.excluded.saldo, "actualizado_en": ahora}
+    ))
+    publicar(db, "deuda_cambiada", vendedora_id, movimiento=tipo, deuda_id=deuda_id, pago_id=pago_id)
+    return movimiento
+
+
+# ── Lectura (O(1), por clave primaria) ───────────────────────
+def obtener_saldo(db: Session, vendedora_id: int) -> float:
+    saldo = db.query(SaldoVendedora.saldo).filter(SaldoVendedora.vendedora_id == vendedora_id).scalar()
+    return round(saldo or 0.0, 2)
+
+
+# ── Aplicar un pago a las deudas pendientes ──────────────────
+def aplicar_pago(db: Session, vendedora_id: int, monto: float, pago_id: int = None) -> float:
+    """
+    Aplica `monto` a las deudas pendientes más antiguas. No hace commit.
+    - Saldo en cero: no se toca la tabla deudas.
+    - Pago que cubre todo el saldo: un solo UPDATE marca todas como pagadas.
+    - Pago parcial: se recorren solo las deudas necesarias.
+    Devuelve el monto aplicado.
+    """
+    saldo = obtener_saldo(db, vendedora_id)
+    if saldo <= 0 or monto <= 0:
+        return 0.0
+
+    pendientes = db.query(Deuda).filter(Deuda.vendedora_id == vendedora_id, Deuda.estado == "pendiente")
+
+    if monto >= saldo - TOLERANCIA:
+        pendientes.update({Deuda.estado: "pagada"}, synchronize_session=False)
+        aplicado = saldo
+    else:
+        aplicado = 0.0
+        restante = monto
+        for deuda in pendientes.order_by(Deuda.fecha.asc()).yield_per(50):
+            if restante <= 0:
+                break
+            if restante >= deuda.monto:
+                restante -= deuda.monto
+                aplicado += deuda.monto
+                deuda.estado = "pagada"
+            else:
+                deuda.monto -= restante
+                aplicado += restante
+                restante = 0
+        # La sesión no hace autoflush: sin esto un segundo pago en la misma
+        # transacción volvería a leer estas deudas como pendientes
+        db.flush()
+
+    registrar_movimiento(db, vendedora_id, -aplicado, "abono", f"Pago #{pago_id}" if pago_id else "Pago", pago_id=pago_id)
+    return aplicado
+
+
+# ── Apertura / conciliación ──────────────────────────────────
+def _pendiente_por_vendedora(db: Session) -> dict:
+    filas = (
+        db.query(Deuda.vendedora_id, func.sum(Deuda.monto))
+        .filter(Deuda.estado == "pendiente")
+        .group_by(Deuda.vendedora_id)
+        .all()
+    )
+    return {vendedora_id: float(total or 0) for vendedora_id, total in filas}
+
+
+def inicializar_saldos(db: Session) -> int:
+    """Abre el libro con un movimiento 'apertura' por vendedora con deuda pendiente."""
+    abiertas = 0
+    for vendedora_id, total in _pendiente_por_vendedora(db).items():
+        if registrar_movimiento(db, vendedora_id, total, "apertura", "Saldo inicial"):
+            abiertas += 1
+    db.commit()
+    return abiertas
+
+
+def verificar_saldos(db: Session):
+    """
+    Compara el saldo materializado con la suma del libro y con las deudas
+    pendientes, y revisa que los abonos apunten a pagos existentes.
+    Devuelve [(vendedora_id, problema, valor guardado, valor esperado)].
+    """
+    saldos = dict(db.query(SaldoVendedora.vendedora_id, SaldoVendedora.saldo).all())
+    libro = dict(
+        db.query(MovimientoSaldo.vendedora_id, func.sum(MovimientoSaldo.monto))
+        .group_by(MovimientoSaldo.vendedora_id)
+        .all()
+    )
+    deudas = _pendiente_por_vendedora(db)
+
+    diferencias = []
+    for vendedora_id in sorted(set(saldos) | set(libro) | set(deudas)):
+        saldo = saldos.get(vendedora_id, 0.0)
+        en_libro = libro.get(vendedora_id, 0.0) or 0.0
+        pendiente = deudas.get(vendedora_id, 0.0)
+        if abs(saldo - en_libro) > TOLERANCIA:
+            diferencias.append((vendedora_id, "saldo != libro", saldo, en_libro))
+        if abs(saldo - pendiente) > TOLERANCIA:
+            diferencias.append((vendedora_id, "saldo != deudas pendientes", saldo, pendiente))
+
+    huerfanos = (
+        db.query(MovimientoSaldo.vendedora_id, MovimientoSaldo.pago_id)
+        .outerjoin(Pago, Pago.id == MovimientoSaldo.pago_id)
+        .filter(MovimientoSaldo.pago_id.isnot(None), Pago.id.is_(None))
+        .all()
+    )
+    for vendedora_id, pago_id in huerfanos:
+        diferencias.append((vendedora_id, f"abono de pago inexistente #{pago_id}", pago_id, None))
+    return diferencias
+
+
+def corregir_saldos(db: Session) -> int:
+    """
+    Realinea saldos con las deudas pendientes: un movimiento 'ajuste' por la
+    diferencia y el saldo materializado igual a la suma del libro.
+    """
+    deudas = _pendiente_por_vendedora(db)
+    libro = defaultdict(float, db.query(MovimientoSaldo.vendedora_id, func.sum(MovimientoSaldo.monto))
+                        .group_by(MovimientoSaldo.vendedora_id).all())
+
+    ajustes = 0
+    for vendedora_id in set(libro) | set(deudas):
+        diferencia = deudas.get(vendedora_id, 0.0) - (libro[vendedora_id] or 0.0)
+        if abs(diferencia) > TOLERANCIA:
+            db.add(MovimientoSaldo(vendedora_id=vendedora_id, tipo="ajuste", monto=diferencia,
+                                   concepto="Ajuste de conciliación"))
+            ajustes += 1
+
+    db.flush()
+    db.query(SaldoVendedora).delete()
+    filas = (
+        db.query(MovimientoSaldo.vendedora_id, func.sum(MovimientoSaldo.monto))
+        .group_by(MovimientoSaldo.vendedora_id)
+        .all()
+    )
+    ahora = datetime.utcnow()
+    db.add_all([
+        SaldoVendedora(vendedora_id=vendedora_id, saldo=total or 0.0, actualizado_en=ahora)
+        for vendedora_id, total in filas
+    ])
+    db.commit()
+    return ajustes
+
+
+# ── Endpoints ────────────────────────────────────────────────
+@router.get("/{vendedora_id}")
+def saldo_vendedora(vendedora_id: int, db: Session = Depends(get_db)):
+    return {"vendedora_id": vendedora_id, "saldo": obtener_saldo(db, vendedora_id)}
+
+
+@router.get("/{vendedora_id}/movimientos")
+def movimientos_vendedora(
+    vendedora_id: int,
+    cursor: Optional[int] = Query(None, description="Último id de la página anterior"),
+    limite: int = Query(50, ge=1, le=500),
+    db: Session = Depends(get_db)
+):
+    """Movimientos del libro, del más nuevo al más viejo."""
+    query = db.query(MovimientoSaldo).filter(MovimientoSaldo.vendedora_id == vendedora_id)
+    if cursor is not None:
+        query = query.filter(MovimientoSaldo.id < cursor)
+    return [
+        {
+            "id": m.id,
+            "tipo": m.tipo,
+            "monto": m.monto,
+            "deuda_id": m.deuda_id,
+            "pago_id": m.pago_id,
+            "concepto": m.concepto,
+            "creado_en": m.creado_en
+        }
+        for m in query.order_by(MovimientoSaldo.id.desc()).limit(limite).all()
+    ]
@@ -1,23 +1,127 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, literal
 from sqlalchemy.orm import Session
+from datetime import date, timedelta
+from typing import Optional, Literal
 from database import get_db
-from models import Vendedora, PrintJob, Pago
+from models import Vendedora, Catalogo, Categoria, ImpresionCubo
+from .cache_http import con_etag
+from .cubo import inicio_periodo, siguiente_periodo
 
 router = APIRouter()
 
-@router.get("/dashboard")
-def get_dashboard_stats(db: Session = Depends(get_db)):
-    total_vendedoras = db.query(Vendedora).count()
-    ordenes_activas = db.query(PrintJob).filter(PrintJob.estado == "activo").count()
-    pagos_pendientes = db.query(Pago).filter(Pago.estado == "pendiente").count()
-    ingresos_mes = db.query(Pago).filter(Pago.estado == "completado").all()
+# ── Series de tiempo (cubo periodo × vendedora × catálogo) ───
+def _periodos(desde: date, hasta: date, granularidad: str) -> list:
+    """Todos los inicios de periodo del rango, para completar con ceros."""
+    periodos = []
+    actual = inicio_periodo(desde, granularidad)
+    while actual <= hasta:
+        periodos.append(actual)
+        actual = siguiente_periodo(actual, granularidad)
+    return periodos
 
-    ingresos_mes_total = sum([p.monto for p in ingresos_mes])
 
-    return {
-        "vendedoras": total_vendedoras,
-        "ordenes_activas": ordenes_activas,
-        "pagos_pendientes": pagos_pendientes,
-        "ingresos_mes": ingresos_mes_total,
+def _nombres(db: Session, agrupar: str, ids) -> dict:
+    modelo = {"vendedora": Vendedora, "catalogo": Catalogo, "categoria": Categoria}.get(agrupar)
+    if modelo is None or not ids:
+        return {}
+    return dict(db.query(modelo.id, modelo.nombre).filter(modelo.id.in_(list(ids))).all())
+
+
+def _rango_series(request) -> str:
+    """Rango ya resuelto para el ETag: sin `hasta` depende de la fecha de hoy."""
+    parametros = request.query_params
+    try:
+        hasta = date.fromisoformat(parametros["hasta"]) if parametros.get("hasta") else date.today()
+        desde = date.fromisoformat(parametros["desde"]) if parametros.get("desde") else hasta - timedelta(days=90)
+    except ValueError:
+        return "invalido"  # el endpoint responde 422
+    return f"{desde.isoformat()}_{hasta.isoformat()}"
+
+
+# Los nombres y Catalogo.categoria_id también salen en la respuesta
+@router.get("/series", dependencies=[con_etag("impresiones_cubo", "vendedoras", "catalogos", "categorias",
+                                              extra=_rango_series)])
+def series_impresiones(
+    metrica: Literal["ordenes", "copias", "exceso", "costo_extra"] = "copias",
+    agrupar: Literal["total", "vendedora", "catalogo", "categoria"] = "total",
+    granularidad: Literal["dia", "semana", "mes"] = "dia",
+    desde: Optional[date] = Query(None, description="Por defecto 90 días antes de `hasta`"),
+    hasta: Optional[date] = Query(None, description="Por defecto hoy"),
+    vendedora_id: Optional[int] = None,
+    catalogo_id: Optional[int] = None,
+    categoria_id: Optional[int] = None,
+    top: Optional[int] = Query(None, ge=1, le=100, description="Solo las N series con más total; el resto va a 'otros'"),
+    db: Session = Depends(get_db)
+):
+    """
+    Serie por periodo en formato columnar:
+    {"periodos": [...], "series": [{"id", "nombre", "total", "valores": [...]}]}
+    donde valores[i] corresponde a periodos[i] (periodos sin datos en cero).
+    Las semanas y meses de los extremos se cuentan completos.
+    """
+    hasta = hasta or date.today()
+    desde = desde or hasta - timedelta(days=90)
+    if desde > hasta:
+        raise HTTPException(status_code=400, detail="`desde` no puede ser posterior a `hasta`")
+
+    periodos = _periodos(desde, hasta, granularidad)
+    medida = func.sum(getattr(ImpresionCubo, metrica))
+    claves = {
+        "total": literal(None),
+        "vendedora": ImpresionCubo.vendedora_id,
+        "catalogo": ImpresionCubo.catalogo_id,
+        "categoria": Catalogo.categoria_id,
     }
+    clave = claves[agrupar].label("clave")
 
+    query = db.query(ImpresionCubo.inicio, clave, medida).filter(
+        ImpresionCubo.nivel == granularidad,
+        ImpresionCubo.inicio.between(periodos[0], hasta),
+    )
+    if agrupar == "categoria" or categoria_id is not None:
+        # outerjoin: lo impreso de catálogos ya borrados queda en "Sin categoría"
+        query = query.outerjoin(Catalogo, Catalogo.id == ImpresionCubo.catalogo_id)
+    if vendedora_id is not None:
+        query = query.filter(ImpresionCubo.vendedora_id == vendedora_id)
+    if catalogo_id is not None:
+        query = query.filter(ImpresionCubo.catalogo_id == catalogo_id)
+    if categoria_id is not None:
+        query = query.filter(Catalogo.categoria_id == categoria_id)
+    filas = query.group_by(ImpresionCubo.inicio, clave).all()
+
+    posicion = {p: i for i, p in enumerate(periodos)}
+    valores = {}
+    for inicio, k, v in filas:
+        valores.setdefault(k, [0] * len(periodos))[posicion[inicio]] += v or 0
+
+    orden = sorted(valores, key=lambda k: sum(valores[k]), reverse=True)
+    otros = None
+    if top is not None and len(orden) > top:
+        otros = [sum(col) for col in zip(*(valores[k] for k in orden[top:]))]
+        orden = orden[:top]
+
+    redondear = (lambda v: round(float(v), 2)) if metrica == "costo_extra" else int
+    nombres = _nombres(db, agrupar, [k for k in orden if k is not None])
+    series = [
+        {
+            "id": k,
+            "nombre": "Total" if agrupar == "total" else ("Sin categoría" if k is None else nombres.get(k, f"#{k}")),
+            "total": redondear(sum(valores[k])),
+            "valores": [redondear(v) for v in valores[k]],
+        }
+        for k in orden
+    ]
+    if otros is not None:
+        series.append({"id": None, "nombre": "Otros", "total": redondear(sum(otros)),
+                       "valores": [redondear(v) for v in otros]})
+
+    return {
+        "metrica": metrica,
+        "agrupar": agrupar,
+        "granularidad": granularidad,
+        "desde": desde,
+        "hasta": hasta,
+        "periodos": [p.isoformat() for p in periodos],
+        "series": series,
+    }
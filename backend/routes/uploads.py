@@ -0,0 +1,118 @@
+# routes/uploads.py
+"""
+Guardado de archivos subidos (catálogos, volantes, comprobantes).
+
+- Lee el UploadFile por bloques y escribe en el threadpool: el event loop
+  nunca queda bloqueado por el disco.
+- Revisa la firma (magic bytes) con el primer bloque y corta apenas se pasa
+  del tamaño máximo, antes de terminar de escribir.
+- Calcula el SHA-256 mientras escribe.
+- Escribe en un archivo temporal y lo mueve con os.replace (atómico), así
+  nunca queda un archivo a medias con el nombre final.
+
+Configuración por variables de entorno:
+    UPLOAD_MAX_MB   tamaño máximo por archivo (por defecto 25)
+"""
+import hashlib
+import os
+import uuid
+from dataclasses import dataclass
+
+from fastapi import HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+
+TAM_BLOQUE = 1024 * 1024
+TAM_MAXIMO = int(os.environ.get("UPLOAD_MAX_MB", "25")) * 1024 * 1024
+
+# tipo -> firmas posibles al inicio del archivo
+FIRMAS = {
+    "pdf": (b"%PDF-",),
+    "jpg": (b"\xff\xd8\xff",),
+    "png": (b"\x89PNG\r\n\x1a\n",),
+    "gif": (b"GIF87a", b"GIF89a"),
+    "webp": (b"RIFF",),  # + "WEBP" en el byte 8, ver detectar_tipo
+}
+TIPOS_CATALOGO = ("pdf", "jpg", "png", "gif", "webp")
+TIPOS_COMPROBANTE = ("pdf", "jpg", "png", "webp")
+
+
+@dataclass
+class ArchivoSubido:
+    ruta: str       # ruta final en disco
+    nombre: str     # nombre del archivo dentro del directorio
+    sha256: str
+    tamano: int
+    tipo: str
+
+
+def detectar_tipo(inicio: bytes):
+    for tipo, firmas in FIRMAS.items():
+        if any(inicio.startswith(f) for f in firmas):
+            if tipo == "webp" and inicio[8:12] != b"WEBP":
+                continue
+            return tipo
+    return None
+
+
+def nombre_seguro(nombre: str) -> str:
+    """Solo el nombre base (sin rutas) para no escribir fuera del directorio."""
+    return os.path.basename((nombre or "").replace("\\", "/")) or "archivo"
+
+
+def _escribir(f, sha, bloque: bytes):
+    sha.update(bloque)
+    f.write(bloque)
+
+
+def _descartar(f, temporal: str):
+    f.close()
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+
+async def recibir_upload(archivo: UploadFile, directorio: str,
+                         tipos=TIPOS_CATALOGO, tam_maximo: int = TAM_MAXIMO) -> ArchivoSubido:
+    """
+    Escribe `archivo` en un temporal dentro de `directorio` (ArchivoSubido.ruta)
+    y devuelve su hash; quien llama decide a dónde moverlo. Lanza 413 si supera
+    `tam_maximo` y 415 si la firma no corresponde a ninguno de `tipos`.
+    """
+    tam_declarado = getattr(archivo, "size", None)
+    if tam_declarado is not None and tam_declarado > tam_maximo:
+        raise HTTPException(status_code=413, detail=f"El archivo supera el máximo de {tam_maximo // (1024 * 1024)} MB")
+
+    bloque = await archivo.read(TAM_BLOQUE)
+    tipo = detectar_tipo(bloque[:16])
+    if tipo not in tipos:
+        raise HTTPException(status_code=415, detail=f"Tipo de archivo no permitido (se aceptan: {', '.join(tipos)})")
+
+    os.makedirs(directorio, exist_ok=True)
+    nombre = f".{uuid.uuid4().hex}.part"
+    temporal = os.path.join(directorio, nombre)
+
+    sha = hashlib.sha256()
+    tamano = 0
+    f = await run_in_threadpool(open, temporal, "wb")
+    try:
+        while bloque:
+            tamano += len(bloque)
+            if tamano > tam_maximo:
+                raise HTTPException(status_code=413, detail=f"El archivo supera el máximo de {tam_maximo // (1024 * 1024)} MB")
+            await run_in_threadpool(_escribir, f, sha, bloque)
+            bloque = await archivo.read(TAM_BLOQUE)
+        await run_in_threadpool(f.close)
+    except BaseException:
+        await run_in_threadpool(_descartar, f, temporal)
+        raise
+
+    return ArchivoSubido(ruta=temporal, nombre=nombre, sha256=sha.hexdigest(), tamano=tamano, tipo=tipo)
+
+
+async def guardar_upload(archivo: UploadFile, directorio: str, nombre: str,
+                         tipos=TIPOS_CATALOGO, tam_maximo: int = TAM_MAXIMO) -> ArchivoSubido:
+    """Guarda `archivo` como `directorio/nombre` (ver recibir_upload)."""
+    subido = await recibir_upload(archivo, directorio, tipos, tam_maximo)
+    destino = os.path.join(directorio, nombre)
+    await run_in_threadpool(os.replace, subido.ruta, destino)
+    subido.ruta, subido.nombre = destino, nombre
+    return subido
@@ -1,10 +1,13 @@
 from typing import Optional, List
-from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException
+from fastapi import APIRouter, UploadFile, File, Form, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
-import shutil, os, uuid
+import os
 
 from database import SessionLocal
 from models import Catalogo
+from .print_renditions import generar_renditions
+from .cache_http import con_etag
+from .almacen import guardar_archivo, liberar, borrar_del_disco, ruta_archivo, URL_ALMACEN
 from schemas import CatalogoSchema  # asegúrate de que este schema refleje tu tabla Catalogo
 
 router = APIRouter()
@@ -26,21 +29,17 @@ def get_db():
 # -------------------
 @router.post("/upload", response_model=CatalogoSchema)
 async def upload_catalogo(
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
     vendedora_id: Optional[int] = Form(None),
     categoria_id: int = Form(...),
     db: Session = Depends(get_db)
 ):
-    # Generar nombre único
-    filename = f"{uuid.uuid4().hex}_{file.filename}"
-    filepath = os.path.join(UPLOAD_DIR, filename)
-    
-    # Guardar archivo físicamente
-    with open(filepath, "wb") as buffer:
-        shutil.copyfileobj(file.file, buffer)
+    # Guardar archivo en el almacén (un archivo por contenido)
+    clave = await guardar_archivo(db, file)
 
     # Crear URL
-    url = f"/catalogos/files/{filename}"
+    url = f"{URL_ALMACEN}/{clave}"
 
     # Guardar en DB
     nuevo_pdf = Catalogo(
@@ -48,18 +47,21 @@ async def upload_catalogo(
         categoria_id=categoria_id,
         vendedora_id=vendedora_id,
         url=url,
-        archivo=filename
+        archivo=clave
     )
     db.add(nuevo_pdf)
     db.commit()
     db.refresh(nuevo_pdf)
 
+    # Versiones listas para imprimir, después de responder
+    background_tasks.add_task(generar_renditions, ruta_archivo(clave, UPLOAD_DIR))
+
     return nuevo_pdf
 
 # -------------------
 # GET: PDFs por vendedora (solo los asignados o generales)
 # -------------------
-@router.get("/vendedora/{vendedora_id}", response_model=List[CatalogoSchema])
+@router.get("/vendedora/{vendedora_id}", response_model=List[CatalogoSchema], dependencies=[con_etag("catalogos")])
 def get_catalogo_por_vendedora(vendedora_id: int, db: Session = Depends(get_db)):
     pdfs = db.query(Catalogo).filter(
         (Catalogo.vendedora_id == vendedora_id) | (Catalogo.vendedora_id == None)
@@ -69,7 +71,7 @@ def get_catalogo_por_vendedora(vendedora_id: int, db: Session = Depends(get_db))
 # -------------------
 # GET: PDFs generales (vendedora_id == None)
 # -------------------
-@router.get("/general", response_model=List[CatalogoSchema])
+@router.get("/general", response_model=List[CatalogoSchema], dependencies=[con_etag("catalogos")])
 def get_catalogo_general(db: Session = Depends(get_db)):
     pdfs = db.query(Catalogo).filter(Catalogo.vendedora_id == None).all()
     return pdfs
@@ -83,12 +85,14 @@ def eliminar_catalogo(catalogo_id: int, db: Session = Depends(get_db)):
     if not pdf:
         raise HTTPException(status_code=404, detail="PDF no encontrado")
     
-    # Eliminar archivo físico
-    filepath = os.path.join(UPLOAD_DIR, pdf.archivo)
-    if os.path.exists(filepath):
+    # Eliminar archivo físico (los del almacén, solo si nadie más los usa)
+    huerfano = liberar(db, pdf.archivo)
+    filepath = ruta_archivo(pdf.archivo, UPLOAD_DIR)
+    if not huerfano and filepath.startswith(UPLOAD_DIR) and os.path.exists(filepath):
         os.remove(filepath)
 
     # Eliminar de DB
     db.delete(pdf)
     db.commit()
+    borrar_del_disco(db, huerfano)
     return {"msg": "PDF eliminado correctamente"}
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, EmailStr
 from datetime import date, datetime
-from typing import Optional
+from typing import Optional, List, Literal
 
 # ─── Vendedoras ──────────────────────────────────────────────
 class VendedoraBase(BaseModel):
@@ -54,6 +54,28 @@ class ImpresionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# ─── Impresiones en lote ─────────────────────────────────────
+class ImpresionLoteLinea(BaseModel):
+    usuario_id: int
+    catalogo_id: int
+    cantidad_impresa: int
+
+class ImpresionLoteCreate(BaseModel):
+    fecha: date
+    lineas: List[ImpresionLoteLinea]
+
+class DeudaLoteResponse(BaseModel):
+    usuario_id: int
+    exceso_diario: int = 0
+    exceso_semanal: int = 0
+    monto_diario: float = 0
+    monto_semanal: float = 0
+
+class ImpresionLoteResponse(BaseModel):
+    lineas: List[ImpresionResponse]
+    deudas: List[DeudaLoteResponse]
+    deuda_total: float
+
 # ─── Deudas ─────────────────────────────────────────────────
 class DeudaBase(BaseModel):
     vendedora_id: int
@@ -77,6 +99,14 @@ class DeudaResponse(DeudaBase):
     class Config:
         from_attributes = True
 
+# ─── Verificación de pagos en lote ───────────────────────────
+class DecisionPago(BaseModel):
+    deuda_id: int
+    decision: Literal["aprobar", "rechazar"]
+
+class DecisionesPagoRequest(BaseModel):
+    decisiones: List[DecisionPago]
+
 # ─── Pagos ──────────────────────────────────────────────────
 class PagoBase(BaseModel):
     monto: float
@@ -96,6 +126,12 @@ class PagoResponse(PagoBase):
     class Config:
         from_attributes = True
 
+class PagosDelta(BaseModel):
+    """Respuesta de las listas de pagos con ?since= (routes/cambios.py)."""
+    since: int
+    cambios: List[PagoResponse]
+    borrados: List[int]
+
 # ─── Configuración de límites ────────────────────────────────
 class LimitsUpdate(BaseModel):
     diario: float
@@ -107,6 +143,33 @@ class LimitsUpdate(BaseModel):
     class Config:
         from_attributes = True
 
+# ─── Límites por vendedora / categoría ───────────────────────
+class LimiteVendedoraBase(BaseModel):
+    vendedora_id: Optional[int] = None
+    categoria_id: Optional[int] = None
+    diario: Optional[float] = None
+    semanal: Optional[float] = None
+    mensual: Optional[float] = None
+    costo_excedente: Optional[float] = None
+
+class LimiteVendedoraResponse(LimiteVendedoraBase):
+    id: int
+    actualizado_en: Optional[datetime] = None
+    vigente: bool = True  # False mientras applyToAll está activo (se usan los globales)
+
+    class Config:
+        from_attributes = True
+
+class LimitesEfectivosResponse(BaseModel):
+    vendedora_id: int
+    categoria_id: Optional[int] = None
+    diario: float
+    semanal: float
+    mensual: float
+    costo_excedente: float
+    origen: str  # "global" | "vendedora" | "categoria" | "vendedora_categoria"
+    version: int
+
 # ─── Deuda por exceso (request interno) ─────────────────────
 class DeudaExcesoCreate(BaseModel):
     usuario_id: int
@@ -124,6 +187,28 @@ class NotificacionResponse(BaseModel):
     class Config:
         from_attributes = True
 
+# ─── Cola de impresión ──────────────────────────────────────
+class PrintJobResponse(BaseModel):
+    id: int
+    usuario_id: Optional[int] = None
+    catalogo_id: Optional[int] = None
+    impresion_id: Optional[int] = None
+    file_path: str
+    copies: int
+    copias_impresas: int
+    estado: str
+    intentos: int
+    max_intentos: int
+    error: Optional[str] = None
+    lease_owner: Optional[str] = None
+    lease_until: Optional[datetime] = None
+    disponible_en: Optional[datetime] = None
+    creado_en: Optional[datetime] = None
+    actualizado_en: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
 # ─── Request para impresión directa ─────────────────────────
 class PrintRequest(BaseModel):
     file_path: str
@@ -1,8 +1,9 @@
-import React, { useState, useEffect, useCallback } from "react";
+import React, { useState, useCallback } from "react";
 import axios from "axios";
 import dayjs from "dayjs";
 import utc from "dayjs/plugin/utc";
 import timezone from "dayjs/plugin/timezone";
+import { useEventos } from "../services/eventos";
 
 // Extender Day.js
 dayjs.extend(utc);
@@ -86,11 +87,8 @@ export default function AdminImpresiones() {
     }
   }, []);
 
-  useEffect(() => {
-    fetchImpresiones();
-    const interval = setInterval(fetchImpresiones, 30000);
-    return () => clearInterval(interval);
-  }, [fetchImpresiones]);
+  // Recarga al conectar y cuando se registran impresiones (sin polling)
+  useEventos(["impresion_creada"], fetchImpresiones);
 
   const totalPages = Math.ceil(
     impresiones.filter(
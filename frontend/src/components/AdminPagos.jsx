@@ -1,9 +1,12 @@
 // AdminPagos.jsx
-import React, { useState, useEffect } from "react";
+import React, { useState, useRef } from "react";
 import axios from "axios";
 import dayjs from "dayjs";
 import utc from "dayjs/plugin/utc";
 import timezone from "dayjs/plugin/timezone";
+import { useEventos } from "../services/eventos";
+import { aplicarCambios, esIncremental } from "../services/cambios";
+import { urlMiniatura } from "../services/miniaturas";
 
 dayjs.extend(utc);
 dayjs.extend(timezone);
@@ -15,31 +18,37 @@ export default function AdminPagos({ darkMode }) {
   const [currentPage, setCurrentPage] = useState(1);
   const itemsPerPage = 20;
 
-  // 🔹 Fetch pagos
-  const fetchPagos = async () => {
+  // Ordenar por fecha descendente
+  const ordenar = (datos) =>
+    datos.sort((a, b) => dayjs(b.fecha).valueOf() - dayjs(a.fecha).valueOf());
+
+  // 🔹 Fetch pagos (lista completa al conectar, después solo lo que cambió)
+  const since = useRef(null);
+  const fetchPagos = async (evento) => {
+    const incremental = esIncremental(evento, since.current);
     try {
-      setLoading(true);
-      const res = await axios.get("http://localhost:8000/pagos/");
-      // res.data debe venir con: id, vendedora.nombre, monto, estado, fecha, metodo, referencia, capture_url
-      const datos = res.data.map((pago) => ({
-        ...pago,
-        fecha: pago.fecha,
-      }));
-      // Ordenar por fecha descendente
-      datos.sort((a, b) => dayjs(b.fecha).valueOf() - dayjs(a.fecha).valueOf());
-      setPagos(datos);
+      if (!incremental) setLoading(true);
+      const res = await axios.get("http://localhost:8000/pagos/pagos/", {
+        params: incremental ? { since: since.current } : {},
+      });
+      // pagos con: id, vendedora_id, monto, estado, fecha, metodo, referencia, capture_url
+      if (incremental) {
+        since.current = res.data.since;
+        setPagos((prev) => ordenar(aplicarCambios(prev, res.data)));
+      } else {
+        since.current = Number(res.headers["x-since"]);
+        setPagos(ordenar([...res.data]));
+      }
     } catch (err) {
+      if (err.response?.status === 410) since.current = null;
       console.error(err);
     } finally {
       setLoading(false);
     }
   };
 
-  useEffect(() => {
-    fetchPagos();
-    const interval = setInterval(fetchPagos, 30000);
-    return () => clearInterval(interval);
-  }, []);
+  // Recarga al conectar y cuando entra o se aprueba un pago (sin polling)
+  useEventos(["pago_registrado", "pago_aprobado"], fetchPagos);
 
   const totalPages = Math.ceil(pagos.length / itemsPerPage);
   const paginatedData = pagos.slice(
@@ -138,7 +147,16 @@ export default function AdminPagos({ darkMode }) {
                       rel="noopener noreferrer"
                       className="text-blue-600 hover:underline"
                     >
-                      Ver
+                      {urlMiniatura(pago.capture_url) ? (
+                        <img
+                          src={urlMiniatura(pago.capture_url)}
+                          alt="Comprobante"
+                          loading="lazy"
+                          className="h-12 w-12 object-cover rounded"
+                        />
+                      ) : (
+                        "Ver"
+                      )}
                     </a>
                   ) : (
                     "-"
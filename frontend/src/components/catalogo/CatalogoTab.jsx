@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from "react";
 import axios from "axios";
 import toast, { Toaster } from "react-hot-toast";
+import { urlMiniatura } from "../../services/miniaturas";
 
 export default function CatalogoTab() {
   const [vendedoras, setVendedoras] = useState([]);
@@ -175,6 +176,14 @@ export default function CatalogoTab() {
                 className="bg-white dark:bg-gray-800 border dark:border-gray-600 rounded-2xl shadow hover:shadow-lg transition p-5 flex flex-col justify-between"
               >
                 <div>
+                  {urlMiniatura(pdf.url) && (
+                    <img
+                      src={urlMiniatura(pdf.url)}
+                      alt={pdf.nombre}
+                      loading="lazy"
+                      className="w-full h-40 object-cover rounded-lg mb-3"
+                    />
+                  )}
                   <h3 className="font-semibold text-lg text-gray-800 dark:text-white mb-2">
                     {pdf.nombre}
                   </h3>
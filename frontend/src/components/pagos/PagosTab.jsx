@@ -1,5 +1,6 @@
 import React, { useState, useEffect } from "react";
 import axios from "axios";
+import { urlMiniatura } from "../../services/miniaturas";
 
 export default function PagosTab() {
   const [vendedoras, setVendedoras] = useState([]);
@@ -212,7 +213,16 @@ export default function PagosTab() {
                             rel="noopener noreferrer"
                             className="text-blue-600 dark:text-white hover:underline"
                           >
-                            Ver comprobante
+                            {urlMiniatura(d.capture_url) ? (
+                              <img
+                                src={urlMiniatura(d.capture_url)}
+                                alt="Ver comprobante"
+                                loading="lazy"
+                                className="h-12 w-12 object-cover rounded"
+                              />
+                            ) : (
+                              "Ver comprobante"
+                            )}
                           </a>
                         ) : (
                           "-"
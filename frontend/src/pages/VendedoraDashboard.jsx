@@ -1,9 +1,11 @@
-import React, { useContext, useState, useEffect, useCallback } from "react";
+import React, { useContext, useState, useEffect, useCallback, useRef } from "react";
 import { FaPrint, FaFileAlt, FaSun, FaMoon, FaBell } from "react-icons/fa";
 import axios from "axios";
 import VendedoraVolantes from "./VendedoraVolantes";
 import VendedoraDeudas from "./VendedoraDeudas";
 import { AuthContext } from "../context/AuthContext";
+import { useEventos } from "../services/eventos";
+import { aplicarCambios, esIncremental } from "../services/cambios";
 
 export default function VendedoraDashboard() {
   const { user, logout } = useContext(AuthContext);
@@ -72,28 +74,40 @@ export default function VendedoraDashboard() {
     }
   }, [user?.id]);
 
-  useEffect(() => {
-    fetchDeudas();
-  }, [fetchDeudas]);
-
-  // 🔹 Traer notificaciones
-  const fetchNotificacionesVendedora = useCallback(async () => {
+  // 🔹 Traer notificaciones (completas al conectar, después solo lo nuevo)
+  const sinceNotificaciones = useRef(null);
+  const fetchNotificacionesVendedora = useCallback(async (evento) => {
     if (!user?.id) return;
+    const incremental = esIncremental(evento, sinceNotificaciones.current);
     try {
       const res = await axios.get(
         `http://localhost:8000/notificaciones/${user.id}`,
+        { params: incremental ? { since: sinceNotificaciones.current } : {} },
       );
-      setNotificaciones(Array.isArray(res.data) ? res.data : []);
+      if (incremental) {
+        sinceNotificaciones.current = res.data.since;
+        setNotificaciones((prev) =>
+          aplicarCambios(prev, res.data).sort((a, b) => b.fecha.localeCompare(a.fecha)),
+        );
+      } else {
+        sinceNotificaciones.current = Number(res.headers["x-since"]);
+        setNotificaciones(Array.isArray(res.data) ? res.data : []);
+      }
     } catch (err) {
+      if (err.response?.status === 410) sinceNotificaciones.current = null;
       console.error("Error al traer notificaciones:", err);
     }
   }, [user?.id]);
 
-  useEffect(() => {
-    fetchNotificacionesVendedora();
-    const interval = setInterval(fetchNotificacionesVendedora, 10000); // cada 10s
-    return () => clearInterval(interval);
-  }, [fetchNotificacionesVendedora]);
+  // Notificaciones y deudas se recargan al conectar y cuando el servidor avisa
+  useEventos(
+    ["notificacion_creada", "deuda_cambiada"],
+    (evento) => {
+      if (evento.tipo !== "deuda_cambiada") fetchNotificacionesVendedora(evento);
+      if (evento.tipo !== "notificacion_creada") fetchDeudas();
+    },
+    { vendedoraId: user?.id, activo: Boolean(user?.id) }
+  );
 
   const marcarNotificacionLeida = async (id) => {
     try {
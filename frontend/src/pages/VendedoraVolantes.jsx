@@ -1,6 +1,7 @@
 import React, { useState, useEffect, useContext } from "react";
 import axios from "axios";
 import { AuthContext } from "../context/AuthContext";
+import { urlMiniatura } from "../services/miniaturas";
 
 export default function VendedoraVolantes({
   darkMode,
@@ -232,7 +233,8 @@ export default function VendedoraVolantes({
                 </div>
               ) : (
                 <img
-                  src={fileUrl}
+                  src={urlMiniatura(volante.url) || fileUrl}
+                  loading="lazy"
                   alt={volante.nombre}
                   className="w-full h-80 sm:h-96 md:h-96 object-cover"
                   onClick={() => handleIncrementBadge(volante.id)}
@@ -287,7 +289,7 @@ export default function VendedoraVolantes({
                 />
               ) : (
                 <img
-                  src={`http://localhost:8000${modalVolante.url}`}
+                  src={urlMiniatura(modalVolante.url, "vista") || `http://localhost:8000${modalVolante.url}`}
                   alt={modalVolante.nombre}
                   className="w-full h-[70vh] object-contain"
                 />
@@ -0,0 +1,13 @@
+// Listas incrementales (?since=): la primera carga trae la lista completa y
+// el cursor en la cabecera X-Since; después solo llega lo que cambió.
+
+// Aplica {cambios, borrados} a la lista en memoria (sin ordenar).
+export function aplicarCambios(lista, { cambios, borrados }, clave = "id") {
+  const fuera = new Set([...borrados, ...cambios.map((fila) => fila[clave])]);
+  return [...cambios, ...lista.filter((fila) => !fuera.has(fila[clave]))];
+}
+
+// "conectado" y "resync" (services/eventos.js) piden la lista completa.
+export function esIncremental(evento, since) {
+  return since != null && evento && !["conectado", "resync"].includes(evento.tipo);
+}
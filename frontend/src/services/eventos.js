@@ -0,0 +1,27 @@
+import { useEffect, useRef } from "react";
+
+const API_URL = "http://localhost:8000";
+
+// Suscripción a /eventos/stream (SSE). `alCambiar` se llama al conectar o
+// reconectar ("conectado"), si el servidor pide recargar ("resync") y con
+// cada evento de `tipos`: reemplaza el setInterval de las listas.
+// Sin `vendedoraId` llegan los eventos de todas (admin); con `activo` en
+// false no se conecta (por ejemplo, mientras no hay usuario).
+export function useEventos(tipos, alCambiar, { vendedoraId = null, activo = true } = {}) {
+  const callback = useRef(alCambiar);
+  callback.current = alCambiar;
+  const claveTipos = tipos.join(",");
+
+  useEffect(() => {
+    if (!activo) return undefined;
+    const params = new URLSearchParams({ tipos: claveTipos });
+    if (vendedoraId != null) params.set("vendedora_id", vendedoraId);
+    const fuente = new EventSource(`${API_URL}/eventos/stream?${params}`);
+
+    const avisar = (e) => callback.current(JSON.parse(e.data));
+    ["conectado", "resync", ...claveTipos.split(",")].forEach((tipo) =>
+      fuente.addEventListener(tipo, avisar)
+    );
+    return () => fuente.close(); // EventSource reconecta solo si se corta
+  }, [claveTipos, vendedoraId, activo]);
+}
@@ -0,0 +1,16 @@
+const API_URL = "http://localhost:8000";
+
+const EXTENSIONES_IMAGEN = [".jpg", ".jpeg", ".png", ".bmp", ".gif", ".webp"];
+
+export function esImagen(src) {
+  const ruta = (src || "").split("?")[0].toLowerCase();
+  return EXTENSIONES_IMAGEN.some((ext) => ruta.endsWith(ext));
+}
+
+// Versión reducida de una imagen subida (GET /miniaturas/{tamano}?src=...):
+// "mini" en listas y tarjetas, "vista" en los modales. `src` es la URL tal
+// como la devuelve la API. Para lo que no es imagen (PDF) devuelve null.
+export function urlMiniatura(src, tamano = "mini") {
+  if (!esImagen(src)) return null;
+  return `${API_URL}/miniaturas/${tamano}?src=${encodeURIComponent(src)}`;
+}